@@ -4,14 +4,27 @@ import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import Generator
+from typing import Generator, Optional
 from backend.config import settings
+from backend.utils.cache import TTLCache
 
 # Security
 security = HTTPBearer()
 
-def get_db() -> Generator:
-    conn = psycopg2.connect(
+# Resolved user/role/organization per user id. Kept short-lived and explicitly
+# invalidated by the user management endpoints, so most authenticated requests
+# never touch the database to identify the caller. The cache is per process:
+# invalidation only reaches the worker that served the change, and the other
+# workers keep the old entry (e.g. a revoked admin role) for up to
+# USER_CONTEXT_CACHE_TTL_SECONDS.
+user_context_cache = TTLCache(
+    max_entries=settings.USER_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.USER_CONTEXT_CACHE_TTL_SECONDS,
+    name="user_context"
+)
+
+def _connect():
+    return psycopg2.connect(
         host=settings.POSTGRES_HOST,
         database=settings.POSTGRES_DB,
         user=settings.POSTGRES_USER,
@@ -19,27 +32,65 @@ def get_db() -> Generator:
         port=settings.POSTGRES_PORT,
         cursor_factory=RealDictCursor
     )
+
+def get_db() -> Generator:
+    conn = _connect()
     try:
         yield conn
     finally:
         conn.close()
 
+def _load_user_context(user_id) -> Optional[dict]:
+    """Resolve user, role and organization name in a single query"""
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT u.id, u.email, u.name, u.role, u.organization_id, o.name AS organization_name
+            FROM users u
+            LEFT JOIN organizations o ON o.id = u.organization_id
+            WHERE u.id = %s
+        """, (user_id,))
+        row = cursor.fetchone()
+        cursor.close()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    return {
+        "id": row["id"],
+        "email": row["email"],
+        "name": row["name"] or "",
+        "role": row["role"],
+        "organization_id": row.get("organization_id"),
+        "organization_name": row.get("organization_name")
+    }
+
+def invalidate_user_context(user_id=None, organization_id=None):
+    """Drop cached user context after a user (or a whole organization) changes.
+
+    Only affects this worker process; see user_context_cache.
+    """
+    if user_id is not None:
+        user_context_cache.invalidate(str(user_id))
+    if organization_id is not None:
+        user_context_cache.invalidate_where(lambda _, ctx: ctx.get("organization_id") == organization_id)
+
 # Dependency to get current user
 def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: psycopg2.extensions.connection = Depends(get_db)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     try:
         payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except (ExpiredSignatureError, InvalidTokenError):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    cursor = db.cursor()
-    cursor.execute("SELECT id, email, name, role, organization_id FROM users WHERE id = %s", (payload["sub"],))
-    row = cursor.fetchone()
-    if not row:
+    user_id = str(payload["sub"])
+    context = user_context_cache.get_or_load(user_id, lambda: _load_user_context(user_id))
+    if not context:
         raise HTTPException(status_code=404, detail="User not found")
-    return {"id": row["id"], "email": row["email"], "name": row["name"] or "", "role": row["role"], "organization_id": row.get("organization_id")}
+    # Hand out a copy so routes can't mutate the cached entry
+    return dict(context)
 
 def verify_admin_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
@@ -50,4 +101,4 @@ def verify_admin_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token") 
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token")
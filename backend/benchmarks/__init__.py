@@ -0,0 +1,5 @@
+"""
+Performance benchmarks
+End-to-end load tests and ingestion microbenchmarks. See README.md in this
+directory for how to run them.
+"""
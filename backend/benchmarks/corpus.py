@@ -0,0 +1,83 @@
+"""
+Synthetic benchmark corpus
+Scales the sample texts in `backend/organization_documents` up to any number
+of documents of any size by reshuffling their sentences with a fixed seed, so
+runs on different commits ingest byte-identical inputs.
+"""
+
+import argparse
+import os
+import random
+import re
+from pathlib import Path
+from typing import Iterator, List
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent / "organization_documents"
+DEFAULT_SEED = 1234
+
+
+def load_sentences(source_dir: Path = SOURCE_DIR) -> List[str]:
+    """All sentences of the sample organization documents"""
+    sentences = []
+    for path in sorted(source_dir.rglob("*.txt")):
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        for sentence in re.split(r'(?<=[.!?])\s+|\n+', text):
+            sentence = sentence.strip()
+            if len(sentence) > 20:
+                sentences.append(sentence)
+    if not sentences:
+        raise RuntimeError(f"No sample sentences found under {source_dir}")
+    return sentences
+
+
+def generate_text(size_bytes: int, sentences: List[str], rng: random.Random) -> str:
+    """Paragraphs of shuffled sample sentences, roughly `size_bytes` long"""
+    parts = []
+    total = 0
+    while total < size_bytes:
+        paragraph = " ".join(rng.choice(sentences) for _ in range(rng.randint(3, 8)))
+        parts.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(parts)[:size_bytes]
+
+
+def iter_documents(count: int, size_bytes: int, seed: int = DEFAULT_SEED) -> Iterator[tuple]:
+    """Yield (filename, text) pairs"""
+    sentences = load_sentences()
+    rng = random.Random(seed)
+    for i in range(count):
+        yield f"bench_doc_{i:05d}.txt", generate_text(size_bytes, sentences, rng)
+
+
+def sample_questions(count: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """Questions built from corpus sentences so retrieval has real matches"""
+    sentences = load_sentences()
+    rng = random.Random(seed + 1)
+    questions = []
+    for _ in range(count):
+        words = [w for w in re.findall(r'[A-Za-z]+', rng.choice(sentences)) if len(w) > 3]
+        topic = " ".join(words[:6]) or "company policies"
+        questions.append(f"What does the documentation say about {topic}?")
+    return questions
+
+
+def write_corpus(output_dir: str, count: int, size_bytes: int, seed: int = DEFAULT_SEED) -> List[str]:
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for filename, text in iter_documents(count, size_bytes, seed):
+        path = os.path.join(output_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark corpus")
+    parser.add_argument("output_dir")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--size-kb", type=int, default=32, help="Size of each document in KB")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+    written = write_corpus(args.output_dir, args.documents, args.size_kb * 1024, args.seed)
+    print(f"Wrote {len(written)} documents to {args.output_dir}")
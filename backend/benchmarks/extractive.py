@@ -0,0 +1,94 @@
+"""
+Extractive answer benchmark
+Times the LLM-free answer path (utils/extractive.py) over retrieved chunks of
+synthetic corpus text: once with the sentence index stored at ingestion, once
+with sentences embedded per question (documents indexed before it existed,
+keyword-only hits). Also reports the ingestion cost of building the index.
+The query embedding is warmed first, as similarity search has already cached
+it when the extractor runs.
+
+    python -m backend.benchmarks.extractive --chunks 5,20 --questions 50
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import List, Optional
+
+from backend.benchmarks import corpus
+from backend.benchmarks.load_test import percentile
+from backend.utils.extractive import extract_sentences, gather_sentences, index_sentences
+from backend.utils.vector_store import EmbeddingModel
+
+
+def build_chunks(count: int, chunk_chars: int, rng: random.Random, sentences: List[str]) -> List[dict]:
+    return [{"content": corpus.generate_text(chunk_chars, sentences, rng).replace("\n\n", " ")} for _ in range(count)]
+
+
+def run_case(model: EmbeddingModel, chunks: List[dict], questions: List[str], stored: bool) -> dict:
+    dim = model.get_embedding_dim()
+    if stored:
+        started = time.perf_counter()
+        index = index_sentences([c["content"] for c in chunks], model.embed_batch)
+        index_ms = (time.perf_counter() - started) * 1000
+        chunks = [{**c, "sentence_spans": spans, "sentence_embeddings": vectors} for c, (spans, vectors) in zip(chunks, index)]
+    latencies = []
+    sentence_count = 0
+    for question in questions:
+        query = model.embed_query(question)
+        started = time.perf_counter()
+        sentences, matrix = gather_sentences(chunks, model.embed_batch, dim)
+        extract_sentences(query, sentences, matrix, max_sentences=3)
+        latencies.append((time.perf_counter() - started) * 1000)
+        sentence_count = len(sentences)
+    row = {
+        "chunks": len(chunks),
+        "index": "stored" if stored else "computed",
+        "sentences": sentence_count,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+    }
+    if stored:
+        row["index_ms"] = round(index_ms, 1)
+    return row
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Extractive answer latency with stored vs computed sentence embeddings")
+    parser.add_argument("--chunks", default="5,20", help="Comma-separated retrieved chunk counts")
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--target-ms", type=float, default=50.0, help="Flag cases whose p95 exceeds this")
+    parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    model = EmbeddingModel(model_name=args.model)
+    rng = random.Random(args.seed)
+    sentences = corpus.load_sentences()
+    questions = corpus.sample_questions(args.questions, args.seed)
+
+    results = []
+    print(f"{'chunks':>6} {'index':<9} {'sentences':>9} {'p50 ms':>8} {'p95 ms':>8} {'index ms':>9}")
+    for count in (int(c) for c in args.chunks.split(",")):
+        chunks = build_chunks(count, args.chunk_chars, rng, sentences)
+        for stored in (True, False):
+            row = run_case(model, chunks, questions, stored)
+            row["within_target"] = row["p95_ms"] <= args.target_ms
+            results.append(row)
+            flag = "" if row["within_target"] else f"  > {args.target_ms:g}ms"
+            print(f"{row['chunks']:>6} {row['index']:<9} {row['sentences']:>9} {row['p50_ms']:>8.2f} "
+                  f"{row['p95_ms']:>8.2f} {row.get('index_ms', '-'):>9}{flag}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seed": args.seed, "model": args.model, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
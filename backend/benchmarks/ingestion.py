@@ -0,0 +1,421 @@
+"""
+Ingestion microbenchmarks
+Times each ingestion stage in isolation (text cleaning, chunking, PDF/DOCX/TXT
+extraction, embedding, chunk/embedding inserts and COPY) on synthetic inputs from 1KB
+up to 100MB and reports MB/s, chunks/s and peak RSS per stage and size.
+
+    python -m backend.benchmarks.ingestion --sizes 1KB,1MB,16MB,100MB --output ingestion.json
+    python -m backend.benchmarks.ingestion --targets embed_batch --batch-sizes 8,32,128
+
+Every case runs in a fresh subprocess so peak RSS belongs to that case alone.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import random
+import resource
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.benchmarks import corpus
+
+MB = 1024 * 1024
+UNITS = {"KB": 1024, "MB": MB, "GB": 1024 * MB}
+
+# Larger inputs take minutes per case for these stages; --no-size-cap lifts the limit
+SIZE_CAPS = {
+    "extract_pdf": 32 * MB,
+    "extract_docx": 32 * MB,
+    "embed_batch": 1 * MB,
+    "insert_chunks": 16 * MB,
+    "insert_embeddings": 16 * MB,
+    "copy_chunks": 16 * MB,
+    "copy_embeddings": 16 * MB,
+}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    for unit, factor in UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    for unit, factor in (("MB", MB), ("KB", 1024)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return f"{size}B"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (MB if sys.platform == "darwin" else 1024), 1)
+
+
+# ---- synthetic inputs -------------------------------------------------------
+
+def synthetic_text(size: int, seed: int) -> str:
+    """Corpus-like text with a sprinkling of control characters and URLs,
+    so the cleaning steps have real work to do"""
+    rng = random.Random(seed)
+    text = corpus.generate_text(size, corpus.load_sentences(), rng)
+    noise = ["\x0c", "\x00", "\x1b", " https://example.com/docs ", "\r\n"]
+    parts = text.split(". ")
+    for i in range(0, len(parts), 25):
+        parts[i] += rng.choice(noise)
+    return ". ".join(parts)[:size]
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def synthetic_pdf(size: int, seed: int) -> bytes:
+    """Plain-text PDF (Helvetica, 60 lines per page) carrying roughly `size` bytes of text"""
+    text = corpus.generate_text(size, corpus.load_sentences(), random.Random(seed))
+    text = text.encode("latin-1", errors="ignore").decode("latin-1")
+    lines = [text[i:i + 90] for i in range(0, len(text), 90)] or [""]
+    pages = [lines[i:i + 60] for i in range(0, len(lines), 60)]
+
+    objects: List[bytes] = []
+    page_refs = []
+    font_id = 3
+    next_id = 4
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in page_lines) + " ET"
+        stream_bytes = stream.encode("latin-1")
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects.append(
+            f"{content_id} 0 obj << /Length {len(stream_bytes)} >> stream\n".encode("latin-1")
+            + stream_bytes + b"\nendstream endobj\n"
+        )
+        objects.append(
+            f"{page_id} 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >> endobj\n".encode("latin-1")
+        )
+        page_refs.append(f"{page_id} 0 R")
+
+    header = [
+        b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n",
+        f"2 0 obj << /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >> endobj\n".encode("latin-1"),
+        b"3 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj\n",
+    ]
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for obj in header + objects:
+        offsets.append(out.tell())
+        out.write(obj)
+    xref = out.tell()
+    out.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer << /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def synthetic_docx(size: int, seed: int) -> bytes:
+    import docx
+
+    document = docx.Document()
+    text = corpus.generate_text(size, corpus.load_sentences(), random.Random(seed))
+    for paragraph in text.split("\n\n"):
+        document.add_paragraph(paragraph)
+    out = BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def synthetic_chunks(size: int, seed: int) -> List[dict]:
+    from backend.utils.advanced_processor import AdvancedDocumentChunker
+
+    # Character chunking: semantic chunking of cleaned text (newlines collapsed)
+    # yields a single chunk per document, which says nothing about per-chunk cost
+    return AdvancedDocumentChunker().chunk_document(synthetic_text(size, seed), strategy="character")
+
+
+# ---- stages -------------------------------------------------------------------
+# Each target is (setup(size, seed, options) -> payload, run(payload, options) -> chunks produced)
+
+def _setup_raw_text(size, seed, options):
+    return synthetic_text(size, seed)
+
+
+def _setup_clean_text(size, seed, options):
+    from backend.utils.advanced_processor import TextPreprocessor
+
+    # The chunkers see text that has already been through clean_text
+    return TextPreprocessor.clean_text(synthetic_text(size, seed))
+
+
+def _run_clean_text(text, options):
+    from backend.utils.advanced_processor import TextPreprocessor
+
+    TextPreprocessor.clean_text(text)
+    return 0
+
+
+def _run_strip_control_chars(text, options):
+    from backend.utils.advanced_processor import TextPreprocessor
+
+    TextPreprocessor.strip_control_chars(text)
+    return 0
+
+
+def _run_chunk_character(text, options):
+    from backend.utils.advanced_processor import AdvancedDocumentChunker
+
+    return len(AdvancedDocumentChunker().chunk_by_character_size(text))
+
+
+def _run_chunk_semantic(text, options):
+    from backend.utils.advanced_processor import AdvancedDocumentChunker
+
+    return len(AdvancedDocumentChunker().chunk_by_semantic_units(text))
+
+
+def _extractor(name: str) -> Callable:
+    def run(content, options):
+        from backend.utils.advanced_processor import AdvancedDocumentProcessor
+
+        asyncio.run(getattr(AdvancedDocumentProcessor, name)(content))
+        return 0
+    return run
+
+
+def _setup_txt(size, seed, options):
+    return synthetic_text(size, seed).encode("utf-8")
+
+
+def _setup_pdf(size, seed, options):
+    return synthetic_pdf(size, seed)
+
+
+def _setup_docx(size, seed, options):
+    return synthetic_docx(size, seed)
+
+
+def _setup_embed(size, seed, options):
+    from backend.utils.vector_store import EmbeddingModel
+
+    texts = [c["content"] for c in synthetic_chunks(size, seed)]
+    model = EmbeddingModel(options.get("model", "all-MiniLM-L6-v2"))
+    model.embed_batch(texts[:2])  # warm-up outside the timed region
+    return model, texts
+
+
+def _run_embed(payload, options):
+    model, texts = payload
+    batch_size = options["batch_size"]
+    for i in range(0, len(texts), batch_size):
+        model.embed_batch(texts[i:i + batch_size])
+    return len(texts)
+
+
+def _bench_connection():
+    from backend.database.db import connect
+
+    conn = connect()
+    cursor = conn.cursor()
+    # Temp copies keep the production column types without the foreign keys
+    cursor.execute("CREATE TEMP TABLE bench_chunks (LIKE rag_document_chunks INCLUDING DEFAULTS)")
+    cursor.execute("CREATE TEMP TABLE bench_embeddings (LIKE rag_embeddings INCLUDING DEFAULTS)")
+    conn.commit()
+    cursor.close()
+    return conn
+
+
+def _setup_insert_chunks(size, seed, options):
+    document_id = str(uuid.uuid4())
+    rows = [
+        (0, str(uuid.uuid4()), document_id, c["content"], c["chunk_index"], c["start_char"],
+         c["end_char"], c["tokens_count"], json.dumps(c["metadata"]), None, None)
+        for c in synthetic_chunks(size, seed)
+    ]
+    return _bench_connection(), rows
+
+
+def _run_insert_chunks(payload, options):
+    from psycopg2.extras import execute_values
+
+    conn, rows = payload
+    cursor = conn.cursor()
+    execute_values(
+        cursor,
+        """
+        INSERT INTO bench_chunks
+        (organization_id, chunk_id, document_id, content, chunk_index, start_char, end_char, tokens_count, metadata,
+         sentence_spans, sentence_embeddings)
+        VALUES %s
+        """,
+        rows
+    )
+    conn.commit()
+    cursor.execute("TRUNCATE bench_chunks")
+    conn.commit()
+    cursor.close()
+    return len(rows)
+
+
+def _setup_insert_embeddings(size, seed, options):
+    import numpy as np
+
+    # One 384-dim float32 vector per chunk, the size produced by the default model
+    chunk_count = max(len(synthetic_chunks(size, seed)), 1)
+    vectors = np.random.default_rng(seed).standard_normal((chunk_count, 384)).astype("float32")
+    document_id = str(uuid.uuid4())
+    rows = [
+        (0, str(uuid.uuid4()), str(uuid.uuid4()), document_id, 0, vector.tobytes(), "all-MiniLM-L6-v2")
+        for vector in vectors
+    ]
+    return _bench_connection(), rows
+
+
+def _run_insert_embeddings(payload, options):
+    from psycopg2.extras import execute_values
+
+    conn, rows = payload
+    cursor = conn.cursor()
+    execute_values(
+        cursor,
+        """
+        INSERT INTO bench_embeddings
+        (organization_id, embedding_id, chunk_id, document_id, user_id, embedding, embedding_model)
+        VALUES %s
+        """,
+        rows
+    )
+    conn.commit()
+    cursor.execute("TRUNCATE bench_embeddings")
+    conn.commit()
+    cursor.close()
+    return len(rows)
+
+
+def _copy_target(table: str, columns_name: str) -> Callable:
+    def run(payload, options):
+        from backend.utils import bulk_writer
+
+        conn, rows = payload
+        cursor = conn.cursor()
+        # Rows are fed from a generator, as ingestion does
+        written = bulk_writer.copy_rows(cursor, table, getattr(bulk_writer, columns_name), (row for row in rows))
+        conn.commit()
+        cursor.execute(f"TRUNCATE {table}")
+        conn.commit()
+        cursor.close()
+        return written
+    return run
+
+
+TARGETS: Dict[str, Tuple[Callable, Callable]] = {
+    "clean_text": (_setup_raw_text, _run_clean_text),
+    "strip_control_chars": (_setup_raw_text, _run_strip_control_chars),
+    "chunk_by_character_size": (_setup_clean_text, _run_chunk_character),
+    "chunk_by_semantic_units": (_setup_clean_text, _run_chunk_semantic),
+    "extract_txt": (_setup_txt, _extractor("extract_text_from_txt")),
+    "extract_pdf": (_setup_pdf, _extractor("extract_text_from_pdf")),
+    "extract_docx": (_setup_docx, _extractor("extract_text_from_docx")),
+    "embed_batch": (_setup_embed, _run_embed),
+    "insert_chunks": (_setup_insert_chunks, _run_insert_chunks),
+    "insert_embeddings": (_setup_insert_embeddings, _run_insert_embeddings),
+    "copy_chunks": (_setup_insert_chunks, _copy_target("bench_chunks", "CHUNK_COLUMNS")),
+    "copy_embeddings": (_setup_insert_embeddings, _copy_target("bench_embeddings", "EMBEDDING_COLUMNS")),
+}
+
+
+def run_case(target: str, size: int, seed: int, repeat: int, options: dict) -> dict:
+    """Set up and time one (target, size) case; meant to run in its own process"""
+    setup, run = TARGETS[target]
+    # Keep module import time out of the timed region
+    importlib.import_module("backend.utils.advanced_processor")
+    payload = setup(size, seed, options)
+    rss_before = peak_rss_mb()
+    timings = []
+    chunks = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = run(payload, options)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "target": target,
+        "size": format_size(size),
+        "bytes": size,
+        **({"batch_size": options["batch_size"]} if "batch_size" in options else {}),
+        "seconds": round(best, 6),
+        "median_seconds": round(sorted(timings)[len(timings) // 2], 6),
+        "mb_per_second": round(size / MB / best, 3) if best else None,
+        "chunks": chunks,
+        "chunks_per_second": round(chunks / best, 1) if chunks and best else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "setup_peak_rss_mb": rss_before,
+    }
+
+
+def run_isolated(target: str, size: int, seed: int, repeat: int, options: dict) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_case, target, size, seed, repeat, options).result()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ingestion stage microbenchmarks")
+    parser.add_argument("--targets", default=",".join(TARGETS), help=f"Comma-separated subset of: {', '.join(TARGETS)}")
+    parser.add_argument("--sizes", default="1KB,64KB,1MB,16MB,100MB")
+    parser.add_argument("--batch-sizes", default="1,8,32,128", help="Batch sizes for embed_batch")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument("--no-size-cap", action="store_true", help="Run every size for every target")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Skip the per-case subprocess (faster, but peak RSS becomes cumulative)")
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)}")
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    runner = run_case if args.in_process else run_isolated
+
+    results = []
+    print(f"{'target':<26} {'size':>7} {'MB/s':>10} {'chunks/s':>10} {'peak RSS MB':>12}")
+    for target in targets:
+        variants = [{"batch_size": int(b), "model": args.model} for b in args.batch_sizes.split(",")] \
+            if target == "embed_batch" else [{}]
+        for size in sizes:
+            if not args.no_size_cap and size > SIZE_CAPS.get(target, size):
+                continue
+            for options in variants:
+                label = target + (f"[bs={options['batch_size']}]" if "batch_size" in options else "")
+                try:
+                    result = runner(target, size, args.seed, args.repeat, options)
+                except Exception as e:
+                    print(f"{label:<26} {format_size(size):>7}  failed: {e}")
+                    results.append({"target": target, "size": format_size(size), "error": str(e), **options})
+                    continue
+                results.append(result)
+                print(f"{label:<26} {result['size']:>7} {result['mb_per_second'] or 0:>10.2f} "
+                      f"{result['chunks_per_second'] or 0:>10.1f} {result['peak_rss_mb']:>12.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seed": args.seed, "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
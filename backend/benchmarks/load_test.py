@@ -0,0 +1,347 @@
+"""
+End-to-end RAG load test
+Uploads a synthetic corpus through /api/chat/upload-documents, waits for it to
+be indexed, then drives /api/chat/rag at a fixed concurrency. Reports
+throughput and p50/p95/p99 per endpoint and per pipeline stage (from the
+`timings` breakdown) as JSON, so results from two commits can be diffed with
+the `compare` subcommand.
+
+    python -m backend.benchmarks.load_test run --email bench@example.com --password ... \
+        --documents 50 --doc-size-kb 32 --queries 500 --concurrency 16 --output results.json
+    python -m backend.benchmarks.load_test compare baseline.json results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+from backend.benchmarks import corpus
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies_ms: List[float], errors: int, wall_seconds: float) -> Dict[str, float]:
+    summary = {
+        "requests": len(latencies_ms) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies_ms) / wall_seconds, 3) if wall_seconds else 0.0,
+        "mean_ms": round(statistics.fmean(latencies_ms), 3) if latencies_ms else 0.0,
+        "max_ms": round(max(latencies_ms), 3) if latencies_ms else 0.0,
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(latencies_ms, pct), 3)
+    return summary
+
+
+class Recorder:
+    """Thread-safe collection of per-endpoint and per-stage samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status_codes: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.answer_paths: Dict[str, int] = defaultdict(int)
+        self.wall: Dict[str, float] = {}
+
+    def record(
+        self,
+        endpoint: str,
+        elapsed_ms: float,
+        status_code: int,
+        ok: bool,
+        timings: Optional[dict] = None,
+        answer_path: Optional[str] = None
+    ):
+        with self._lock:
+            if answer_path:
+                self.answer_paths[answer_path] += 1
+            self.status_codes[endpoint][str(status_code)] += 1
+            if ok:
+                self.latencies[endpoint].append(elapsed_ms)
+            else:
+                self.errors[endpoint] += 1
+            for stage, ms in (timings or {}).items():
+                self.stages[stage].append(float(ms))
+
+    def results(self) -> dict:
+        endpoints = {}
+        for endpoint in set(self.latencies) | set(self.errors):
+            endpoints[endpoint] = summarize(self.latencies[endpoint], self.errors[endpoint], self.wall.get(endpoint, 0))
+            endpoints[endpoint]["status_codes"] = dict(self.status_codes[endpoint])
+        stages = {}
+        for stage, values in self.stages.items():
+            stages[stage] = {"samples": len(values), "mean_ms": round(statistics.fmean(values), 3)}
+            for pct in PERCENTILES:
+                stages[stage][f"p{pct}_ms"] = round(percentile(values, pct), 3)
+        return {"endpoints": endpoints, "stages": stages, "answer_paths": dict(self.answer_paths)}
+
+
+class LoadTest:
+    def __init__(self, base_url: str, token: str, concurrency: int, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.recorder = Recorder()
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _timed(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[dict]:
+        started = time.perf_counter()
+        try:
+            resp = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(endpoint, (time.perf_counter() - started) * 1000, 0, False)
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        body = None
+        if resp.ok:
+            try:
+                body = resp.json()
+            except ValueError:
+                body = None
+        timings = body.get("timings") if isinstance(body, dict) else None
+        answer_path = body.get("answer_path") if isinstance(body, dict) else None
+        self.recorder.record(endpoint, elapsed_ms, resp.status_code, resp.ok, timings, answer_path)
+        return body
+
+    def _run_pool(self, endpoint: str, fn, items):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(fn, items))
+        self.recorder.wall[endpoint] = time.perf_counter() - started
+        return results
+
+    def upload(self, documents: List[tuple], batch_size: int) -> List[str]:
+        batches = [documents[i:i + batch_size] for i in range(0, len(documents), batch_size)]
+
+        def send(batch):
+            files = [("files", (name, text.encode("utf-8"), "text/plain")) for name, text in batch]
+            body = self._timed("upload_documents", "POST", "/api/chat/upload-documents", files=files)
+            return [d["document_id"] for d in (body or {}).get("uploaded_documents", []) if d.get("document_id")]
+
+        return [doc_id for ids in self._run_pool("upload_documents", send, batches) for doc_id in ids]
+
+    def _user_documents(self, page_size: int = 200) -> List[dict]:
+        """Every page of /api/chat/user-documents (stops early on an error)"""
+        documents: List[dict] = []
+        params = {"limit": page_size}
+        while True:
+            resp = self.session.get(self.base_url + "/api/chat/user-documents", params=params, timeout=self.timeout)
+            if not resp.ok:
+                return documents
+            body = resp.json()
+            documents.extend(body.get("documents", []))
+            if not body.get("next_cursor"):
+                return documents
+            params = {"limit": page_size, "cursor": body["next_cursor"]}
+
+    def wait_for_indexing(self, document_ids: List[str], timeout: float) -> dict:
+        """Poll until every uploaded document leaves the `processing` state"""
+        pending = set(document_ids)
+        started = time.perf_counter()
+        states: Dict[str, str] = {}
+        while pending and time.perf_counter() - started < timeout:
+            time.sleep(1.0)
+            for doc in self._user_documents():
+                if doc.get("document_id") in pending and doc.get("processing_status") != "processing":
+                    states[doc["document_id"]] = doc.get("processing_status")
+                    pending.discard(doc["document_id"])
+        return {
+            "documents": len(document_ids),
+            "completed": sum(1 for s in states.values() if s == "completed"),
+            "failed": sum(1 for s in states.values() if s == "failed"),
+            "timed_out": len(pending),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def query(self, questions: List[str], document_ids: List[str], top_k: int, threshold: float):
+        def ask(question):
+            data = {
+                "question": question,
+                "context": "documents",
+                "top_k": str(top_k),
+                "similarity_threshold": str(threshold),
+                "include_timings": "true",
+            }
+            if document_ids:
+                data["documents"] = json.dumps(document_ids)
+            self._timed("rag", "POST", "/api/chat/rag", data=data)
+
+        self._run_pool("rag", ask, questions)
+
+
+def login(base_url: str, email: str, password: str) -> str:
+    resp = requests.post(base_url.rstrip("/") + "/api/login", json={"email": email, "password": password}, timeout=30)
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run(args) -> dict:
+    token = args.token or login(args.base_url, args.email, args.password)
+    test = LoadTest(args.base_url, token, args.concurrency, args.timeout)
+
+    ingestion = None
+    document_ids: List[str] = []
+    if args.documents:
+        documents = list(corpus.iter_documents(args.documents, args.doc_size_kb * 1024, args.seed))
+        print(f"Uploading {len(documents)} documents ({args.doc_size_kb} KB each)...")
+        started = time.perf_counter()
+        document_ids = test.upload(documents, args.upload_batch)
+        ingestion = test.wait_for_indexing(document_ids, args.index_timeout)
+        ingestion["mb_per_second"] = round(
+            len(documents) * args.doc_size_kb / 1024 / max(time.perf_counter() - started, 1e-9), 3
+        )
+        print(f"Indexed: {ingestion}")
+
+    if args.queries:
+        questions = corpus.sample_questions(args.queries, args.seed)
+        print(f"Running {len(questions)} RAG queries at concurrency {args.concurrency}...")
+        test.query(questions, document_ids if args.scope_to_uploaded else [], args.top_k, args.similarity_threshold)
+
+    return {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "base_url": args.base_url,
+            "documents": args.documents,
+            "doc_size_kb": args.doc_size_kb,
+            "upload_batch": args.upload_batch,
+            "queries": args.queries,
+            "concurrency": args.concurrency,
+            "top_k": args.top_k,
+            "similarity_threshold": args.similarity_threshold,
+            "seed": args.seed,
+        },
+        "ingestion": ingestion,
+        **test.recorder.results(),
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """Latency/throughput changes beyond `tolerance` (fractional) as readable lines"""
+    lines = []
+
+    def check(label, old, new, higher_is_better=False):
+        if not old:
+            return
+        change = (new - old) / old
+        worse = change < -tolerance if higher_is_better else change > tolerance
+        better = change > tolerance if higher_is_better else change < -tolerance
+        marker = "REGRESSION" if worse else ("improved" if better else "")
+        lines.append(f"{label:<40} {old:>12.3f} {new:>12.3f} {change:>+8.1%}  {marker}")
+
+    for endpoint, old in sorted(baseline.get("endpoints", {}).items()):
+        new = current.get("endpoints", {}).get(endpoint)
+        if not new:
+            continue
+        check(f"{endpoint} throughput_rps", old["throughput_rps"], new["throughput_rps"], higher_is_better=True)
+        for pct in PERCENTILES:
+            check(f"{endpoint} p{pct}_ms", old[f"p{pct}_ms"], new[f"p{pct}_ms"])
+    for stage, old in sorted(baseline.get("stages", {}).items()):
+        new = current.get("stages", {}).get(stage)
+        if new:
+            for pct in PERCENTILES:
+                check(f"stage {stage} p{pct}_ms", old[f"p{pct}_ms"], new[f"p{pct}_ms"])
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end RAG load test")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the load test against a running backend")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--token", help="Bearer token (otherwise log in with --email/--password)")
+    run_parser.add_argument("--email")
+    run_parser.add_argument("--password")
+    run_parser.add_argument("--documents", type=int, default=20, help="Synthetic documents to upload (0 to skip)")
+    run_parser.add_argument("--doc-size-kb", type=int, default=32)
+    run_parser.add_argument("--upload-batch", type=int, default=5, help="Files per upload request")
+    run_parser.add_argument("--index-timeout", type=float, default=600)
+    run_parser.add_argument("--queries", type=int, default=200)
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--top-k", type=int, default=5)
+    run_parser.add_argument("--similarity-threshold", type=float, default=0.3)
+    run_parser.add_argument("--scope-to-uploaded", action="store_true",
+                            help="Restrict queries to the documents uploaded by this run")
+    run_parser.add_argument("--timeout", type=float, default=120)
+    run_parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    run_parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+
+    compare_parser = sub.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10, help="Fractional change to flag")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        lines = compare(baseline, current, args.tolerance)
+        print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+        print("\n".join(lines))
+        return 1 if any(line.endswith("REGRESSION") for line in lines) else 0
+
+    if not args.token and not (args.email and args.password):
+        parser.error("either --token or --email and --password are required")
+    results = run(args)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
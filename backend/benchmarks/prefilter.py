@@ -0,0 +1,144 @@
+"""
+Document prefilter benchmark
+Compares flat chunk search against the two-stage search used for "all my
+documents" queries (rank documents by centroid, then score chunks of the best
+RAG_PREFILTER_TOP_DOCUMENTS only) on synthetic clustered embeddings, reporting
+recall@k against the flat result, per-query latency and candidates scored.
+
+    python -m backend.benchmarks.prefilter --documents 100,1000,5000 --top-documents 4,8,16,32
+
+Each document mixes a few topics and every topic appears in a few documents,
+so relevant chunks are spread across documents and a document's centroid
+only partly reflects each of its subjects, as in real libraries.
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.benchmarks import corpus
+from backend.benchmarks.load_test import percentile
+from backend.utils.vector_store import cosine_scores, document_centroid
+
+
+def build_library(
+    documents: int, chunks_per_document: int, dim: int, spread: float, topics_per_document: int, rng
+) -> Dict[str, np.ndarray]:
+    topics = rng.standard_normal((max(documents // 2, topics_per_document), dim)).astype(np.float32)
+    doc_topics = np.vstack([
+        rng.choice(len(topics), size=topics_per_document, replace=False) for _ in range(documents)
+    ])
+    # Each chunk is about one of its document's topics, plus the document's own
+    # direction and noise
+    chunk_topics = doc_topics[np.arange(documents)[:, None], rng.integers(0, topics_per_document, (documents, chunks_per_document))]
+    own = rng.standard_normal((documents, 1, dim)).astype(np.float32)
+    noise = rng.standard_normal((documents, chunks_per_document, dim)).astype(np.float32)
+    chunks = topics[chunk_topics] + 0.5 * own + spread * noise
+    centroids = np.vstack([document_centroid(chunks[d]) for d in range(documents)])
+    return {
+        "matrix": chunks.reshape(documents * chunks_per_document, dim),
+        "owners": np.repeat(np.arange(documents), chunks_per_document),
+        "chunk_topics": chunk_topics.reshape(-1),
+        "topics": topics,
+        "centroids": centroids,
+    }
+
+
+def make_queries(library: Dict[str, np.ndarray], count: int, rng) -> np.ndarray:
+    """Questions about the topic of a random chunk"""
+    picks = rng.integers(0, len(library["matrix"]), size=count)
+    noise = rng.standard_normal((count, library["matrix"].shape[1])).astype(np.float32)
+    return library["topics"][library["chunk_topics"][picks]] + 0.8 * noise
+
+
+def flat_search(library: Dict[str, np.ndarray], query: np.ndarray, top_k: int) -> np.ndarray:
+    sims = cosine_scores(library["matrix"], query)
+    return np.argsort(-sims, kind="stable")[:top_k]
+
+
+def two_stage_search(library: Dict[str, np.ndarray], query: np.ndarray, top_k: int, top_documents: int):
+    doc_sims = cosine_scores(library["centroids"], query)
+    chosen = np.argsort(-doc_sims, kind="stable")[:top_documents]
+    candidates = np.flatnonzero(np.isin(library["owners"], chosen))
+    sims = cosine_scores(library["matrix"][candidates], query)
+    return candidates[np.argsort(-sims, kind="stable")[:top_k]], len(candidates)
+
+
+def run(documents: int, top_documents_list: List[int], args, rng) -> List[dict]:
+    library = build_library(
+        documents, args.chunks_per_document, args.dim, args.spread, args.topics_per_document, rng
+    )
+    queries = make_queries(library, args.queries, rng)
+
+    flat_latencies, truth = [], []
+    for query in queries:
+        started = time.perf_counter()
+        truth.append(set(flat_search(library, query, args.top_k).tolist()))
+        flat_latencies.append((time.perf_counter() - started) * 1000)
+    results = [{
+        "documents": documents,
+        "mode": "flat",
+        "top_documents": None,
+        "recall": 1.0,
+        "p50_ms": round(percentile(flat_latencies, 50), 3),
+        "p95_ms": round(percentile(flat_latencies, 95), 3),
+        "candidates": len(library["matrix"]),
+    }]
+
+    for top_documents in top_documents_list:
+        latencies, recalls, scanned = [], [], []
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            found, candidates = two_stage_search(library, query, args.top_k, top_documents)
+            latencies.append((time.perf_counter() - started) * 1000)
+            recalls.append(len(expected & set(found.tolist())) / len(expected))
+            scanned.append(candidates)
+        results.append({
+            "documents": documents,
+            "mode": "two_stage",
+            "top_documents": top_documents,
+            "recall": round(float(np.mean(recalls)), 4),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "candidates": int(np.mean(scanned)),
+        })
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Flat vs two-stage (document centroid) retrieval")
+    parser.add_argument("--documents", default="100,1000,5000", help="Library sizes (documents per user)")
+    parser.add_argument("--top-documents", default="4,8,16,32", help="RAG_PREFILTER_TOP_DOCUMENTS values to try")
+    parser.add_argument("--chunks-per-document", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (384 for all-MiniLM-L6-v2)")
+    parser.add_argument("--topics-per-document", type=int, default=3, help="Distinct subjects mixed in one document")
+    parser.add_argument("--spread", type=float, default=0.8, help="Chunk noise around its topic")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    top_documents_list = [int(n) for n in args.top_documents.split(",") if n.strip()]
+    results = []
+    print(f"{'documents':>9} {'mode':<10} {'top docs':>8} {'recall@k':>9} {'p50 ms':>9} {'p95 ms':>9} {'candidates':>11}")
+    for documents in (int(n) for n in args.documents.split(",") if n.strip()):
+        for row in run(documents, top_documents_list, args, rng):
+            results.append(row)
+            print(f"{row['documents']:>9} {row['mode']:<10} {row['top_documents'] or '-':>8} {row['recall']:>9.3f} "
+                  f"{row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['candidates']:>11}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seed": args.seed, "top_k": args.top_k, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
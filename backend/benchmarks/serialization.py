@@ -0,0 +1,173 @@
+"""
+Response serialization benchmark
+Encodes the heavy payloads (a RAG answer with 20 retrieved chunks, a page of
+a saved analytics dataset, the RAG debug rows) with FastAPI's default path
+(`jsonable_encoder` + stdlib json, as JSONResponse renders it) and with
+FastJSONResponse, then compresses the body with gzip and brotli, reporting
+encode/compress time and bytes on the wire.
+
+    python -m backend.benchmarks.serialization --rows 5000 --output serialization.json
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.benchmarks import corpus
+from backend.benchmarks.load_test import percentile
+from backend.models.rag_models import RAGChatResponse, RetrievedChunk
+from backend.utils.fast_json import FastJSONResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def rag_answer(chunks: int, rng: random.Random, sentences: List[str]) -> RAGChatResponse:
+    sources = [
+        RetrievedChunk(
+            chunk_id=str(uuid.UUID(int=rng.getrandbits(128))),
+            document_id=str(uuid.UUID(int=rng.getrandbits(128))),
+            content=corpus.generate_text(500, sentences, rng)[:500],
+            similarity_score=rng.random(),
+            chunk_index=i,
+            metadata={"source": "semantic", "filename": f"document_{i}.pdf", "excerpt": corpus.generate_text(250, sentences, rng)[:250]}
+        )
+        for i in range(chunks)
+    ]
+    return RAGChatResponse(
+        answer=corpus.generate_text(1200, sentences, rng),
+        sources=sources,
+        language="en-US",
+        confidence=0.92,
+        processing_time_ms=845.2,
+        retrieval_count=len(sources),
+        timings={"retrieval": 41.5, "llm": 780.1},
+        answer_path="llm"
+    )
+
+
+def dataset_page(rows: int, rng: random.Random) -> Dict[str, Any]:
+    start = datetime(2024, 1, 1)
+    data = [
+        {
+            "date": (start + timedelta(hours=i)).isoformat(),
+            "region": rng.choice(["north", "south", "east", "west"]),
+            "product": f"SKU-{rng.randint(1000, 9999)}",
+            "units": rng.randint(0, 500),
+            "price": round(rng.uniform(1, 200), 2),
+            "revenue": round(rng.uniform(0, 100000), 2),
+            "returned": rng.random() < 0.05,
+            "notes": None if rng.random() < 0.7 else "manual adjustment",
+        }
+        for i in range(rows)
+    ]
+    return {"success": True, "document": {"filename": "sales.csv", "columns": list(data[0]), "data": data, "version": 3}}
+
+
+def debug_rows(rows: int, rng: random.Random, sentences: List[str]) -> Dict[str, Any]:
+    now = datetime(2024, 6, 1, 12, 0, 0)
+    return {
+        "docs_count": rows,
+        "recent_documents": [
+            {"document_id": str(uuid.uuid4()), "filename": f"doc_{i}.pdf", "processing_status": "completed",
+             "total_chunks": rng.randint(1, 400), "total_tokens": rng.randint(100, 90000), "upload_date": now - timedelta(minutes=i)}
+            for i in range(rows)
+        ],
+        "sample_chunks": [
+            {"chunk_id": str(uuid.uuid4()), "chunk_index": i, "tokens_count": 110, "snippet": corpus.generate_text(500, sentences, rng)[:500]}
+            for i in range(10)
+        ],
+    }
+
+
+def default_render(payload: Any) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fast_render(payload: Any) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> tuple:
+    latencies = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return result, latencies
+
+
+def run_payload(name: str, payload: Any, args) -> List[dict]:
+    results = []
+    for encoder, render in (("default", default_render), ("fast", fast_render)):
+        body, latencies = timed(lambda: render(payload), args.repeat)
+        row = {
+            "payload": name,
+            "encoder": encoder,
+            "p50_encode_ms": round(percentile(latencies, 50), 3),
+            "p95_encode_ms": round(percentile(latencies, 95), 3),
+            "bytes": len(body),
+        }
+        compressors = [("gzip", lambda: gzip.compress(body, compresslevel=args.gzip_level))]
+        if brotli is not None:
+            compressors.append(("br", lambda: brotli.compress(body, quality=args.brotli_quality)))
+        for encoding, compress in compressors:
+            compressed, latencies = timed(compress, max(args.repeat // 4, 1))
+            row[f"{encoding}_bytes"] = len(compressed)
+            row[f"{encoding}_ms"] = round(percentile(latencies, 50), 3)
+        results.append(row)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Default vs fast JSON rendering, and compressed sizes")
+    parser.add_argument("--chunks", type=int, default=20, help="Retrieved chunks in the RAG answer")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows in the saved dataset page")
+    parser.add_argument("--debug-rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    sentences = corpus.load_sentences()
+    payloads = {
+        "rag_answer": rag_answer(args.chunks, rng, sentences),
+        "dataset_page": dataset_page(args.rows, rng),
+        "rag_debug": debug_rows(args.debug_rows, rng, sentences),
+    }
+    if brotli is None:
+        print("brotli not installed; reporting gzip only")
+
+    results = []
+    print(f"{'payload':<13} {'encoder':<8} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>10} {'gzip':>9} {'gzip ms':>8} {'br':>9} {'br ms':>7}")
+    for name, payload in payloads.items():
+        for row in run_payload(name, payload, args):
+            results.append(row)
+            print(f"{row['payload']:<13} {row['encoder']:<8} {row['p50_encode_ms']:>8.3f} {row['p95_encode_ms']:>8.3f} "
+                  f"{row['bytes']:>10} {row['gzip_bytes']:>9} {row['gzip_ms']:>8.3f} "
+                  f"{row.get('br_bytes', '-'):>9} {row.get('br_ms', '-'):>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"seed": args.seed, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
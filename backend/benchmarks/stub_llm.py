@@ -0,0 +1,83 @@
+"""
+Stub LLM server for benchmarks
+Minimal OpenAI-compatible `/v1/chat/completions` endpoint with configurable
+latency, so load tests measure this service rather than a remote provider.
+
+    python -m backend.benchmarks.stub_llm --port 8089 --latency-ms 400 --jitter-ms 100
+
+Point the app at it with LLM_PROVIDER=grok, GROK_API_KEY=stub and
+GROK_ENDPOINT=http://127.0.0.1:8089/v1/chat/completions.
+"""
+
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "**Summary:**\n- The requested information is covered by the organization's policies.\n"
+    "- Employees should follow the documented procedures. I'm available to help with additional questions."
+)
+
+
+def make_handler(latency_ms: float, jitter_ms: float, error_rate: float):
+    class StubLLMHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(max(latency_ms + random.uniform(-jitter_ms, jitter_ms), 0) / 1000.0)
+
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            prompt = " ".join(m.get("content", "") for m in body.get("messages", [])) or body.get("prompt", "")
+            max_tokens = int(body.get("max_tokens", 256))
+            payload = {
+                "id": "stub",
+                "object": "chat.completion",
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+                # Rough 4-characters-per-token estimate
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": min(len(ANSWER) // 4, max_tokens),
+                    "total_tokens": len(prompt) // 4 + min(len(ANSWER) // 4, max_tokens)
+                }
+            }
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubLLMHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8089, latency_ms: float = 300, jitter_ms: float = 50, error_rate: float = 0.0):
+    server = ThreadingHTTPServer((host, port), make_handler(latency_ms, jitter_ms, error_rate))
+    print(f"Stub LLM listening on http://{host}:{port}/v1/chat/completions "
+          f"(latency {latency_ms}±{jitter_ms} ms, error rate {error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
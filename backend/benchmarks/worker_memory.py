@@ -0,0 +1,146 @@
+"""
+Per-worker memory benchmark
+Starts N API-worker-like processes (the app imported, RAG services built,
+a warm-up batch embedded) with the embedding model loaded in every worker,
+then again with each worker using the shared embedding sidecar, and reports
+RSS and PSS per worker plus the sidecar's. PSS divides shared pages between
+the processes mapping them, so the PSS total is what the box actually pays.
+
+    python -m backend.benchmarks.worker_memory --workers 1,2,4 --output worker_memory.json
+
+Linux only (reads /proc/<pid>/smaps_rollup).
+"""
+
+import argparse
+import importlib
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+from backend.benchmarks import corpus
+
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    """Rss and Pss of a process in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name.lower()] = round(int(rest.split()[0]) / 1024, 1)
+    return values
+
+
+def _worker(socket_path: str, model: str, app_module: str, ready, stop):
+    # Settings are read at import, so the mode is chosen before importing the app
+    os.environ["EMBEDDING_SIDECAR_SOCKET"] = socket_path
+    # Routes, middleware and everything they import, as uvicorn loads the app
+    importlib.import_module(app_module)
+    from backend.utils.rag_services import RAGServices
+
+    services = RAGServices(embedding_model_name=model)
+    services.embedding_model.embed_batch(corpus.load_sentences()[:64])
+    ready.put(os.getpid())
+    stop.wait()
+
+
+def _wait_ready(ready, processes, sidecar, timeout: float) -> List[int]:
+    pids: List[int] = []
+    deadline = time.monotonic() + timeout
+    while len(pids) < len(processes):
+        try:
+            pids.append(ready.get(timeout=1))
+            continue
+        except queue.Empty:
+            pass
+        failed = [p.exitcode for p in processes if p.exitcode is not None]
+        if failed:
+            raise RuntimeError(f"worker exited with code {failed[0]} before loading")
+        if sidecar is not None and sidecar.poll() is not None:
+            raise RuntimeError(f"embedding sidecar exited with code {sidecar.returncode}")
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{len(processes) - len(pids)} workers not ready after {timeout:g}s")
+    return pids
+
+
+def run_mode(mode: str, workers: int, model: str, app_module: str, timeout: float) -> dict:
+    context = get_context("spawn")
+    ready = context.Queue()
+    stop = context.Event()
+    sidecar = None
+    socket_path = ""
+    with tempfile.TemporaryDirectory() as tmp:
+        if mode == "sidecar":
+            socket_path = os.path.join(tmp, "embeddings.sock")
+            sidecar = subprocess.Popen(
+                [sys.executable, "-m", "backend.utils.embedding_sidecar", "--socket", socket_path, "--model", model],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        processes = [context.Process(target=_worker, args=(socket_path, model, app_module, ready, stop)) for _ in range(workers)]
+        try:
+            for process in processes:
+                process.start()
+            pids = _wait_ready(ready, processes, sidecar, timeout)
+            # Let allocator arenas settle before sampling
+            time.sleep(1)
+            per_worker = [memory_mb(pid) for pid in pids]
+            sidecar_memory = memory_mb(sidecar.pid) if sidecar is not None else {"rss": 0.0, "pss": 0.0}
+        finally:
+            stop.set()
+            for process in processes:
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+            if sidecar is not None:
+                sidecar.terminate()
+                sidecar.wait(timeout=10)
+
+    worker_pss = sum(m["pss"] for m in per_worker)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "worker_rss_mb": round(sum(m["rss"] for m in per_worker) / workers, 1),
+        "worker_pss_mb": round(worker_pss / workers, 1),
+        "sidecar_rss_mb": sidecar_memory["rss"],
+        "sidecar_pss_mb": sidecar_memory["pss"],
+        "total_pss_mb": round(worker_pss + sidecar_memory["pss"], 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Memory per API worker with and without the embedding sidecar")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--modes", default="in-process,sidecar")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--app-module", default="backend.main", help="Module each worker imports before building services")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for workers to load")
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        parser.error("needs Linux /proc/<pid>/smaps_rollup")
+
+    results = []
+    print(f"{'mode':<11} {'workers':>7} {'RSS/worker':>11} {'PSS/worker':>11} {'sidecar PSS':>12} {'total PSS':>10}")
+    for mode in (m.strip() for m in args.modes.split(",") if m.strip()):
+        for workers in (int(w) for w in args.workers.split(",")):
+            row = run_mode(mode, workers, args.model, args.app_module, args.timeout)
+            results.append(row)
+            print(f"{row['mode']:<11} {row['workers']:>7} {row['worker_rss_mb']:>11.1f} {row['worker_pss_mb']:>11.1f} "
+                  f"{row['sidecar_pss_mb']:>12.1f} {row['total_pss_mb']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -42,6 +42,135 @@ class Settings(BaseSettings):
     GROK_API_KEY: str = os.getenv("GROK_API_KEY", "")
     GROK_ENDPOINT: str = os.getenv("GROK_ENDPOINT", "")
     GROK_MODEL: str = os.getenv("GROK_MODEL", "llama-3.1-8b-instant")  # Default model (can be changed to grok-beta, mixtral-8x7b-32768, etc.)
+    # Token budget for retrieved context in RAG prompts (see utils/context_packer.py)
+    RAG_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1500"))
+    # Shortest repeated span treated as chunk overlap when deduplicating context
+    RAG_CONTEXT_MIN_OVERLAP_CHARS: int = int(os.getenv("RAG_CONTEXT_MIN_OVERLAP_CHARS", "30"))
+    # "Search all my documents": above RAG_PREFILTER_MIN_DOCUMENTS documents, chunks are only
+    # searched in the RAG_PREFILTER_TOP_DOCUMENTS documents whose centroids best match the
+    # question. Raise TOP_DOCUMENTS for recall, lower it for latency; 0 disables the prefilter
+    RAG_PREFILTER_MIN_DOCUMENTS: int = int(os.getenv("RAG_PREFILTER_MIN_DOCUMENTS", "20"))
+    RAG_PREFILTER_TOP_DOCUMENTS: int = int(os.getenv("RAG_PREFILTER_TOP_DOCUMENTS", "16"))
+    # End-to-end latency budget for /chat/rag; past it the local extractive answer is returned
+    RAG_REQUEST_BUDGET_MS: int = int(os.getenv("RAG_REQUEST_BUDGET_MS", "10000"))
+    # Don't start an LLM call with less than this left in the budget
+    RAG_LLM_MIN_BUDGET_MS: int = int(os.getenv("RAG_LLM_MIN_BUDGET_MS", "300"))
+    # Extractive answers (utils/extractive.py): store per-sentence embeddings with each chunk
+    # at ingestion; without them sentences of retrieved chunks are embedded per question
+    RAG_SENTENCE_EMBEDDINGS: bool = os.getenv("RAG_SENTENCE_EMBEDDINGS", "true").lower() == "true"
+    # MMR trade-off between relevance (1.0) and not repeating picked sentences (0.0)
+    RAG_EXTRACTIVE_MMR_LAMBDA: float = float(os.getenv("RAG_EXTRACTIVE_MMR_LAMBDA", "0.7"))
+    # Sentences less similar to the question than this are never part of an answer
+    RAG_EXTRACTIVE_MIN_SIMILARITY: float = float(os.getenv("RAG_EXTRACTIVE_MIN_SIMILARITY", "0.15"))
+    # Hedged LLM calls: a second request is sent once the first runs past this
+    # percentile of recent latencies (but never sooner than LLM_HEDGE_MIN_DELAY_MS)
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+    LLM_HEDGE_MIN_DELAY_MS: int = int(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "500"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+    # Admission control (backend/utils/admission.py). Queries and uploads share
+    # ADMISSION_MAX_CONCURRENCY slots; queued queries are admitted first.
+    ADMISSION_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "16"))
+    ADMISSION_RAG_CONCURRENCY: int = int(os.getenv("ADMISSION_RAG_CONCURRENCY", "16"))
+    ADMISSION_RAG_QUEUE: int = int(os.getenv("ADMISSION_RAG_QUEUE", "64"))
+    ADMISSION_RAG_QUEUE_TIMEOUT_MS: int = int(os.getenv("ADMISSION_RAG_QUEUE_TIMEOUT_MS", "2000"))
+    # Upload slots stay held until the upload's background processing finishes
+    ADMISSION_UPLOAD_CONCURRENCY: int = int(os.getenv("ADMISSION_UPLOAD_CONCURRENCY", "4"))
+    ADMISSION_UPLOAD_QUEUE: int = int(os.getenv("ADMISSION_UPLOAD_QUEUE", "16"))
+    ADMISSION_UPLOAD_QUEUE_TIMEOUT_MS: int = int(os.getenv("ADMISSION_UPLOAD_QUEUE_TIMEOUT_MS", "10000"))
+
+    # Per-tenant fair sharing (backend/utils/tenant_scheduler.py). A tenant is an
+    # organization, or a user without one. Queues, worker slots and quota counters live
+    # in each API worker process: with WEB_CONCURRENCY workers a tenant can get up to
+    # WEB_CONCURRENCY times the slots and quotas below, so divide them by the worker count.
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", "2"))
+    INGESTION_QUANTUM_BYTES: int = int(os.getenv("INGESTION_QUANTUM_BYTES", str(1024 * 1024)))
+    EMBEDDING_WORKERS: int = int(os.getenv("EMBEDDING_WORKERS", "1"))
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    # Relative shares, e.g. "org:1=2,org:7=0.5" (default weight 1)
+    TENANT_WEIGHTS: str = os.getenv("TENANT_WEIGHTS", "")
+    # Per-tenant quotas per window; 0 disables a quota
+    TENANT_QUOTA_WINDOW_SECONDS: int = int(os.getenv("TENANT_QUOTA_WINDOW_SECONDS", "3600"))
+    TENANT_DOCUMENT_QUOTA: int = int(os.getenv("TENANT_DOCUMENT_QUOTA", "0"))
+    TENANT_TOKEN_QUOTA: int = int(os.getenv("TENANT_TOKEN_QUOTA", "0"))
+    TENANT_QUERY_QUOTA: int = int(os.getenv("TENANT_QUERY_QUOTA", "0"))
+
+    # Shared embedding model (backend/utils/embedding_sidecar.py). With a socket path set,
+    # workers send texts to one `python -m backend.utils.embedding_sidecar` process instead
+    # of each loading the model; empty loads it in every worker
+    EMBEDDING_SIDECAR_SOCKET: str = os.getenv("EMBEDDING_SIDECAR_SOCKET", "")
+    # How long a worker waits for the sidecar at startup and for each reply
+    EMBEDDING_SIDECAR_TIMEOUT_SECONDS: float = float(os.getenv("EMBEDDING_SIDECAR_TIMEOUT_SECONDS", "30"))
+
+    # Apply pending schema migrations when the app starts. Disable when the
+    # deploy pipeline runs `python -m backend.database.run_migrations` itself.
+    RUN_MIGRATIONS_ON_STARTUP: bool = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() == "true"
+
+    # Authenticated-user context cache (see auth_utils.get_current_user). Each worker
+    # process has its own cache and invalidations don't cross processes, so with several
+    # workers a role or organization change can take up to the TTL to apply everywhere
+    USER_CONTEXT_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CONTEXT_CACHE_TTL_SECONDS", "60"))
+    USER_CONTEXT_CACHE_SIZE: int = int(os.getenv("USER_CONTEXT_CACHE_SIZE", "10000"))
+    # Per-organization /api/dashboard snapshots; staleness is bounded by this TTL
+    DASHBOARD_SNAPSHOT_TTL_SECONDS: float = float(os.getenv("DASHBOARD_SNAPSHOT_TTL_SECONDS", "15"))
+    # Materialized content/filename of chunks returned by similarity search.
+    # Chunks never change once written, so the TTL only bounds memory held for deleted documents
+    CHUNK_CONTENT_CACHE_SIZE: int = int(os.getenv("CHUNK_CONTENT_CACHE_SIZE", "20000"))
+    CHUNK_CONTENT_CACHE_TTL_SECONDS: float = float(os.getenv("CHUNK_CONTENT_CACHE_TTL_SECONDS", "3600"))
+    # Stored sentence indexes of those chunks (~15-20KB each) for the extractive answer,
+    # cached apart from the content and bounded by size rather than count
+    SENTENCE_INDEX_CACHE_MB: int = int(os.getenv("SENTENCE_INDEX_CACHE_MB", "64"))
+    # Keyset-paginated list endpoints (backend/utils/pagination.py). Totals are cached
+    # per list for LIST_COUNT_CACHE_TTL_SECONDS; above LIST_EXACT_COUNT_THRESHOLD rows
+    # the planner's estimate is returned instead of an exact count
+    LIST_PAGE_SIZE: int = int(os.getenv("LIST_PAGE_SIZE", "50"))
+    LIST_MAX_PAGE_SIZE: int = int(os.getenv("LIST_MAX_PAGE_SIZE", "200"))
+    LIST_COUNT_CACHE_SIZE: int = int(os.getenv("LIST_COUNT_CACHE_SIZE", "10000"))
+    LIST_COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("LIST_COUNT_CACHE_TTL_SECONDS", "30"))
+    LIST_EXACT_COUNT_THRESHOLD: int = int(os.getenv("LIST_EXACT_COUNT_THRESHOLD", "10000"))
+
+    # Buffered activity writer (backend/utils/activity_writer.py)
+    ACTIVITY_QUEUE_SIZE: int = int(os.getenv("ACTIVITY_QUEUE_SIZE", "10000"))
+    ACTIVITY_BATCH_SIZE: int = int(os.getenv("ACTIVITY_BATCH_SIZE", "200"))
+    ACTIVITY_FLUSH_INTERVAL_MS: int = int(os.getenv("ACTIVITY_FLUSH_INTERVAL_MS", "500"))
+
+    # Uploads are streamed to temp files under UPLOAD_SPOOL_DIR (system temp dir when empty)
+    # in UPLOAD_CHUNK_BYTES pieces; files above UPLOAD_MAX_FILE_BYTES are rejected while
+    # streaming and requests above UPLOAD_MAX_REQUEST_BYTES before the body is read
+    UPLOAD_SPOOL_DIR: str = os.getenv("UPLOAD_SPOOL_DIR", "")
+    UPLOAD_CHUNK_BYTES: int = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+    UPLOAD_MAX_FILE_BYTES: int = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(100 * 1024 * 1024)))
+    UPLOAD_MAX_REQUEST_BYTES: int = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(512 * 1024 * 1024)))
+
+    # Document progress streams (/api/chat/document-events). PROGRESS_EVENTS_CHANNEL relays
+    # events through Postgres LISTEN/NOTIFY so every worker process sees them; it defaults
+    # on when uvicorn runs several workers (WEB_CONCURRENCY > 1). Set it to "" to disable
+    PROGRESS_EVENTS_CHANNEL: str = os.getenv(
+        "PROGRESS_EVENTS_CHANNEL", "document_progress" if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 else ""
+    )
+    PROGRESS_QUEUE_SIZE: int = int(os.getenv("PROGRESS_QUEUE_SIZE", "256"))
+    PROGRESS_MAX_SUBSCRIPTIONS_PER_USER: int = int(os.getenv("PROGRESS_MAX_SUBSCRIPTIONS_PER_USER", "5"))
+    PROGRESS_HEARTBEAT_SECONDS: float = float(os.getenv("PROGRESS_HEARTBEAT_SECONDS", "15"))
+
+    # Responses of at least RESPONSE_COMPRESSION_MIN_BYTES are compressed with brotli or gzip,
+    # as negotiated by Accept-Encoding (brotli needs the `brotli` package)
+    RESPONSE_COMPRESSION: bool = os.getenv("RESPONSE_COMPRESSION", "true").lower() == "true"
+    RESPONSE_COMPRESSION_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+    # Uploaded analytics datasets are stored as Parquet files under this directory
+    ANALYTICS_DATA_DIR: str = os.getenv("ANALYTICS_DATA_DIR", str(BASE_DIR / "backend" / "data" / "analytics_datasets"))
+    ANALYTICS_PARSE_CHUNK_ROWS: int = int(os.getenv("ANALYTICS_PARSE_CHUNK_ROWS", "50000"))
+    ANALYTICS_PREVIEW_ROWS: int = int(os.getenv("ANALYTICS_PREVIEW_ROWS", "100"))
+    # Rows returned by /analytics/saved-document when no limit is given, and the hard cap
+    ANALYTICS_SAVED_DOCUMENT_ROWS: int = int(os.getenv("ANALYTICS_SAVED_DOCUMENT_ROWS", "5000"))
+    ANALYTICS_MAX_ROWS_PER_READ: int = int(os.getenv("ANALYTICS_MAX_ROWS_PER_READ", "50000"))
+    # Cached /analytics/query results (keyed by dataset version and query), bounded by
+    # count and by their estimated size in memory
+    DATASET_QUERY_CACHE_SIZE: int = int(os.getenv("DATASET_QUERY_CACHE_SIZE", "256"))
+    DATASET_QUERY_CACHE_MB: int = int(os.getenv("DATASET_QUERY_CACHE_MB", "128"))
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,268 @@
+-- Baseline schema previously created inline by main.py::init_db, db.py::init_db
+-- and AdvancedRAGSystem.ensure_tables_exist. Every statement is idempotent so
+-- databases created by the old startup code adopt this version; the one shape
+-- difference between those creators (the RAG tables' user_id) is converted
+-- below.
+
+CREATE TABLE IF NOT EXISTS organizations (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL
+);
+
+ALTER TABLE organizations
+ADD COLUMN IF NOT EXISTS settings JSONB DEFAULT '{}',
+ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    role VARCHAR(50) NOT NULL CHECK (role IN ('admin', 'employee')),
+    department VARCHAR(255) DEFAULT '',
+    phone VARCHAR(50) DEFAULT '',
+    avatar_url VARCHAR(255) DEFAULT '',
+    job_title VARCHAR(255) DEFAULT '',
+    bio TEXT DEFAULT '',
+    location VARCHAR(255) DEFAULT '',
+    linkedin VARCHAR(255) DEFAULT '',
+    github VARCHAR(255) DEFAULT '',
+    twitter VARCHAR(255) DEFAULT '',
+    skills JSONB DEFAULT '[]',
+    achievements JSONB DEFAULT '[]',
+    education JSONB DEFAULT '[]',
+    experience JSONB DEFAULT '[]',
+    organization_id INTEGER REFERENCES organizations(id)
+);
+
+ALTER TABLE users
+ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS categories (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO categories (name, description) VALUES
+    ('General', 'General knowledge and information'),
+    ('Technical', 'Technical documentation and guides'),
+    ('HR', 'Human Resources related documents'),
+    ('Finance', 'Financial documents and procedures'),
+    ('Projects', 'Project related documentation')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS documents (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    content TEXT,
+    category_id INTEGER REFERENCES categories(id),
+    file_type VARCHAR(50) DEFAULT 'Other',
+    size_bytes BIGINT DEFAULT 0,
+    uploaded_by INTEGER REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Columns that only db.py::init_db used to create
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS file_path VARCHAR(255),
+ADD COLUMN IF NOT EXISTS organization_id INTEGER REFERENCES organizations(id);
+
+CREATE TABLE IF NOT EXISTS activities (
+    id SERIAL PRIMARY KEY,
+    type VARCHAR(50) NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    action VARCHAR(255) NOT NULL,
+    target VARCHAR(255) NOT NULL,
+    response_time INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE activities
+ADD COLUMN IF NOT EXISTS response_time INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS organization_id INTEGER REFERENCES organizations(id),
+ADD COLUMN IF NOT EXISTS document_id INTEGER REFERENCES documents(id),
+ADD COLUMN IF NOT EXISTS query_text TEXT;
+
+CREATE TABLE IF NOT EXISTS contact_submissions (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    message TEXT NOT NULL,
+    priority VARCHAR(50) DEFAULT 'normal',
+    user_id INTEGER REFERENCES users(id),
+    organization_id INTEGER REFERENCES organizations(id),
+    status VARCHAR(50) DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS support_tickets (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    description TEXT NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    priority VARCHAR(50) DEFAULT 'medium',
+    user_id INTEGER REFERENCES users(id),
+    organization_id INTEGER REFERENCES organizations(id),
+    status VARCHAR(50) DEFAULT 'open',
+    response TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id SERIAL PRIMARY KEY,
+    type VARCHAR(100) NOT NULL,
+    message TEXT NOT NULL,
+    description TEXT,
+    priority VARCHAR(50) DEFAULT 'medium',
+    user_id INTEGER REFERENCES users(id),
+    organization_id INTEGER REFERENCES organizations(id),
+    reference_id INTEGER,
+    reference_type VARCHAR(100),
+    read_status BOOLEAN DEFAULT FALSE,
+    archived BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS analytics_documents (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    filename VARCHAR(255) NOT NULL,
+    document_data JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id)
+);
+
+CREATE TABLE IF NOT EXISTS chat_history (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id),
+    question TEXT,
+    answer TEXT,
+    context VARCHAR(50),
+    language VARCHAR(10),
+    sources JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    id SERIAL PRIMARY KEY,
+    session_id VARCHAR(36) UNIQUE,
+    user_id INTEGER REFERENCES users(id),
+    title VARCHAR(255),
+    context VARCHAR(50),
+    messages JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- RAG tables (namespaced with `rag_` to avoid collisions with application documents)
+CREATE TABLE IF NOT EXISTS rag_documents (
+    document_id VARCHAR(36) PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    filename VARCHAR(255) NOT NULL,
+    file_type VARCHAR(20),
+    file_size INTEGER,
+    total_chunks INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processing_status VARCHAR(50) DEFAULT 'pending',
+    error_message TEXT,
+    embedding_model VARCHAR(100) DEFAULT 'all-MiniLM-L6-v2'
+);
+
+CREATE TABLE IF NOT EXISTS rag_document_chunks (
+    chunk_id VARCHAR(36) PRIMARY KEY,
+    document_id VARCHAR(36) NOT NULL,
+    content TEXT NOT NULL,
+    chunk_index INTEGER,
+    start_char INTEGER,
+    end_char INTEGER,
+    tokens_count INTEGER,
+    metadata JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (document_id) REFERENCES rag_documents(document_id) ON DELETE CASCADE
+);
+
+-- Embeddings are stored as serialized float32 in BYTEA
+CREATE TABLE IF NOT EXISTS rag_embeddings (
+    embedding_id VARCHAR(36) PRIMARY KEY,
+    chunk_id VARCHAR(36) NOT NULL,
+    document_id VARCHAR(36) NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    embedding BYTEA NOT NULL,
+    embedding_model VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (chunk_id) REFERENCES rag_document_chunks(chunk_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS rag_chat_sessions (
+    session_id VARCHAR(36) PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    title VARCHAR(255),
+    document_ids JSONB,
+    total_messages INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS rag_chat_messages (
+    message_id VARCHAR(36) PRIMARY KEY,
+    session_id VARCHAR(36) NOT NULL,
+    role VARCHAR(20),
+    content TEXT,
+    retrieved_chunks JSONB,
+    confidence FLOAT,
+    processing_time_ms FLOAT,
+    tokens_used INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES rag_chat_sessions(session_id) ON DELETE CASCADE
+);
+
+-- main.py created the RAG tables' user_id as INTEGER REFERENCES users(id),
+-- AdvancedRAGSystem (and the vector store) as VARCHAR(36) without a foreign
+-- key; whichever ran first won. Adopted VARCHAR columns get the INTEGER shape
+-- above. Rows of users that no longer exist can't be reached by anyone and
+-- would fail the foreign key, so they are removed first.
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['rag_documents', 'rag_embeddings', 'rag_chat_sessions'] LOOP
+        CONTINUE WHEN (
+            SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = v_table AND column_name = 'user_id'
+        ) = 'integer';
+        EXECUTE format(
+            'DELETE FROM %I t WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id::text = t.user_id)', v_table
+        );
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN user_id TYPE INTEGER USING user_id::integer', v_table);
+        EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (user_id) REFERENCES users(id)', v_table);
+    END LOOP;
+END
+$$;
+
+-- Indexes
+CREATE INDEX IF NOT EXISTS idx_users_org_id ON users(organization_id);
+CREATE INDEX IF NOT EXISTS idx_documents_org_id ON documents(organization_id);
+CREATE INDEX IF NOT EXISTS idx_activities_org_id ON activities(organization_id);
+CREATE INDEX IF NOT EXISTS idx_activities_user_id ON activities(user_id);
+CREATE INDEX IF NOT EXISTS idx_activities_type ON activities(type);
+CREATE INDEX IF NOT EXISTS idx_activities_created_at ON activities(created_at);
+CREATE INDEX IF NOT EXISTS idx_rag_doc_user ON rag_documents(user_id);
+CREATE INDEX IF NOT EXISTS idx_rag_doc_status ON rag_documents(processing_status);
+CREATE INDEX IF NOT EXISTS idx_rag_chunk_doc ON rag_document_chunks(document_id);
+CREATE INDEX IF NOT EXISTS idx_rag_emb_user_doc ON rag_embeddings(user_id, document_id);
+CREATE INDEX IF NOT EXISTS idx_rag_emb_chunk ON rag_embeddings(chunk_id);
+CREATE INDEX IF NOT EXISTS idx_rag_session_user ON rag_chat_sessions(user_id);
+CREATE INDEX IF NOT EXISTS idx_msg_session ON rag_chat_messages(session_id);
@@ -0,0 +1,171 @@
+-- Pre-aggregated daily activity rollups for the analytics dashboards.
+-- One row per (organization, user, day, type), maintained by triggers on the
+-- base tables so dashboard reads never scan `activities` or `rag_documents`.
+--
+-- Document uploads are rolled up under their own types ('rag_upload',
+-- 'document_upload') next to the activity types ('chat', 'document_query', ...).
+-- Latency histogram buckets (ms): <50, <100, <250, <500, <1000, <2500, <5000, <10000, >=10000
+
+CREATE TABLE IF NOT EXISTS activity_daily_rollups (
+    organization_id INTEGER NOT NULL DEFAULT 0,  -- 0 for users without an organization
+    user_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    latency_sum_ms BIGINT NOT NULL DEFAULT 0,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    latency_histogram INTEGER[] NOT NULL DEFAULT '{0,0,0,0,0,0,0,0,0}',
+    PRIMARY KEY (organization_id, user_id, day, type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollups_user_day ON activity_daily_rollups(user_id, day);
+CREATE INDEX IF NOT EXISTS idx_rollups_day ON activity_daily_rollups(day);
+
+CREATE OR REPLACE FUNCTION latency_bucket(latency_ms INTEGER) RETURNS INTEGER AS $$
+    SELECT CASE
+        WHEN latency_ms < 50 THEN 1
+        WHEN latency_ms < 100 THEN 2
+        WHEN latency_ms < 250 THEN 3
+        WHEN latency_ms < 500 THEN 4
+        WHEN latency_ms < 1000 THEN 5
+        WHEN latency_ms < 2500 THEN 6
+        WHEN latency_ms < 5000 THEN 7
+        WHEN latency_ms < 10000 THEN 8
+        ELSE 9
+    END
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION record_activity_rollup(
+    p_organization_id INTEGER,
+    p_user_id INTEGER,
+    p_day DATE,
+    p_type VARCHAR,
+    p_latency_ms INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    bucket INTEGER;
+    histogram INTEGER[] := '{0,0,0,0,0,0,0,0,0}';
+BEGIN
+    IF p_user_id IS NULL THEN
+        RETURN;
+    END IF;
+    -- A latency of 0 is the legacy "not measured" placeholder
+    IF p_latency_ms IS NOT NULL AND p_latency_ms > 0 THEN
+        bucket := latency_bucket(p_latency_ms);
+        histogram[bucket] := 1;
+    END IF;
+
+    INSERT INTO activity_daily_rollups AS r
+        (organization_id, user_id, day, type, event_count, latency_sum_ms, latency_count, latency_histogram)
+    VALUES (
+        COALESCE(p_organization_id, 0), p_user_id, p_day, p_type, 1,
+        COALESCE(NULLIF(p_latency_ms, 0), 0), CASE WHEN bucket IS NULL THEN 0 ELSE 1 END, histogram
+    )
+    ON CONFLICT (organization_id, user_id, day, type) DO UPDATE SET
+        event_count = r.event_count + 1,
+        latency_sum_ms = r.latency_sum_ms + EXCLUDED.latency_sum_ms,
+        latency_count = r.latency_count + EXCLUDED.latency_count,
+        latency_histogram = (
+            SELECT array_agg(a + b ORDER BY i)
+            FROM unnest(r.latency_histogram, EXCLUDED.latency_histogram) WITH ORDINALITY AS h(a, b, i)
+        );
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION activities_rollup_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM record_activity_rollup(
+        COALESCE(NEW.organization_id, (SELECT organization_id FROM users WHERE id = NEW.user_id)),
+        NEW.user_id,
+        COALESCE(NEW.created_at, CURRENT_TIMESTAMP)::date,
+        NEW.type,
+        COALESCE(NULLIF(NEW.response_time_ms, 0), NEW.response_time)
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rag_documents_rollup_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM record_activity_rollup(
+        (SELECT organization_id FROM users WHERE id = NEW.user_id::integer),
+        NEW.user_id::integer,
+        COALESCE(NEW.upload_date, CURRENT_TIMESTAMP)::date,
+        'rag_upload',
+        NULL
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION documents_rollup_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM record_activity_rollup(
+        COALESCE(NEW.organization_id, (SELECT organization_id FROM users WHERE id = NEW.uploaded_by)),
+        NEW.uploaded_by,
+        COALESCE(NEW.created_at, CURRENT_TIMESTAMP)::date,
+        'document_upload',
+        NULL
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_activities_rollup ON activities;
+CREATE TRIGGER trg_activities_rollup AFTER INSERT ON activities
+    FOR EACH ROW EXECUTE FUNCTION activities_rollup_trigger();
+
+DROP TRIGGER IF EXISTS trg_rag_documents_rollup ON rag_documents;
+CREATE TRIGGER trg_rag_documents_rollup AFTER INSERT ON rag_documents
+    FOR EACH ROW EXECUTE FUNCTION rag_documents_rollup_trigger();
+
+DROP TRIGGER IF EXISTS trg_documents_rollup ON documents;
+CREATE TRIGGER trg_documents_rollup AFTER INSERT ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_rollup_trigger();
+
+-- Rebuild rollups for days >= from_day from the base tables. Used for the
+-- initial backfill below and as a periodic repair job:
+--     SELECT rebuild_activity_rollups(CURRENT_DATE - 7);
+CREATE OR REPLACE FUNCTION rebuild_activity_rollups(from_day DATE) RETURNS VOID AS $$
+BEGIN
+    DELETE FROM activity_daily_rollups WHERE day >= from_day;
+
+    INSERT INTO activity_daily_rollups
+        (organization_id, user_id, day, type, event_count, latency_sum_ms, latency_count, latency_histogram)
+    SELECT org_id, user_id, day, type, COUNT(*),
+           COALESCE(SUM(latency) FILTER (WHERE latency > 0), 0),
+           COUNT(*) FILTER (WHERE latency > 0),
+           ARRAY[
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 1),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 2),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 3),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 4),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 5),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 6),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 7),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 8),
+               COUNT(*) FILTER (WHERE latency > 0 AND latency_bucket(latency) = 9)
+           ]::INTEGER[]
+    FROM (
+        SELECT COALESCE(a.organization_id, u.organization_id, 0) AS org_id,
+               a.user_id, a.created_at::date AS day, a.type,
+               COALESCE(NULLIF(a.response_time_ms, 0), a.response_time) AS latency
+        FROM activities a
+        LEFT JOIN users u ON u.id = a.user_id
+        WHERE a.created_at >= from_day AND a.user_id IS NOT NULL
+        UNION ALL
+        SELECT COALESCE(u.organization_id, 0), d.user_id::integer, d.upload_date::date, 'rag_upload', NULL
+        FROM rag_documents d
+        LEFT JOIN users u ON u.id = d.user_id::integer
+        WHERE d.upload_date >= from_day
+        UNION ALL
+        SELECT COALESCE(d.organization_id, u.organization_id, 0), d.uploaded_by, d.created_at::date, 'document_upload', NULL
+        FROM documents d
+        LEFT JOIN users u ON u.id = d.uploaded_by
+        WHERE d.created_at >= from_day AND d.uploaded_by IS NOT NULL
+    ) events
+    GROUP BY org_id, user_id, day, type;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_activity_rollups('-infinity'::date);
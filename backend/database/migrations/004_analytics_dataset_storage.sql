@@ -0,0 +1,9 @@
+-- Uploaded analytics datasets move out of the JSONB column into Parquet files.
+-- `document_data` now only holds metadata (columns, row count, ...) and
+-- `storage_path` points at the file; rows without a path are legacy uploads
+-- that still carry their rows inline under document_data->'data'.
+
+ALTER TABLE analytics_documents
+ADD COLUMN IF NOT EXISTS storage_path TEXT,
+ADD COLUMN IF NOT EXISTS storage_format VARCHAR(20),
+ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
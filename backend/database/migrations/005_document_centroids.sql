@@ -0,0 +1,9 @@
+-- Per-document centroid embeddings for two-stage retrieval.
+-- `centroid` is the normalized mean of the document's chunk embeddings
+-- (float32 bytes, same layout as rag_embeddings.embedding). Searches over
+-- all of a user's documents first rank documents by centroid, then score
+-- chunks of the best documents only. Existing documents are backfilled
+-- lazily by the search path.
+ALTER TABLE rag_documents ADD COLUMN IF NOT EXISTS centroid BYTEA;
+
+CREATE INDEX IF NOT EXISTS idx_rag_documents_user_status ON rag_documents(user_id, processing_status);
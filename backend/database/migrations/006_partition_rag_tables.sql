@@ -0,0 +1,137 @@
+-- Partition RAG chunks and embeddings by organization.
+-- `rag_document_chunks` and `rag_embeddings` become LIST partitioned on
+-- organization_id with one partition per organization (created by a trigger
+-- on `organizations`) and a default partition for users without one (0).
+-- Searches filter on organization_id, so they only touch their tenant's
+-- pages, and `SELECT drop_rag_tenant(<org id>)` removes a tenant's whole
+-- index by dropping its partitions instead of cascading row by row.
+--
+-- Both tables reference rag_documents directly (not each other), so a
+-- partition can be dropped without touching any other partition.
+
+-- Databases that applied 001 before it converted adopted VARCHAR user_id
+-- columns still have them; the backfill below and the new INTEGER columns
+-- need the converted shape (see 001 for why orphaned rows go).
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['rag_documents', 'rag_embeddings', 'rag_chat_sessions'] LOOP
+        CONTINUE WHEN (
+            SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = v_table AND column_name = 'user_id'
+        ) = 'integer';
+        EXECUTE format(
+            'DELETE FROM %I t WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id::text = t.user_id)', v_table
+        );
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN user_id TYPE INTEGER USING user_id::integer', v_table);
+        EXECUTE format('ALTER TABLE %I ADD FOREIGN KEY (user_id) REFERENCES users(id)', v_table);
+    END LOOP;
+END
+$$;
+
+ALTER TABLE rag_documents ADD COLUMN IF NOT EXISTS organization_id INTEGER NOT NULL DEFAULT 0;
+UPDATE rag_documents d
+SET organization_id = u.organization_id
+FROM users u
+WHERE u.id = d.user_id AND u.organization_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_rag_doc_org ON rag_documents(organization_id);
+
+-- Keep the old tables aside until their rows are copied
+ALTER TABLE rag_embeddings RENAME TO rag_embeddings_unpartitioned;
+ALTER INDEX rag_embeddings_pkey RENAME TO rag_embeddings_unpartitioned_pkey;
+ALTER TABLE rag_document_chunks RENAME TO rag_document_chunks_unpartitioned;
+ALTER INDEX rag_document_chunks_pkey RENAME TO rag_document_chunks_unpartitioned_pkey;
+
+CREATE TABLE rag_document_chunks (
+    organization_id INTEGER NOT NULL DEFAULT 0,
+    chunk_id VARCHAR(36) NOT NULL,
+    document_id VARCHAR(36) NOT NULL,
+    content TEXT NOT NULL,
+    chunk_index INTEGER,
+    start_char INTEGER,
+    end_char INTEGER,
+    tokens_count INTEGER,
+    metadata JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (organization_id, chunk_id),
+    FOREIGN KEY (document_id) REFERENCES rag_documents(document_id) ON DELETE CASCADE
+) PARTITION BY LIST (organization_id);
+
+-- Embeddings are stored as serialized float32 in BYTEA
+CREATE TABLE rag_embeddings (
+    organization_id INTEGER NOT NULL DEFAULT 0,
+    embedding_id VARCHAR(36) NOT NULL,
+    chunk_id VARCHAR(36) NOT NULL,
+    document_id VARCHAR(36) NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    embedding BYTEA NOT NULL,
+    embedding_model VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (organization_id, embedding_id),
+    FOREIGN KEY (document_id) REFERENCES rag_documents(document_id) ON DELETE CASCADE
+) PARTITION BY LIST (organization_id);
+
+CREATE TABLE rag_document_chunks_default PARTITION OF rag_document_chunks DEFAULT;
+CREATE TABLE rag_embeddings_default PARTITION OF rag_embeddings DEFAULT;
+
+CREATE OR REPLACE FUNCTION create_rag_tenant_partitions(p_organization_id INTEGER) RETURNS VOID AS $$
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF rag_document_chunks FOR VALUES IN (%s)',
+        'rag_document_chunks_org_' || p_organization_id, p_organization_id
+    );
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF rag_embeddings FOR VALUES IN (%s)',
+        'rag_embeddings_org_' || p_organization_id, p_organization_id
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Removes every RAG document, chunk and embedding of an organization
+CREATE OR REPLACE FUNCTION drop_rag_tenant(p_organization_id INTEGER) RETURNS VOID AS $$
+BEGIN
+    IF p_organization_id = 0 THEN
+        RAISE EXCEPTION 'organization 0 lives in the default partitions and cannot be dropped';
+    END IF;
+    EXECUTE format('DROP TABLE IF EXISTS %I', 'rag_embeddings_org_' || p_organization_id);
+    EXECUTE format('DROP TABLE IF EXISTS %I', 'rag_document_chunks_org_' || p_organization_id);
+    DELETE FROM rag_documents WHERE organization_id = p_organization_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION organizations_create_rag_partitions() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM create_rag_tenant_partitions(NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_organizations_rag_partitions ON organizations;
+CREATE TRIGGER trg_organizations_rag_partitions
+AFTER INSERT ON organizations
+FOR EACH ROW EXECUTE FUNCTION organizations_create_rag_partitions();
+
+SELECT create_rag_tenant_partitions(id) FROM organizations;
+
+INSERT INTO rag_document_chunks
+    (organization_id, chunk_id, document_id, content, chunk_index, start_char, end_char, tokens_count, metadata, created_at)
+SELECT d.organization_id, c.chunk_id, c.document_id, c.content, c.chunk_index, c.start_char, c.end_char,
+       c.tokens_count, c.metadata, c.created_at
+FROM rag_document_chunks_unpartitioned c
+JOIN rag_documents d ON d.document_id = c.document_id;
+
+INSERT INTO rag_embeddings
+    (organization_id, embedding_id, chunk_id, document_id, user_id, embedding, embedding_model, created_at)
+SELECT d.organization_id, e.embedding_id, e.chunk_id, e.document_id, e.user_id, e.embedding, e.embedding_model, e.created_at
+FROM rag_embeddings_unpartitioned e
+JOIN rag_documents d ON d.document_id = e.document_id;
+
+DROP TABLE rag_embeddings_unpartitioned;
+DROP TABLE rag_document_chunks_unpartitioned;
+
+-- Partitioned indexes; within a partition organization_id is constant
+CREATE INDEX IF NOT EXISTS idx_rag_chunk_doc ON rag_document_chunks(document_id);
+CREATE INDEX IF NOT EXISTS idx_rag_emb_user_doc ON rag_embeddings(user_id, document_id);
+CREATE INDEX IF NOT EXISTS idx_rag_emb_chunk ON rag_embeddings(chunk_id);
+CREATE INDEX IF NOT EXISTS idx_rag_emb_doc ON rag_embeddings(document_id);
@@ -0,0 +1,4 @@
+-- SHA-256 of the uploaded file, computed while the upload is streamed to disk
+ALTER TABLE rag_documents ADD COLUMN IF NOT EXISTS content_sha256 CHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_rag_documents_user_sha256 ON rag_documents(user_id, content_sha256);
@@ -0,0 +1,41 @@
+-- Keyset pagination for list endpoints.
+-- Each list is ordered newest first with the primary key as tie-breaker and
+-- pages with `(created_at, id) < (cursor)`, so these indexes (leading with
+-- the list's owner column) make every page a short index range scan.
+-- Sort keys must not be NULL for the row comparison to hold; all inserts
+-- rely on the column defaults, so this only pins that down.
+
+UPDATE rag_documents SET upload_date = CURRENT_TIMESTAMP WHERE upload_date IS NULL;
+ALTER TABLE rag_documents ALTER COLUMN upload_date SET NOT NULL;
+UPDATE documents SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE documents ALTER COLUMN created_at SET NOT NULL;
+UPDATE users SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE users ALTER COLUMN created_at SET NOT NULL;
+UPDATE contact_submissions SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE contact_submissions ALTER COLUMN created_at SET NOT NULL;
+UPDATE support_tickets SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE support_tickets ALTER COLUMN created_at SET NOT NULL;
+UPDATE chat_sessions SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+ALTER TABLE chat_sessions ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_rag_documents_user_upload
+    ON rag_documents(user_id, upload_date DESC, document_id DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_org_created
+    ON documents(organization_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_users_org_created
+    ON users(organization_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_contact_submissions_org_created
+    ON contact_submissions(organization_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_support_tickets_org_created
+    ON support_tickets(organization_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_support_tickets_user_created
+    ON support_tickets(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_user_created
+    ON chat_sessions(user_id, created_at DESC, id DESC);
+
+-- Stored message count, kept in sync by Postgres, instead of expanding the
+-- messages array of every listed session
+ALTER TABLE chat_sessions ADD COLUMN IF NOT EXISTS message_count INTEGER
+    GENERATED ALWAYS AS (
+        CASE WHEN jsonb_typeof(messages) = 'array' THEN jsonb_array_length(messages) ELSE 0 END
+    ) STORED;
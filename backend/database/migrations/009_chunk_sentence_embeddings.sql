@@ -0,0 +1,7 @@
+-- Per-sentence embeddings of each chunk for the LLM-free extractive answer
+-- (backend/utils/extractive.py). `sentence_spans` holds int32 (start, end)
+-- offsets into `content`, `sentence_embeddings` the float16 vectors of those
+-- sentences in the same order. Chunks written before this migration keep
+-- NULLs; their sentences are embedded when a question retrieves them.
+ALTER TABLE rag_document_chunks ADD COLUMN IF NOT EXISTS sentence_spans BYTEA;
+ALTER TABLE rag_document_chunks ADD COLUMN IF NOT EXISTS sentence_embeddings BYTEA;
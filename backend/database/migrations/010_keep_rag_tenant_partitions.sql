@@ -0,0 +1,50 @@
+-- `drop_rag_tenant` (006) dropped an organization's partitions even when the
+-- organization still existed, so its later chunks and embeddings went to the
+-- default partitions. Creating a tenant's partitions now moves any of its rows
+-- out of the default partition first, and `drop_rag_tenant` recreates empty
+-- partitions for an organization that still exists. Organizations already
+-- left without partitions get them back below, rows included.
+
+CREATE OR REPLACE FUNCTION create_rag_tenant_partitions(p_organization_id INTEGER) RETURNS VOID AS $$
+DECLARE
+    v_table TEXT;
+    v_partition TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['rag_document_chunks', 'rag_embeddings'] LOOP
+        v_partition := v_table || '_org_' || p_organization_id;
+        CONTINUE WHEN to_regclass(v_partition) IS NOT NULL;
+        -- The new partition can't be created while the default one holds its rows;
+        -- the lock keeps new ones from arriving until they are moved
+        EXECUTE format('LOCK TABLE %I IN SHARE ROW EXCLUSIVE MODE', v_table);
+        EXECUTE format(
+            'CREATE TEMP TABLE rag_tenant_rows ON COMMIT DROP AS SELECT * FROM %I WHERE organization_id = %s',
+            v_table || '_default', p_organization_id
+        );
+        EXECUTE format('DELETE FROM %I WHERE organization_id = %s', v_table || '_default', p_organization_id);
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%s)',
+            v_partition, v_table, p_organization_id
+        );
+        EXECUTE format('INSERT INTO %I SELECT * FROM rag_tenant_rows', v_table);
+        DROP TABLE rag_tenant_rows;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Removes every RAG document, chunk and embedding of an organization. An
+-- organization that still exists keeps (empty) partitions for new documents.
+CREATE OR REPLACE FUNCTION drop_rag_tenant(p_organization_id INTEGER) RETURNS VOID AS $$
+BEGIN
+    IF p_organization_id = 0 THEN
+        RAISE EXCEPTION 'organization 0 lives in the default partitions and cannot be dropped';
+    END IF;
+    EXECUTE format('DROP TABLE IF EXISTS %I', 'rag_embeddings_org_' || p_organization_id);
+    EXECUTE format('DROP TABLE IF EXISTS %I', 'rag_document_chunks_org_' || p_organization_id);
+    DELETE FROM rag_documents WHERE organization_id = p_organization_id;
+    IF EXISTS (SELECT 1 FROM organizations WHERE id = p_organization_id) THEN
+        PERFORM create_rag_tenant_partitions(p_organization_id);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_rag_tenant_partitions(id) FROM organizations;
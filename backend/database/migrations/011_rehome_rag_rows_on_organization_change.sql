@@ -0,0 +1,44 @@
+-- RAG rows are partitioned by rag_documents.organization_id, copied from the
+-- owner at upload (006), while searches scan the partitions of the caller's
+-- current organization. A user who joined, left or changed organization after
+-- uploading lost retrieval over their own documents. Their documents, chunks
+-- and embeddings now follow them: changing users.organization_id moves the
+-- rows to the new organization's partitions (0, the default ones, for none).
+-- Workers holding the old organization in their user context cache
+-- (auth_utils.user_context_cache) search the old partitions until it expires.
+
+CREATE OR REPLACE FUNCTION rehome_rag_rows(p_user_id INTEGER, p_organization_id INTEGER) RETURNS VOID AS $$
+BEGIN
+    IF p_organization_id <> 0 THEN
+        PERFORM create_rag_tenant_partitions(p_organization_id);
+    END IF;
+    UPDATE rag_documents SET organization_id = p_organization_id
+    WHERE user_id = p_user_id AND organization_id <> p_organization_id;
+    UPDATE rag_document_chunks c SET organization_id = p_organization_id
+    FROM rag_documents d
+    WHERE d.document_id = c.document_id AND d.user_id = p_user_id AND c.organization_id <> p_organization_id;
+    UPDATE rag_embeddings SET organization_id = p_organization_id
+    WHERE user_id = p_user_id AND organization_id <> p_organization_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION users_rehome_rag_rows() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM rehome_rag_rows(NEW.id, COALESCE(NEW.organization_id, 0));
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_rehome_rag_rows ON users;
+CREATE TRIGGER trg_users_rehome_rag_rows
+AFTER UPDATE OF organization_id ON users
+FOR EACH ROW WHEN (OLD.organization_id IS DISTINCT FROM NEW.organization_id)
+EXECUTE FUNCTION users_rehome_rag_rows();
+
+-- Users whose organization already changed
+SELECT rehome_rag_rows(u.id, COALESCE(u.organization_id, 0))
+FROM users u
+WHERE EXISTS (
+    SELECT 1 FROM rag_documents d
+    WHERE d.user_id = u.id AND d.organization_id <> COALESCE(u.organization_id, 0)
+);
@@ -1,28 +1,139 @@
+"""
+Versioned database migrations
+Applies the numbered SQL files in `migrations/` once, in order, and records
+each applied version in `schema_migrations`.
+
+Usage:
+    python -m backend.database.run_migrations            # apply pending migrations
+    python -m backend.database.run_migrations --status   # list applied/pending versions
+"""
+
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import hashlib
+import logging
 import os
+import re
+import sys
+from typing import List, Tuple
 from backend.config import settings
 
-def run_migrations():
-    """Run database migrations"""
-    try:
-        conn = psycopg2.connect(
-            host=settings.POSTGRES_HOST,
-            database=settings.POSTGRES_DB,
-            user=settings.POSTGRES_USER,
-            password=settings.POSTGRES_PASSWORD,
-            port=settings.POSTGRES_PORT
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+
+# Files must be named `<version>_<description>.sql`, e.g. `003_add_rollups.sql`
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_([\w\-]+)\.sql$')
+
+# Arbitrary constant shared by every process that runs migrations, so that
+# several workers starting at once apply each version exactly once.
+MIGRATION_LOCK_ID = 7_310_226_001
+
+
+def _connect():
+    return psycopg2.connect(
+        host=settings.POSTGRES_HOST,
+        database=settings.POSTGRES_DB,
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        port=settings.POSTGRES_PORT
+    )
+
+
+def discover_migrations() -> List[Tuple[int, str, str]]:
+    """Return (version, name, path) for every migration file, sorted by version"""
+    migrations = []
+    seen = {}
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise RuntimeError(f"Duplicate migration version {version}: {seen[version]} and {filename}")
+        seen[version] = filename
+        migrations.append((version, match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    migrations.sort(key=lambda m: m[0])
+    return migrations
+
+
+def _checksum(sql: str) -> str:
+    return hashlib.sha256(sql.encode('utf-8')).hexdigest()
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
+    """)
+
+
+def _applied_versions(cursor) -> dict:
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def run_migrations() -> List[int]:
+    """Apply all pending migrations under a Postgres advisory lock.
+
+    Each migration runs in its own transaction together with its
+    `schema_migrations` row, so a failure leaves no partial version behind.
+
+    Returns:
+        Versions applied by this call (empty when the schema is up to date)
+    """
+    conn = None
+    applied_now = []
+    try:
+        conn = _connect()
         cursor = conn.cursor()
-        
-        # Read and execute the migration file
-        migration_file = os.path.join(os.path.dirname(__file__), 'migrations', 'add_response_time_column.sql')
-        with open(migration_file, 'r') as f:
-            migration_sql = f.read()
-            cursor.execute(migration_sql)
-        
-        conn.commit()
-        print("Migration completed successfully")
+
+        # Session-level lock: held across the per-migration commits below
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            _ensure_migrations_table(cursor)
+            conn.commit()
+
+            applied = _applied_versions(cursor)
+            for version, name, path in discover_migrations():
+                with open(path, 'r') as f:
+                    migration_sql = f.read()
+                checksum = _checksum(migration_sql)
+
+                if version in applied:
+                    if applied[version] != checksum:
+                        logger.warning(f"Migration {version}_{name} was modified after it was applied")
+                    continue
+
+                logger.info(f"Applying migration {version}_{name}")
+                try:
+                    cursor.execute(migration_sql)
+                    cursor.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                        (version, name, checksum)
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    logger.error(f"Migration {version}_{name} failed")
+                    raise
+                applied_now.append(version)
+        finally:
+            # A failed statement leaves the transaction aborted, and the unlock
+            # would fail too (hiding the original error). Rolling back doesn't
+            # release the session-level lock.
+            conn.rollback()
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.commit()
+
+        if applied_now:
+            print(f"Applied migrations: {', '.join(str(v) for v in applied_now)}")
+        else:
+            print("Database schema is up to date")
+        return applied_now
     except Exception as e:
         print(f"Migration error: {str(e)}")
         raise
@@ -30,5 +141,23 @@ def run_migrations():
         if conn:
             conn.close()
 
+
+def migration_status() -> List[Tuple[int, str, bool]]:
+    """Return (version, name, applied) for every known migration"""
+    conn = _connect()
+    try:
+        cursor = conn.cursor()
+        _ensure_migrations_table(cursor)
+        conn.commit()
+        applied = _applied_versions(cursor)
+        return [(version, name, version in applied) for version, name, _ in discover_migrations()]
+    finally:
+        conn.close()
+
+
 if __name__ == "__main__":
-    run_migrations() 
\ No newline at end of file
+    if "--status" in sys.argv[1:]:
+        for version, name, applied in migration_status():
+            print(f"{version:04d}  {'applied' if applied else 'pending':8}  {name}")
+    else:
+        run_migrations()
@@ -15,11 +15,36 @@ import json
 # Import your auth router
 from backend.routes import loginPage, signupPage, profilePage, analyticsDashboard, uploadBooksPage, userManagement, chatRoutes, contactPage, homePage, rag_routes, debug_routes
 from backend.config import settings
-from backend.auth_utils import get_current_user, get_db, verify_admin_token
+from backend.auth_utils import get_current_user, get_db, verify_admin_token, invalidate_user_context
+from backend.database.run_migrations import run_migrations
+from backend.utils.rag_services import init_rag_services, shutdown_rag_services
+from backend.utils.activity_writer import get_activity_writer, shutdown_activity_writer
+from backend.utils.progress_events import start_progress_relay, stop_progress_relay
+from backend.utils.compression import CompressionMiddleware
+from contextlib import asynccontextmanager
 from PIL import Image
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Apply pending schema migrations, build application-scoped services and
+    start the buffered activity writer (flushed on shutdown).
+
+    Deployments that run `python -m backend.database.run_migrations` as a
+    release step can disable the migration step with RUN_MIGRATIONS_ON_STARTUP=false.
+    """
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        run_migrations()
+    app.state.rag_services = init_rag_services()
+    get_activity_writer()
+    await start_progress_relay()
+    yield
+    stop_progress_relay()
+    shutdown_activity_writer()
+    shutdown_rag_services()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS - Permissive settings for development
 print("CORS Origins:", settings.CORS_ORIGINS)
@@ -56,6 +81,26 @@ async def preflight_handler(full_path: str):
     )
 
 
+# Reject oversized request bodies before they are read (registered first so the
+# CORS safety net below still wraps the 413)
+@app.middleware("http")
+async def limit_request_size(request, call_next):
+    length = request.headers.get('content-length')
+    if (
+        settings.UPLOAD_MAX_REQUEST_BYTES
+        and length and length.isdigit()
+        and int(length) > settings.UPLOAD_MAX_REQUEST_BYTES
+    ):
+        return Response(
+            content=json.dumps({
+                "detail": f"Request body exceeds {settings.UPLOAD_MAX_REQUEST_BYTES / 1024 / 1024:.0f}MB"
+            }),
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            media_type="application/json"
+        )
+    return await call_next(request)
+
+
 # Safety net: ensure responses include CORS header when middleware/route errors occur.
 @app.middleware("http")
 async def ensure_cors_header(request, call_next):
@@ -97,6 +142,15 @@ async def ensure_cors_header(request, call_next):
     
     return response
 
+# Outermost, so it sees the final headers and body of every response
+if settings.RESPONSE_COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES,
+        gzip_level=settings.RESPONSE_GZIP_LEVEL,
+        brotli_quality=settings.RESPONSE_BROTLI_QUALITY
+    )
+
 # Include routers
 app.include_router(loginPage.router, prefix="/api", tags=["auth"])
 app.include_router(signupPage.router, prefix="/api", tags=["auth"])
@@ -124,322 +178,6 @@ app.mount(
 # JWT secret key
 SECRET_KEY = settings.SECRET_KEY
 
-# Initialize database
-def init_db():
-    try:
-        print("\nEnvironment Variables Check:")
-        print("POSTGRES_USER from env:", os.getenv("POSTGRES_USER"))
-        print("POSTGRES_PASSWORD from env:", "****" if os.getenv("POSTGRES_PASSWORD") else "None")
-        print("POSTGRES_HOST from env:", os.getenv("POSTGRES_HOST"))
-        print("POSTGRES_PORT from env:", os.getenv("POSTGRES_PORT"))
-        print("POSTGRES_DB from env:", os.getenv("POSTGRES_DB"))
-        
-        print("\nSettings Values:")
-        print(f"Host: {settings.POSTGRES_HOST}")
-        print(f"Database: {settings.POSTGRES_DB}")
-        print(f"User: {settings.POSTGRES_USER}")
-        print(f"Port: {settings.POSTGRES_PORT}")
-        print(f"Password is set: {'Yes' if settings.POSTGRES_PASSWORD else 'No'}")
-        
-        # Use connection string instead of individual parameters
-        conn_string = f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
-        print("\nConnection string (password hidden):", conn_string.replace(settings.POSTGRES_PASSWORD, "****"))
-        
-        conn = psycopg2.connect(conn_string)
-        cursor = conn.cursor()
-        
-        # Table for organizations
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS organizations (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) UNIQUE NOT NULL
-            )
-        """)
-
-        # Table for users (linked to orgs)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                name VARCHAR(255) NOT NULL,
-                role VARCHAR(50) NOT NULL CHECK (role IN ('admin', 'employee')),
-                department VARCHAR(255) DEFAULT '',
-                phone VARCHAR(50) DEFAULT '',
-                avatar_url VARCHAR(255) DEFAULT '',
-                job_title VARCHAR(255) DEFAULT '',
-                bio TEXT DEFAULT '',
-                location VARCHAR(255) DEFAULT '',
-                linkedin VARCHAR(255) DEFAULT '',
-                github VARCHAR(255) DEFAULT '',
-                twitter VARCHAR(255) DEFAULT '',
-                skills JSONB DEFAULT '[]',
-                achievements JSONB DEFAULT '[]',
-                education JSONB DEFAULT '[]',
-                experience JSONB DEFAULT '[]',
-                organization_id INTEGER REFERENCES organizations(id)
-            )
-        """)
-
-        # Table for categories
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) UNIQUE NOT NULL,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Insert default categories if they don't exist
-        default_categories = [
-            ("General", "General knowledge and information"),
-            ("Technical", "Technical documentation and guides"),
-            ("HR", "Human Resources related documents"),
-            ("Finance", "Financial documents and procedures"),
-            ("Projects", "Project related documentation")
-        ]
-        
-        cursor.executemany("""
-            INSERT INTO categories (name, description)
-            VALUES (%s, %s)
-            ON CONFLICT (name) DO NOTHING
-        """, default_categories)
-
-        # Table for documents
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS documents (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                content TEXT,
-                category_id INTEGER REFERENCES categories(id),
-                file_type VARCHAR(50) DEFAULT 'Other',
-                size_bytes BIGINT DEFAULT 0,
-                uploaded_by INTEGER REFERENCES users(id),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Table for activities
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS activities (
-                id SERIAL PRIMARY KEY,
-                type VARCHAR(50) NOT NULL,
-                user_id INTEGER NOT NULL REFERENCES users(id),
-                action VARCHAR(255) NOT NULL,
-                target VARCHAR(255) NOT NULL,
-                response_time INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Table for contact submissions
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS contact_submissions (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) NOT NULL,
-                subject VARCHAR(255) NOT NULL,
-                message TEXT NOT NULL,
-                priority VARCHAR(50) DEFAULT 'normal',
-                user_id INTEGER REFERENCES users(id),
-                organization_id INTEGER REFERENCES organizations(id),
-                status VARCHAR(50) DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Table for support tickets
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS support_tickets (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(255) NOT NULL,
-                description TEXT NOT NULL,
-                category VARCHAR(100) NOT NULL,
-                priority VARCHAR(50) DEFAULT 'medium',
-                user_id INTEGER REFERENCES users(id),
-                organization_id INTEGER REFERENCES organizations(id),
-                status VARCHAR(50) DEFAULT 'open',
-                response TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Table for notifications
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS notifications (
-                id SERIAL PRIMARY KEY,
-                type VARCHAR(100) NOT NULL,
-                message TEXT NOT NULL,
-                description TEXT,
-                priority VARCHAR(50) DEFAULT 'medium',
-                user_id INTEGER REFERENCES users(id),
-                organization_id INTEGER REFERENCES organizations(id),
-                reference_id INTEGER,
-                reference_type VARCHAR(100),
-                read_status BOOLEAN DEFAULT FALSE,
-                archived BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Table for analytics documents (saved uploaded files for analytics)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS analytics_documents (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER NOT NULL REFERENCES users(id),
-                filename VARCHAR(255) NOT NULL,
-                document_data JSONB NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id)
-            )
-        """)
-
-        # Add settings column to organizations table if it doesn't exist
-        cursor.execute("""
-            ALTER TABLE organizations 
-            ADD COLUMN IF NOT EXISTS settings JSONB DEFAULT '{}',
-            ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        """)
-
-        # Add response_time column to activities table if it doesn't exist
-        cursor.execute("""
-            ALTER TABLE activities 
-            ADD COLUMN IF NOT EXISTS response_time INTEGER DEFAULT 0
-        """)
-
-        # Create chat_history table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chat_history (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id),
-                question TEXT,
-                answer TEXT,
-                context VARCHAR(50),
-                language VARCHAR(10),
-                sources JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Create chat_sessions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chat_sessions (
-                id SERIAL PRIMARY KEY,
-                session_id VARCHAR(36) UNIQUE,
-                user_id INTEGER REFERENCES users(id),
-                title VARCHAR(255),
-                context VARCHAR(50),
-                messages JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        # RAG Advanced System Tables (PostgreSQL-compatible)
-        # Namespaced table names (`rag_`) to avoid collisions with application documents
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS rag_documents (
-                document_id VARCHAR(36) PRIMARY KEY,
-                user_id INTEGER NOT NULL REFERENCES users(id),
-                filename VARCHAR(255) NOT NULL,
-                file_type VARCHAR(20),
-                file_size INTEGER,
-                total_chunks INTEGER DEFAULT 0,
-                total_tokens INTEGER DEFAULT 0,
-                upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                processing_status VARCHAR(50) DEFAULT 'pending',
-                error_message TEXT,
-                embedding_model VARCHAR(100) DEFAULT 'all-MiniLM-L6-v2'
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_doc_user ON rag_documents(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_doc_status ON rag_documents(processing_status)")
-
-        # Document chunks table (RAG)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS rag_document_chunks (
-                chunk_id VARCHAR(36) PRIMARY KEY,
-                document_id VARCHAR(36) NOT NULL,
-                content TEXT NOT NULL,
-                chunk_index INTEGER,
-                start_char INTEGER,
-                end_char INTEGER,
-                tokens_count INTEGER,
-                metadata JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (document_id) REFERENCES rag_documents(document_id) ON DELETE CASCADE
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_chunk_doc ON rag_document_chunks(document_id)")
-
-        # Embeddings table (RAG) - store as BYTEA
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS rag_embeddings (
-                embedding_id VARCHAR(36) PRIMARY KEY,
-                chunk_id VARCHAR(36) NOT NULL,
-                document_id VARCHAR(36) NOT NULL,
-                user_id INTEGER NOT NULL REFERENCES users(id),
-                embedding BYTEA NOT NULL,
-                embedding_model VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (chunk_id) REFERENCES rag_document_chunks(chunk_id) ON DELETE CASCADE
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_emb_user_doc ON rag_embeddings(user_id, document_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_emb_chunk ON rag_embeddings(chunk_id)")
-
-        # RAG chat sessions
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS rag_chat_sessions (
-                session_id VARCHAR(36) PRIMARY KEY,
-                user_id INTEGER NOT NULL REFERENCES users(id),
-                title VARCHAR(255),
-                document_ids JSONB,
-                total_messages INTEGER DEFAULT 0,
-                total_tokens INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_session_user ON rag_chat_sessions(user_id)")
-
-        # RAG chat messages
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS rag_chat_messages (
-                message_id VARCHAR(36) PRIMARY KEY,
-                session_id VARCHAR(36) NOT NULL,
-                role VARCHAR(20),
-                content TEXT,
-                retrieved_chunks JSONB,
-                confidence FLOAT,
-                processing_time_ms FLOAT,
-                tokens_used INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (session_id) REFERENCES rag_chat_sessions(session_id) ON DELETE CASCADE
-            )
-        """)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_msg_session ON rag_chat_messages(session_id)")
-
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Failed to initialize database: {e}")
-        raise
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    init_db()
-
-
-
 # Admin-only routes
 @app.get("/admin/users")
 def list_users(db: psycopg2.extensions.connection = Depends(get_db), admin=Depends(verify_admin_token)):
@@ -459,6 +197,7 @@ def update_user_role(user_id: int, payload: dict, db: psycopg2.extensions.connec
     if cursor.rowcount == 0:
         raise HTTPException(status_code=404, detail="User not found")
     db.commit()
+    invalidate_user_context(user_id)
     return {"message": "Role updated"}
 
 @app.delete("/admin/users/{user_id}")
@@ -468,6 +207,7 @@ def delete_user(user_id: int, db: psycopg2.extensions.connection = Depends(get_d
     if cursor.rowcount == 0:
         raise HTTPException(status_code=404, detail="User not found")
     db.commit()
+    invalidate_user_context(user_id)
     return {"message": "User deleted"}
 
 # Profile Routes
@@ -573,6 +313,7 @@ def update_profile(
     ))
 
     db.commit()
+    invalidate_user_context(current_user["id"])
 
 @app.get("/")
 async def root():
@@ -145,6 +145,10 @@ class RAGChatResponse(BaseModel):
     processing_time_ms: float
     model_used: str = "sentence-transformers/all-MiniLM-L6-v2"
     retrieval_count: int
+    timings: Optional[Dict[str, float]] = None  # Per-stage latency (ms), when requested
+    # Which path produced the answer: llm, llm_hedged, extractive, extractive_deadline,
+    # rule_based, rule_based_deadline, or no_context when nothing relevant was retrieved
+    answer_path: Optional[str] = None
     
     class Config:
         json_schema_extra = {
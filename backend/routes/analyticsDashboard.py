@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from backend.config import settings
 from backend.database.db import get_db
 from backend.auth_utils import get_current_user
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, timedelta
 import pandas as pd
-import io
 import json
+import time
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, List, Optional
+from backend.utils import activity_rollups, dataset_query, dataset_store
+from backend.utils.activity_writer import record_activity
+from backend.utils.fast_json import FastJSONResponse
 
 router = APIRouter()
 
@@ -35,169 +42,36 @@ async def get_analytics(
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
         
-        # Get analytics data for the date range
-        cursor.execute("""
-            SELECT 
-                DATE(created_at) as day,
-                COUNT(*) as queries,
-                COUNT(CASE WHEN type = 'document_query' THEN 1 END) as document_queries,
-                COUNT(CASE WHEN type = 'chat' THEN 1 END) as chat_queries,
-                AVG(CASE WHEN response_time IS NOT NULL THEN response_time END) as avg_response_time
-            FROM activities 
-            WHERE user_id = %s 
-            AND created_at >= %s 
-            AND created_at <= %s
-            GROUP BY DATE(created_at)
-            ORDER BY day
-        """, (current_user["id"], start_date, end_date))
-        
-        activity_data = cursor.fetchall()
-        
-        # Get RAG document uploads
-        upload_data = []
-        try:
-            cursor.execute("""
-                SELECT 
-                    DATE(upload_date) as day,
-                    COUNT(*) as uploads
-                FROM rag_documents 
-                WHERE user_id = %s 
-                AND upload_date >= %s 
-                AND upload_date <= %s
-                GROUP BY DATE(upload_date)
-                ORDER BY day
-            """, (current_user["id"], start_date, end_date))
-            upload_data = cursor.fetchall()
-        except psycopg2.Error:
-            upload_data = []
+        # Daily totals come from the pre-aggregated rollup table, keyed by day
+        is_admin = current_user.get('role') == 'admin'
+        own_days = activity_rollups.daily_activity(cursor, start_date, end_date, user_id=current_user["id"])
+        # Admin sees all active users; employees see their own activity count
+        active_days = activity_rollups.daily_activity(cursor, start_date, end_date) if is_admin else own_days
         
-        # Also get regular document uploads if table exists
-        try:
-            cursor.execute("""
-                SELECT 
-                    DATE(created_at) as day,
-                    COUNT(*) as uploads
-                FROM documents 
-                WHERE uploaded_by = %s 
-                AND created_at >= %s 
-                AND created_at <= %s
-                GROUP BY DATE(created_at)
-                ORDER BY day
-            """, (current_user["id"], start_date, end_date))
-            doc_uploads = cursor.fetchall()
-            # Merge with RAG uploads
-            for doc_up in doc_uploads:
-                day_str = doc_up['day'].strftime('%Y-%m-%d')
-                existing = next((u for u in upload_data if u['day'].strftime('%Y-%m-%d') == day_str), None)
-                if existing:
-                    existing['uploads'] += doc_up['uploads']
-                else:
-                    upload_data.append(doc_up)
-        except psycopg2.Error:
-            pass
-        
-        # Get active users count (for admin) or user's own activity
-        user_data = []
-        try:
-            # Check if user is admin
-            cursor.execute("SELECT role FROM users WHERE id = %s", (current_user["id"],))
-            user_role = cursor.fetchone()
-            
-            if user_role and user_role.get('role') == 'admin':
-                # Admin sees all active users
-                cursor.execute("""
-                    SELECT 
-                        DATE(created_at) as day,
-                        COUNT(DISTINCT user_id) as active_users
-                    FROM activities 
-                    WHERE created_at >= %s 
-                    AND created_at <= %s
-                    GROUP BY DATE(created_at)
-                    ORDER BY day
-                """, (start_date, end_date))
-            else:
-                # Employee sees their own activity count
-                cursor.execute("""
-                    SELECT 
-                        DATE(created_at) as day,
-                        COUNT(*) as active_users
-                    FROM activities 
-                    WHERE user_id = %s 
-                    AND created_at >= %s 
-                    AND created_at <= %s
-                    GROUP BY DATE(created_at)
-                    ORDER BY day
-                """, (current_user["id"], start_date, end_date))
-            user_data = cursor.fetchall()
-        except psycopg2.Error:
-            user_data = []
-        
-        # Combine data into daily analytics
         analytics_data = []
-        current_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_datetime = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        while current_date <= end_datetime:
-            day_str = current_date.strftime('%Y-%m-%d')
-            day_display = current_date.strftime('%b %d')
-            
-            # Find matching data
-            activity = next((a for a in activity_data if a['day'].strftime('%Y-%m-%d') == day_str), None)
-            uploads = next((u for u in upload_data if u['day'].strftime('%Y-%m-%d') == day_str), None)
-            users = next((u for u in user_data if u['day'].strftime('%Y-%m-%d') == day_str), None)
+        for day in activity_rollups.day_range(start_date, end_date):
+            activity = own_days.get(day)
+            active = active_days.get(day)
+            avg_response_time = (
+                activity['latency_sum_ms'] / activity['latency_count']
+                if activity and activity['latency_count'] else 150
+            )
             
             analytics_data.append({
-                "day": day_display,
-                "queries": activity['queries'] if activity else 0,
-                "uploads": uploads['uploads'] if uploads else 0,
-                "users": users['active_users'] if users else 0,
+                "day": day.strftime('%b %d'),
+                "queries": activity['activities'] if activity else 0,
+                "uploads": (activity['rag_uploads'] + activity['document_uploads']) if activity else 0,
+                "users": (active['active_users'] if is_admin else active['activities']) if active else 0,
                 "successRate": 95,  # Mock success rate
-                "responseTime": round(activity['avg_response_time'] if activity and activity['avg_response_time'] else 150, 0)
+                "responseTime": round(avg_response_time, 0)
             })
-            
-            current_date += timedelta(days=1)
         
-        # Get total counts for summary
-        total_queries = sum(d['queries'] for d in analytics_data)
-        total_uploads = sum(d['uploads'] for d in analytics_data)
-        
-        # Get actual total counts from database
-        try:
-            cursor.execute("""
-                SELECT COUNT(*) as total
-                FROM activities 
-                WHERE user_id = %s 
-                AND created_at >= %s 
-                AND created_at <= %s
-            """, (current_user["id"], start_date, end_date))
-            actual_queries = cursor.fetchone()['total'] or 0
-            
-            cursor.execute("""
-                SELECT COUNT(*) as total
-                FROM rag_documents 
-                WHERE user_id = %s 
-                AND upload_date >= %s 
-                AND upload_date <= %s
-            """, (current_user["id"], start_date, end_date))
-            actual_uploads = cursor.fetchone()['total'] or 0
-            
-            # Get active users count (for admin)
-            cursor.execute("SELECT role FROM users WHERE id = %s", (current_user["id"],))
-            user_role = cursor.fetchone()
-            if user_role and user_role.get('role') == 'admin':
-                cursor.execute("""
-                    SELECT COUNT(DISTINCT user_id) as total
-                    FROM activities 
-                    WHERE created_at >= %s 
-                    AND created_at <= %s
-                """, (start_date, end_date))
-                active_users = cursor.fetchone()['total'] or 0
-            else:
-                active_users = 1  # Employee sees themselves
-        except psycopg2.Error:
-            actual_queries = total_queries
-            actual_uploads = total_uploads
-            active_users = 1
+        actual_queries = sum(d['activities'] for d in own_days.values())
+        actual_uploads = sum(d['rag_uploads'] for d in own_days.values())
+        if is_admin:
+            active_users = activity_rollups.distinct_active_users(cursor, start_date, end_date)
+        else:
+            active_users = 1  # Employee sees themselves
         
         return {
             "analytics_data": analytics_data,
@@ -275,120 +149,76 @@ async def upload_data_file(
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
-    """Upload CSV or Excel file and return chart-ready data"""
+    """Upload CSV or Excel file and return chart-ready data.
+
+    The file is parsed in chunks and stored as Parquet on disk; the database
+    row only keeps the dataset metadata and a pointer to the file.
+    """
+    started = time.perf_counter()
     try:
-        # Helper function to clean NaN and other non-JSON-serializable values
-        def clean_for_json(obj):
-            """Convert NaN, Infinity, and other non-JSON-serializable values to None"""
-            import math
-            if isinstance(obj, dict):
-                return {k: clean_for_json(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [clean_for_json(item) for item in obj]
-            elif isinstance(obj, float):
-                # Convert NaN and Infinity to None
-                if math.isnan(obj) or math.isinf(obj):
-                    return None
-                return obj
-            return obj
-        
-        # Read file content
-        contents = await file.read()
-        
         # Determine file type
         file_ext = file.filename.split('.')[-1].lower() if file.filename else ''
-        
-        # Parse file based on extension
-        if file_ext in ['csv']:
-            df = pd.read_csv(io.BytesIO(contents))
-        elif file_ext in ['xlsx', 'xls']:
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
+        if file_ext not in dataset_store.SUPPORTED_EXTENSIONS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unsupported file type. Please upload CSV or Excel file."
             )
-        
-        # Replace NaN values with None for JSON serialization
-        df = df.where(pd.notna(df), None)
-        
-        # Convert DataFrame to JSON for frontend
-        # Get column names
-        columns = df.columns.tolist()
-        
-        # Convert to records format
-        records = df.to_dict('records')
-        # Clean the records to remove any remaining NaN values
-        records = clean_for_json(records)
-        
-        # Get numeric columns for charting (include int, float, and numeric string columns)
-        # Filter out text columns - only include numeric types
-        numeric_columns = df.select_dtypes(include=['number', 'int64', 'float64', 'int32', 'float32']).columns.tolist()
-        
-        # If no numeric columns found, try to detect numeric columns by attempting conversion
-        # But exclude columns that are clearly text (object/string type)
-        if not numeric_columns:
-            text_type_columns = df.select_dtypes(include=['object', 'string']).columns.tolist()
-            for col in df.columns:
-                if col not in text_type_columns:  # Skip text columns
-                    try:
-                        # Try to convert to numeric
-                        pd.to_numeric(df[col], errors='raise')
-                        numeric_columns.append(col)
-                    except (ValueError, TypeError):
-                        pass
-        
-        # Get text/category columns for labels (exclude numeric columns)
-        text_columns = df.select_dtypes(include=['object', 'string']).columns.tolist()
-        # Exclude columns that are numeric
-        text_columns = [col for col in text_columns if col not in numeric_columns]
-        label_column = text_columns[0] if text_columns else None
-        
-        # Save document to database for user
+        if file.size is not None and file.size > settings.UPLOAD_MAX_FILE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds the maximum upload size of {settings.UPLOAD_MAX_FILE_BYTES / 1024 / 1024:.0f}MB"
+            )
+
+        # Parse and write off the event loop; only one chunk is in memory at a time
+        dataset = await run_in_threadpool(
+            dataset_store.write_dataset, file.file, file_ext, current_user["id"]
+        )
+
+        document_data = {
+            "filename": file.filename,
+            "columns": dataset["columns"],
+            "numeric_columns": dataset["numeric_columns"],
+            "text_columns": dataset["text_columns"],
+            "label_column": dataset["label_column"],
+            "row_count": dataset["row_count"],
+            "full_data_count": dataset["row_count"]
+        }
+
+        # Save document metadata to database for user
+        previous_path = None
+        saved = False
         try:
-            from psycopg2.extras import RealDictCursor
             cursor = db.cursor(cursor_factory=RealDictCursor)
-            
+
             try:
-                # Store file content as JSON in database
-                import json
-                document_data = {
-                    "filename": file.filename,
-                    "columns": columns,
-                    "numeric_columns": numeric_columns,
-                    "text_columns": text_columns,
-                    "label_column": label_column,
-                    "row_count": len(df),
-                    "data": records,  # Store all data (cleaned)
-                    "full_data_count": len(df)
-                }
-                
-                # Clean document_data before JSON serialization
-                document_data = clean_for_json(document_data)
-                
                 # Check if user already has a saved document
                 cursor.execute("""
-                    SELECT id FROM analytics_documents 
+                    SELECT id, storage_path FROM analytics_documents 
                     WHERE user_id = %s
                 """, (current_user["id"],))
                 
                 existing = cursor.fetchone()
                 
                 if existing:
-                    # Update existing document
+                    # Update existing document and bump its version
+                    previous_path = existing["storage_path"]
                     cursor.execute("""
                         UPDATE analytics_documents 
-                        SET filename = %s, document_data = %s, updated_at = CURRENT_TIMESTAMP
+                        SET filename = %s, document_data = %s, storage_path = %s, storage_format = %s,
+                            version = version + 1, updated_at = CURRENT_TIMESTAMP
                         WHERE user_id = %s
-                    """, (file.filename, json.dumps(document_data), current_user["id"]))
+                    """, (file.filename, json.dumps(document_data), dataset["storage_path"],
+                          dataset["storage_format"], current_user["id"]))
                 else:
                     # Insert new document
                     cursor.execute("""
-                        INSERT INTO analytics_documents (user_id, filename, document_data)
-                        VALUES (%s, %s, %s)
-                    """, (current_user["id"], file.filename, json.dumps(document_data)))
+                        INSERT INTO analytics_documents (user_id, filename, document_data, storage_path, storage_format)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (current_user["id"], file.filename, json.dumps(document_data),
+                          dataset["storage_path"], dataset["storage_format"]))
                 
                 db.commit()
+                saved = True
             except Exception as save_error:
                 # Log error but don't fail the upload
                 print(f"Error saving document to database: {str(save_error)}")
@@ -398,20 +228,30 @@ async def upload_data_file(
         except Exception as save_error:
             # Log error but don't fail the upload
             print(f"Error with database connection: {str(save_error)}")
-            pass
+
+        # Keep exactly one stored file per user
+        if saved:
+            if previous_path and previous_path != dataset["storage_path"]:
+                dataset_store.delete_dataset(previous_path)
+        else:
+            dataset_store.delete_dataset(dataset["storage_path"])
         
+        record_activity(
+            "upload",
+            current_user["id"],
+            "uploaded_dataset",
+            file.filename,
+            response_time_ms=(time.perf_counter() - started) * 1000,
+            organization_id=current_user.get("organization_id")
+        )
         return {
             "success": True,
-            "filename": file.filename,
-            "columns": columns,
-            "numeric_columns": numeric_columns,
-            "text_columns": text_columns,
-            "label_column": label_column,
-            "row_count": len(df),
-            "data": records[:100],  # Limit to first 100 rows for preview
-            "full_data_count": len(df)
+            **document_data,
+            "data": dataset["preview"]  # First rows only, for preview
         }
         
+    except HTTPException:
+        raise
     except pd.errors.EmptyDataError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -423,20 +263,28 @@ async def upload_data_file(
             detail=f"Error processing file: {str(e)}"
         )
 
-@router.get("/analytics/saved-document")
+@router.get("/analytics/saved-document", response_class=FastJSONResponse)
 async def get_saved_document(
+    columns: str = None,
+    offset: int = 0,
+    limit: int = None,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
-    """Get user's saved uploaded document"""
+    """Get user's saved uploaded document.
+
+    `columns` (comma separated) projects the returned rows, `offset`/`limit`
+    slice them; only the matching Parquet row groups are read.
+    """
+    offset = max(offset, 0)
+    limit = settings.ANALYTICS_SAVED_DOCUMENT_ROWS if limit is None else min(max(limit, 0), settings.ANALYTICS_MAX_ROWS_PER_READ)
+    projection = [c.strip() for c in columns.split(',') if c.strip()] if columns else None
     try:
-        from psycopg2.extras import RealDictCursor
-        import json
         cursor = db.cursor(cursor_factory=RealDictCursor)
         
         try:
             cursor.execute("""
-                SELECT filename, document_data, updated_at
+                SELECT filename, document_data, storage_path, version, updated_at
                 FROM analytics_documents
                 WHERE user_id = %s
                 ORDER BY updated_at DESC
@@ -444,24 +292,116 @@ async def get_saved_document(
             """, (current_user["id"],))
             
             result = cursor.fetchone()
-            
-            if result:
-                document_data = json.loads(result["document_data"]) if isinstance(result["document_data"], str) else result["document_data"]
-                return {
-                    "success": True,
-                    "document": document_data
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": "No saved document found"
-                }
         finally:
             cursor.close()
+
+        if not result:
+            return {
+                "success": False,
+                "message": "No saved document found"
+            }
+
+        document_data = json.loads(result["document_data"]) if isinstance(result["document_data"], str) else result["document_data"]
+        if result["storage_path"]:
+            document_data["data"] = await run_in_threadpool(
+                dataset_store.read_rows, result["storage_path"], projection, offset, limit
+            )
+        else:
+            # Legacy rows keep the whole dataset inline
+            rows = document_data.get("data", [])[offset:offset + limit]
+            if projection:
+                rows = [{c: row.get(c) for c in projection if c in row} for row in rows]
+            document_data["data"] = rows
+        document_data.update({"version": result["version"], "offset": offset, "limit": limit})
+        return FastJSONResponse({
+            "success": True,
+            "document": document_data
+        })
     except Exception as e:
         # If table doesn't exist, return no document
         print(f"Error fetching saved document: {str(e)}")
         return {
             "success": False,
             "message": "No saved document found"
-        }
\ No newline at end of file
+        }
+
+
+class DatasetFilter(BaseModel):
+    column: str
+    op: str = "=="
+    value: Any  # a list for 'in' / 'not in'; null matches missing values with == / !=
+
+    @model_validator(mode="after")
+    def check_value(self):
+        problem = dataset_query.filter_value_error(self.op, self.value)
+        if problem:
+            raise ValueError(problem)
+        return self
+
+
+class DatasetMetric(BaseModel):
+    column: Optional[str] = None  # omitted for a plain row count
+    agg: str = "sum"
+    alias: Optional[str] = None
+
+
+class DatasetQuery(BaseModel):
+    group_by: List[str] = []
+    filters: List[DatasetFilter] = []
+    metrics: List[DatasetMetric] = []
+    time_column: Optional[str] = None
+    time_bucket: Optional[str] = None  # minute, hour, day, week, month, quarter, year
+    order_by: Optional[str] = None
+    descending: bool = False
+    # Line-chart downsampling: keep at most max_points of (x_column, y_column) via LTTB
+    x_column: Optional[str] = None
+    y_column: Optional[str] = None
+    max_points: Optional[int] = Field(default=None, ge=3)
+    limit: Optional[int] = Field(default=None, ge=1)
+
+
+@router.post("/analytics/query", response_class=FastJSONResponse)
+async def query_saved_document(
+    query: DatasetQuery,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """Aggregate / downsample the user's saved dataset server-side"""
+    cursor = db.cursor(cursor_factory=RealDictCursor)
+    try:
+        cursor.execute("""
+            SELECT id, storage_path, version,
+                   CASE WHEN storage_path IS NULL THEN document_data->'data' END AS inline_data
+            FROM analytics_documents
+            WHERE user_id = %s
+            ORDER BY updated_at DESC
+            LIMIT 1
+        """, (current_user["id"],))
+        document = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    if not document:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No saved document found")
+
+    spec = query.model_dump()
+    spec["limit"] = min(query.limit or settings.ANALYTICS_MAX_ROWS_PER_READ, settings.ANALYTICS_MAX_ROWS_PER_READ)
+    try:
+        if document["storage_path"]:
+            result = await run_in_threadpool(
+                dataset_query.run_query, document["storage_path"], document["version"], spec
+            )
+        else:
+            result = await run_in_threadpool(
+                dataset_query.run_inline_query, ("inline", document["id"]), document["version"],
+                document["inline_data"] or [], spec
+            )
+    except dataset_query.DatasetQueryError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error querying dataset: {str(e)}"
+        )
+
+    return FastJSONResponse({"success": True, "version": document["version"], **result})
@@ -5,11 +5,14 @@ from psycopg2.extras import RealDictCursor
 from backend.database.db import get_db
 from backend.auth_utils import get_current_user
 from backend.models.chat_models import ChatResponse, ChatHistoryItem, SaveChatRequest
-from backend.utils import DocumentProcessor
+from backend.utils import DocumentProcessor, activity_rollups
+from backend.utils.activity_writer import record_activity
+from backend.utils.pagination import InvalidCursor, fetch_page, page_limit
 import os
 import shutil
-from datetime import datetime
+from datetime import date, datetime
 import logging
+import time
 import uuid
 import json
 
@@ -101,6 +104,7 @@ async def chat(
     """
     Main chat endpoint that processes user messages and returns AI responses
     """
+    started = time.perf_counter()
     cursor = None
     try:
         cursor = db.cursor(cursor_factory=RealDictCursor)
@@ -145,33 +149,18 @@ async def chat(
         if document_names:
             sources.extend(document_names)
         
-        # Log chat activity to database
-        cursor.execute("""
-            INSERT INTO activities (type, user_id, action, target, response_time)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (
+        # Log chat activity (buffered, written in the background)
+        record_activity(
             "chat",
             current_user["id"],
             "asked",
             question[:100],  # Store first 100 chars
-            0  # Response time in ms
-        ))
+            response_time_ms=(time.perf_counter() - started) * 1000,
+            organization_id=current_user.get("organization_id")
+        )
         
         # Save chat history if context indicates persistence is needed
         if context != "general":
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS chat_history (
-                    id SERIAL PRIMARY KEY,
-                    user_id INTEGER REFERENCES users(id),
-                    question TEXT,
-                    answer TEXT,
-                    context VARCHAR(50),
-                    language VARCHAR(10),
-                    sources JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
             cursor.execute("""
                 INSERT INTO chat_history (user_id, question, answer, context, language, sources)
                 VALUES (%s, %s, %s, %s, %s, %s)
@@ -218,20 +207,6 @@ async def save_chat_session(
         session_id = str(uuid.uuid4())
         message_count = len(request.messages)
         
-        # Create chat sessions table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chat_sessions (
-                id SERIAL PRIMARY KEY,
-                session_id VARCHAR(36) UNIQUE,
-                user_id INTEGER REFERENCES users(id),
-                title VARCHAR(255),
-                context VARCHAR(50),
-                messages JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
         cursor.execute("""
             INSERT INTO chat_sessions (session_id, user_id, title, context, messages)
             VALUES (%s, %s, %s, %s, %s)
@@ -261,24 +236,27 @@ async def save_chat_session(
 
 @router.get("/chat/sessions")
 async def get_chat_sessions(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
-    """Retrieve all saved chat sessions for the user"""
+    """Retrieve a page of the user's saved chat sessions, newest first (20 by default)"""
     try:
-        cursor = db.cursor(cursor_factory=RealDictCursor)
+        db_cursor = db.cursor(cursor_factory=RealDictCursor)
         
-        cursor.execute("""
-            SELECT session_id, title, context, created_at, 
-                   (SELECT COUNT(*) FROM (SELECT value FROM jsonb_array_elements(messages)) AS msgs) as message_count
-            FROM chat_sessions
-            WHERE user_id = %s
-            ORDER BY created_at DESC
-            LIMIT 20
-        """, (current_user["id"],))
-        
-        sessions = cursor.fetchall()
-        return {"sessions": sessions if sessions else []}
+        sessions, next_cursor = fetch_page(
+            db_cursor,
+            "SELECT id, session_id, title, context, created_at, message_count FROM chat_sessions",
+            ["user_id = %s"], [current_user["id"]],
+            [("created_at", "created_at"), ("id", "id")],
+            cursor, page_limit(limit, default=20)
+        )
+        for session in sessions:
+            session.pop("id")
+        return {"sessions": sessions, "next_cursor": next_cursor}
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving chat sessions: {str(e)}")
         return {"sessions": []}
@@ -362,6 +340,7 @@ async def query_document(
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
+    started = time.perf_counter()
     try:
         # Create uploads directory if it doesn't exist
         upload_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
@@ -373,12 +352,15 @@ async def query_document(
             shutil.copyfileobj(file.file, buffer)
 
         # Log the document query activity
-        cursor = db.cursor()
-        cursor.execute("""
-            INSERT INTO activities (type, user_id, action, target)
-            VALUES (%s, %s, %s, %s)
-        """, ("document_query", current_user["id"], "queried", file.filename))
-        db.commit()
+        record_activity(
+            "document_query",
+            current_user["id"],
+            "queried",
+            file.filename,
+            response_time_ms=(time.perf_counter() - started) * 1000,
+            organization_id=current_user.get("organization_id"),
+            query_text=question
+        )
 
         # For now, return a simple response
         # TODO: Integrate with actual document query model
@@ -428,20 +410,14 @@ async def get_search_analytics(
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
     try:
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT 
-                DATE(created_at) as date,
-                COUNT(*) as count
-            FROM activities
-            WHERE user_id = %s AND type IN ('chat', 'document_query')
-            GROUP BY DATE(created_at)
-            ORDER BY date DESC
-            LIMIT 30
-        """, (current_user["id"],))
-        
-        analytics = cursor.fetchall()
-        return analytics
+        cursor = db.cursor(cursor_factory=RealDictCursor)
+        end_day = datetime.now().date()
+        rows = activity_rollups.daily_counts(
+            cursor, date.min, end_day, ["chat", "document_query"],
+            user_id=current_user["id"]
+        )
+        # Most recent 30 active days, newest first
+        return [{"date": row["day"], "count": row["count"]} for row in reversed(rows[-30:])]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -6,6 +6,7 @@ from pydantic import BaseModel, EmailStr
 from backend.database.db import get_db
 
 from backend.auth_utils import get_current_user
+from backend.utils.pagination import InvalidCursor, cached_count, fetch_page, invalidate_counts, page_limit, set_page_headers
 
 router = APIRouter()
 
@@ -51,6 +52,7 @@ async def submit_contact_form(
         
         submission_id = cursor.fetchone()["id"]
         db.commit()
+        invalidate_counts("contact_submissions")
         
         # Log activity
         cursor.execute("""
@@ -99,6 +101,7 @@ async def create_support_ticket(
         
         ticket_id = cursor.fetchone()["id"]
         db.commit()
+        invalidate_counts("support_tickets")
         
         # Log activity
         cursor.execute("""
@@ -121,9 +124,13 @@ async def create_support_ticket(
 
 @router.get("/contact/submissions")
 async def get_contact_submissions(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
+    """One page of the organization's contact submissions, newest first (cursor in `X-Next-Cursor`)"""
     try:
         # Check if user is admin
         if current_user["role"] != "admin":
@@ -132,19 +139,31 @@ async def get_contact_submissions(
                 detail="Only administrators can view contact submissions"
             )
         
-        cursor = db.cursor()
+        db_cursor = db.cursor()
         
-        cursor.execute("""
+        submissions, next_cursor = fetch_page(
+            db_cursor,
+            """
             SELECT cs.*, u.name as user_name
             FROM contact_submissions cs
             JOIN users u ON cs.user_id = u.id
-            WHERE cs.organization_id = %s
-            ORDER BY cs.created_at DESC
-        """, (current_user["organization_id"],))
-        
-        submissions = cursor.fetchall()
+            """,
+            ["cs.organization_id = %s"], [current_user["organization_id"]],
+            [("cs.created_at", "created_at"), ("cs.id", "id")],
+            cursor, page_limit(limit)
+        )
+        count = cached_count(
+            db_cursor, ("contact_submissions", current_user["organization_id"]),
+            "contact_submissions WHERE organization_id = %s", [current_user["organization_id"]]
+        )
+        set_page_headers(response, next_cursor, count)
         return submissions
         
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -153,34 +172,43 @@ async def get_contact_submissions(
 
 @router.get("/support/tickets")
 async def get_support_tickets(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
+    """One page of support tickets, newest first (cursor in `X-Next-Cursor`)"""
     try:
-        cursor = db.cursor()
+        db_cursor = db.cursor()
         
-        # If admin, get all tickets for organization
+        # If admin, get all tickets for organization; regular users see only their tickets
         if current_user["role"] == "admin":
-            cursor.execute("""
-                SELECT st.*, u.name as user_name
-                FROM support_tickets st
-                JOIN users u ON st.user_id = u.id
-                WHERE st.organization_id = %s
-                ORDER BY st.created_at DESC
-            """, (current_user["organization_id"],))
+            scope = ("organization_id", current_user["organization_id"])
         else:
-            # Regular users see only their tickets
-            cursor.execute("""
-                SELECT st.*, u.name as user_name
-                FROM support_tickets st
-                JOIN users u ON st.user_id = u.id
-                WHERE st.user_id = %s
-                ORDER BY st.created_at DESC
-            """, (current_user["id"],))
-        
-        tickets = cursor.fetchall()
+            scope = ("user_id", current_user["id"])
+        tickets, next_cursor = fetch_page(
+            db_cursor,
+            """
+            SELECT st.*, u.name as user_name
+            FROM support_tickets st
+            JOIN users u ON st.user_id = u.id
+            """,
+            [f"st.{scope[0]} = %s"], [scope[1]],
+            [("st.created_at", "created_at"), ("st.id", "id")],
+            cursor, page_limit(limit)
+        )
+        count = cached_count(
+            db_cursor, ("support_tickets",) + scope, f"support_tickets WHERE {scope[0]} = %s", [scope[1]]
+        )
+        set_page_headers(response, next_cursor, count)
         return tickets
         
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
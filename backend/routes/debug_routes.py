@@ -1,13 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from typing import Any, Dict
-from backend.auth_utils import get_db, get_current_user
+from backend.auth_utils import get_db, get_current_user, user_context_cache, verify_admin_token
+from backend.utils.dataset_query import dataset_query_cache
+from backend.utils.activity_writer import get_activity_writer
+from backend.utils.admission import get_admission_controller
+from backend.utils.fast_json import FastJSONResponse
+from backend.utils.progress_events import progress_hub
+from backend.utils.tenant_scheduler import embedding_scheduler, ingestion_scheduler
+from backend.utils.telemetry import registry
+from backend.routes.homePage import dashboard_snapshot_cache, recent_activity_cache
 
 router = APIRouter()
+# Debug and stats endpoints under /internal are for administrators only
+admin_only = [Depends(verify_admin_token)]
 
 
-@router.get("/internal/rag/debug/{user_id}")
+@router.get("/internal/rag/debug/{user_id}", response_class=FastJSONResponse, dependencies=admin_only)
 def rag_debug(user_id: int, db: psycopg2.extensions.connection = Depends(get_db)) -> Dict[str, Any]:
     """Return quick debug info for RAG tables for a given user_id.
 
@@ -43,14 +54,55 @@ def rag_debug(user_id: int, db: psycopg2.extensions.connection = Depends(get_db)
 
         cursor.close()
 
-        return {
+        return FastJSONResponse({
             "docs_count": docs_count,
             "chunks_count": chunks_count,
             "embeddings_count": emb_count,
             "recent_documents": recent_docs,
             "sample_chunks": sample_chunks,
             "sample_embeddings": sample_embeddings
-        }
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/internal/cache/stats", dependencies=admin_only)
+def cache_stats() -> Dict[str, Any]:
+    """Return hit/miss statistics for the in-process caches."""
+    return {
+        "user_context": user_context_cache.stats(),
+        "dataset_query": dataset_query_cache.stats(),
+        "dashboard_snapshot": dashboard_snapshot_cache.stats(),
+        "dashboard_recent_activity": recent_activity_cache.stats()
+    }
+
+
+@router.get("/internal/activity-writer/stats", dependencies=admin_only)
+def activity_writer_stats() -> Dict[str, Any]:
+    """Return queue depth and write/drop counters of the buffered activity writer."""
+    return get_activity_writer().stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus text exposition of latency histograms, counters and cache stats."""
+    return registry.render()
+
+
+@router.get("/internal/admission/stats", dependencies=admin_only)
+def admission_stats() -> Dict[str, Any]:
+    """Return in-flight and queued request counts per admission class."""
+    return get_admission_controller().stats()
+
+
+@router.get("/internal/tenant-scheduler/stats", dependencies=admin_only)
+def tenant_scheduler_stats() -> Dict[str, Any]:
+    """Return per-tenant queue depth and served cost of the fair schedulers."""
+    return {s.name: s.stats() for s in (ingestion_scheduler, embedding_scheduler)}
+
+
+@router.get("/internal/progress-events/stats", dependencies=admin_only)
+def progress_events_stats() -> Dict[str, Any]:
+    """Return document progress subscriptions and event counts of this process."""
+    return progress_hub.stats()
@@ -1,97 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from typing import Optional
+import hashlib
+import json
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from backend.database.db import get_db
+from backend.config import settings
+from backend.database.db import connect, get_db
 
 from backend.auth_utils import get_current_user
 from datetime import datetime, timedelta
+from backend.utils import activity_rollups
+from backend.utils.cache import TTLCache
 
 router = APIRouter()
 
-@router.get("/dashboard")
-async def get_dashboard_data(
-    current_user: dict = Depends(get_current_user),
-    db: psycopg2.extensions.connection = Depends(get_db)
-):
-    try:
-        # Helper function to safely execute queries with rollback on error
-        def execute_query(query, params=None):
-            try:
-                cursor = db.cursor(cursor_factory=RealDictCursor)
-                cursor.execute(query, params or ())
-                result = cursor.fetchall()
-                cursor.close()
-                return result
-            except Exception as e:
-                print(f"Query error: {str(e)}")
-                db.rollback()
-                return None
-        
-        def execute_query_one(query, params=None):
-            try:
-                cursor = db.cursor(cursor_factory=RealDictCursor)
-                cursor.execute(query, params or ())
-                result = cursor.fetchone()
-                cursor.close()
-                return result
-            except Exception as e:
-                print(f"Query error: {str(e)}")
-                db.rollback()
-                return None
-        
-        # Get user's organization
-        org_result = execute_query_one(
-            "SELECT organization_id FROM users WHERE id = %s",
-            (current_user["id"],)
-        )
-        organization_id = org_result.get("organization_id") if org_result else None
-        
-        # Get document statistics
-        doc_result = execute_query_one("""
-            SELECT 
+# Organization-wide dashboard figures, one entry per organization
+dashboard_snapshot_cache = TTLCache(
+    max_entries=1024,
+    ttl_seconds=settings.DASHBOARD_SNAPSHOT_TTL_SECONDS,
+    name="dashboard_snapshot"
+)
+# The caller's own recent activity feed
+recent_activity_cache = TTLCache(
+    max_entries=settings.USER_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.DASHBOARD_SNAPSHOT_TTL_SECONDS,
+    name="dashboard_recent_activity"
+)
+
+# Everything organization-wide on the dashboard in a single round-trip
+ORG_SNAPSHOT_SQL = """
+    SELECT
+        (SELECT row_to_json(d) FROM (
+            SELECT
                 COUNT(*) as total_documents,
                 COUNT(CASE WHEN created_at >= CURRENT_DATE - INTERVAL '7 days' THEN 1 END) as recent_documents,
                 COUNT(CASE WHEN created_at >= CURRENT_DATE - INTERVAL '30 days' THEN 1 END) as monthly_documents
-            FROM documents 
-            LIMIT 1
-        """)
-        doc_stats = dict(doc_result) if doc_result else {"total_documents": 0, "recent_documents": 0, "monthly_documents": 0}
-        
-        # Get user statistics
-        if organization_id:
-            user_result = execute_query_one("""
-                SELECT 
-                    COUNT(*) as total_users,
-                    COUNT(CASE WHEN role = 'admin' THEN 1 END) as admin_users,
-                    COUNT(CASE WHEN role = 'employee' THEN 1 END) as employee_users
-                FROM users 
-                WHERE organization_id = %s
-            """, (organization_id,))
-        else:
-            user_result = execute_query_one("""
-                SELECT 
-                    1 as total_users,
-                    CASE WHEN role = 'admin' THEN 1 ELSE 0 END as admin_users,
-                    CASE WHEN role = 'employee' THEN 1 ELSE 0 END as employee_users
-                FROM users 
-                WHERE id = %s
-            """, (current_user["id"],))
-        user_stats = dict(user_result) if user_result else {"total_users": 1, "admin_users": 0, "employee_users": 1}
-        
-        # Get recent activities
-        recent_activities_result = execute_query("""
-            SELECT a.*, u.name as user_name
-            FROM activities a
-            JOIN users u ON a.user_id = u.id
-            WHERE a.user_id = %s
-            ORDER BY a.created_at DESC
-            LIMIT 10
-        """, (current_user["id"],))
-        recent_activities = [dict(row) for row in recent_activities_result] if recent_activities_result else []
-        
-        # Get document categories distribution
-        category_stats_result = execute_query("""
+            FROM documents
+        ) d) AS doc_stats,
+        (SELECT row_to_json(u) FROM (
+            SELECT 
+                COUNT(*) as total_users,
+                COUNT(CASE WHEN role = 'admin' THEN 1 END) as admin_users,
+                COUNT(CASE WHEN role = 'employee' THEN 1 END) as employee_users
+            FROM users 
+            WHERE organization_id = %(organization_id)s
+        ) u) AS user_stats,
+        (SELECT COALESCE(json_agg(c), '[]'::json) FROM (
             SELECT 
                 c.name as category,
                 COUNT(d.id) as document_count
@@ -99,82 +54,133 @@ async def get_dashboard_data(
             LEFT JOIN documents d ON c.id = d.category_id
             GROUP BY c.id, c.name
             ORDER BY document_count DESC
-        """)
-        category_stats = [dict(row) for row in category_stats_result] if category_stats_result else []
-        
-        # Get storage usage
-        storage_result = execute_query_one("""
-            SELECT 
-                COUNT(*) as file_count
-            FROM documents 
-            LIMIT 1
-        """)
-        storage_stats = dict(storage_result) if storage_result else {"file_count": 0}
-        # Add total_size with default 0
-        if storage_stats and "total_size" not in storage_stats:
-            storage_stats["total_size"] = 0
-        
-        # Get recent documents
-        recent_documents_result = execute_query("""
+        ) c) AS category_stats,
+        (SELECT COALESCE(json_agg(r), '[]'::json) FROM (
             SELECT d.*, c.name as category_name
             FROM documents d
             LEFT JOIN categories c ON d.category_id = c.id
             ORDER BY d.created_at DESC
             LIMIT 5
-        """)
-        recent_documents = [dict(row) for row in recent_documents_result] if recent_documents_result else []
-        
-        # Get system health metrics
-        if organization_id:
-            system_health_result = execute_query_one("""
-                SELECT 
-                    COUNT(CASE WHEN status = 'open' THEN 1 END) as open_tickets,
-                    COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_contacts
-                FROM (
-                    SELECT 'open' as status FROM support_tickets WHERE organization_id = %s AND status = 'open'
-                    UNION ALL
-                    SELECT 'pending' as status FROM contact_submissions WHERE organization_id = %s AND status = 'pending'
-                ) combined
-            """, (organization_id, organization_id))
-        else:
-            system_health_result = {"open_tickets": 0, "pending_contacts": 0}
-        system_health = dict(system_health_result) if system_health_result else {"open_tickets": 0, "pending_contacts": 0}
-        
-        # Safely extract values
-        def safe_get(obj, key, default=0):
-            if not obj:
-                return default
-            if isinstance(obj, dict):
-                return obj.get(key, default)
-            try:
-                return obj[key] if key in obj else default
-            except (TypeError, KeyError):
-                return default
-        
-        return {
-            "document_stats": {
-                "total": safe_get(doc_stats, "total_documents", 0),
-                "recent": safe_get(doc_stats, "recent_documents", 0),
-                "monthly": safe_get(doc_stats, "monthly_documents", 0)
-            },
-            "user_stats": {
-                "total": safe_get(user_stats, "total_users", 1),
-                "admins": safe_get(user_stats, "admin_users", 0),
-                "employees": safe_get(user_stats, "employee_users", 1)
-            },
-            "storage_stats": {
-                "total_size": safe_get(storage_stats, "total_size", 0),
-                "file_count": safe_get(storage_stats, "file_count", 0),
-                "usage_percentage": min((safe_get(storage_stats, "total_size", 0) / (1024 * 1024 * 1024)) * 100, 100)
-            },
-            "category_distribution": category_stats if category_stats else [],
-            "recent_activities": recent_activities if recent_activities else [],
-            "recent_documents": recent_documents if recent_documents else [],
-            "system_health": {
-                "open_tickets": safe_get(system_health, "open_tickets", 0),
-                "pending_contacts": safe_get(system_health, "pending_contacts", 0)
-            }
+        ) r) AS recent_documents,
+        (SELECT COUNT(*) FROM support_tickets
+         WHERE organization_id = %(organization_id)s AND status = 'open') AS open_tickets,
+        (SELECT COUNT(*) FROM contact_submissions
+         WHERE organization_id = %(organization_id)s AND status = 'pending') AS pending_contacts
+"""
+
+RECENT_ACTIVITIES_SQL = """
+    SELECT COALESCE(json_agg(a), '[]'::json) AS recent_activities FROM (
+        SELECT a.*, u.name as user_name
+        FROM activities a
+        JOIN users u ON a.user_id = u.id
+        WHERE a.user_id = %s
+        ORDER BY a.created_at DESC
+        LIMIT 10
+    ) a
+"""
+
+
+def _etag(payload) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _query_one(sql, params):
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        cursor.close()
+        return row
+    finally:
+        conn.close()
+
+
+def _load_org_snapshot(organization_id: Optional[int]) -> dict:
+    """Organization-wide dashboard figures plus the ETag of their JSON form"""
+    row = _query_one(ORG_SNAPSHOT_SQL, {"organization_id": organization_id})
+    doc_stats = row["doc_stats"] or {}
+    user_stats = row["user_stats"] or {}
+    snapshot = {
+        "document_stats": {
+            "total": doc_stats.get("total_documents", 0),
+            "recent": doc_stats.get("recent_documents", 0),
+            "monthly": doc_stats.get("monthly_documents", 0)
+        },
+        "user_stats": {
+            "total": user_stats.get("total_users", 1),
+            "admins": user_stats.get("admin_users", 0),
+            "employees": user_stats.get("employee_users", 1)
+        },
+        "storage_stats": {
+            "total_size": 0,
+            "file_count": doc_stats.get("total_documents", 0),
+            "usage_percentage": 0
+        },
+        "category_distribution": row["category_stats"] or [],
+        "recent_documents": row["recent_documents"] or [],
+        "system_health": {
+            # Organization-less users have no tickets or contacts to show
+            "open_tickets": row["open_tickets"] if organization_id else 0,
+            "pending_contacts": row["pending_contacts"] if organization_id else 0
         }
+    }
+    return {"data": snapshot, "etag": _etag(snapshot)}
+
+
+def _load_recent_activities(user_id) -> dict:
+    row = _query_one(RECENT_ACTIVITIES_SQL, (user_id,))
+    activities = row["recent_activities"] or []
+    return {"data": activities, "etag": _etag(activities)}
+
+
+async def _cached(cache: TTLCache, key, loader):
+    """Cached entry, loading it in the threadpool on a miss so the
+    blocking psycopg2 query doesn't run on the event loop"""
+    value = cache.get(key)
+    if value is None:
+        value = await run_in_threadpool(cache.get_or_load, key, loader)
+    return value
+
+
+async def get_org_snapshot(organization_id: Optional[int]) -> dict:
+    return await _cached(dashboard_snapshot_cache, organization_id, lambda: _load_org_snapshot(organization_id))
+
+
+@router.get("/dashboard")
+async def get_dashboard_data(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Landing-page dashboard.
+
+    Served from a short-lived per-organization snapshot; the database is only
+    touched when the snapshot (or the caller's activity feed) has expired.
+    Supports conditional requests via ETag / If-None-Match.
+    """
+    try:
+        organization_id = current_user.get("organization_id")
+        snapshot = await get_org_snapshot(organization_id)
+        activities = await _cached(
+            recent_activity_cache, current_user["id"], lambda: _load_recent_activities(current_user["id"])
+        )
+
+        data = dict(snapshot["data"])
+        if not organization_id:
+            # Without an organization the user only counts themselves
+            data["user_stats"] = {
+                "total": 1,
+                "admins": 1 if current_user.get("role") == "admin" else 0,
+                "employees": 1 if current_user.get("role") == "employee" else 0
+            }
+        data["recent_activities"] = activities["data"]
+
+        variant = "" if organization_id else f"-{current_user.get('role')}"
+        etag = f'W/"{snapshot["etag"]}-{activities["etag"]}{variant}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return JSONResponse(content=data, headers=headers)
         
     except Exception as e:
         import traceback
@@ -187,27 +193,14 @@ async def get_dashboard_data(
         )
 
 @router.get("/dashboard/analytics")
-async def get_dashboard_analytics(
+def get_dashboard_analytics(
     period: str = "7d",
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
     try:
         cursor = db.cursor()
-        
-        # Get user's organization
-        cursor.execute("""
-            SELECT organization_id FROM users WHERE id = %s
-        """, (current_user["id"],))
-        
-        org_result = cursor.fetchone()
-        if not org_result:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User organization not found"
-            )
-        
-        organization_id = org_result["organization_id"]
+        organization_id = current_user.get("organization_id")
         
         # Determine date range based on period
         if period == "7d":
@@ -219,35 +212,30 @@ async def get_dashboard_analytics(
         else:
             days = 7
         
-        # Get daily document uploads
-        cursor.execute("""
-            SELECT 
-                DATE(created_at) as date,
-                COUNT(*) as uploads
-            FROM documents 
-            WHERE organization_id = %s 
-            AND created_at >= CURRENT_DATE - INTERVAL '%s days'
-            GROUP BY DATE(created_at)
-            ORDER BY date
-        """, (organization_id, days))
-        
-        document_trends = cursor.fetchall()
-        
-        # Get daily user activities
-        cursor.execute("""
-            SELECT 
-                DATE(created_at) as date,
-                COUNT(*) as activities
-            FROM activities 
-            WHERE user_id IN (
-                SELECT id FROM users WHERE organization_id = %s
-            )
-            AND created_at >= CURRENT_DATE - INTERVAL '%s days'
-            GROUP BY DATE(created_at)
-            ORDER BY date
-        """, (organization_id, days))
-        
-        activity_trends = cursor.fetchall()
+        # Trends come from the pre-aggregated daily rollups
+        end_day = datetime.now().date()
+        start_day = end_day - timedelta(days=days)
+        
+        # Without an organization there is nothing to scope by (the rollup
+        # helpers would aggregate every tenant), so the trends stay empty
+        document_trends, activity_trends, activity_by_type = [], [], []
+        if organization_id is not None:
+            document_trends = [
+                {"date": row["day"], "uploads": row["count"]}
+                for row in activity_rollups.daily_counts(
+                    cursor, start_day, end_day, ["document_upload"], organization_id=organization_id
+                )
+            ]
+
+            activity_days = activity_rollups.daily_activity(cursor, start_day, end_day, organization_id=organization_id)
+            activity_trends = [
+                {"date": day, "activities": activity_days[day]["activities"]}
+                for day in sorted(activity_days)
+                if activity_days[day]["activities"]
+            ]
+
+            # Get user activity by type
+            activity_by_type = activity_rollups.counts_by_type(cursor, start_day, end_day, organization_id=organization_id)
         
         # Get top categories
         cursor.execute("""
@@ -263,22 +251,6 @@ async def get_dashboard_analytics(
         
         top_categories = cursor.fetchall()
         
-        # Get user activity by type
-        cursor.execute("""
-            SELECT 
-                type,
-                COUNT(*) as count
-            FROM activities 
-            WHERE user_id IN (
-                SELECT id FROM users WHERE organization_id = %s
-            )
-            AND created_at >= CURRENT_DATE - INTERVAL '%s days'
-            GROUP BY type
-            ORDER BY count DESC
-        """, (organization_id, days))
-        
-        activity_by_type = cursor.fetchall()
-        
         return {
             "period": period,
             "document_trends": document_trends,
@@ -295,53 +267,16 @@ async def get_dashboard_analytics(
 
 @router.get("/dashboard/quick-actions")
 async def get_quick_actions(
-    current_user: dict = Depends(get_current_user),
-    db: psycopg2.extensions.connection = Depends(get_db)
+    current_user: dict = Depends(get_current_user)
 ):
     try:
-        cursor = db.cursor()
-        
-        # Get user's organization
-        cursor.execute("""
-            SELECT organization_id FROM users WHERE id = %s
-        """, (current_user["id"],))
-        
-        org_result = cursor.fetchone()
-        if not org_result:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User organization not found"
-            )
-        
-        organization_id = org_result["organization_id"]
-        
-        # Get pending items for quick actions
-        cursor.execute("""
-            SELECT 
-                COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_contacts,
-                COUNT(CASE WHEN status = 'open' THEN 1 END) as open_tickets
-            FROM (
-                SELECT status FROM contact_submissions WHERE organization_id = %s
-                UNION ALL
-                SELECT status FROM support_tickets WHERE organization_id = %s
-            ) combined
-        """, (organization_id, organization_id))
-        
-        pending_items = cursor.fetchone()
-        
-        # Get recent uploads by user
-        cursor.execute("""
-            SELECT COUNT(*) as recent_uploads
-            FROM documents 
-            WHERE created_at >= CURRENT_DATE - INTERVAL '7 days'
-        """)
-        
-        user_uploads = cursor.fetchone()
+        # Pending items and recent uploads come from the cached dashboard snapshot
+        snapshot = (await get_org_snapshot(current_user.get("organization_id")))["data"]
         
         return {
-            "pending_contacts": pending_items["pending_contacts"] if pending_items else 0,
-            "open_tickets": pending_items["open_tickets"] if pending_items else 0,
-            "recent_uploads": user_uploads["recent_uploads"] if user_uploads else 0,
+            "pending_contacts": snapshot["system_health"]["pending_contacts"],
+            "open_tickets": snapshot["system_health"]["open_tickets"],
+            "recent_uploads": snapshot["document_stats"]["recent"],
             "can_upload": True,  # Always allow uploads
             "can_manage_users": current_user["role"] == "admin",
             "can_view_analytics": True
@@ -351,4 +286,4 @@ async def get_quick_actions(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
-        ) 
\ No newline at end of file
+        )
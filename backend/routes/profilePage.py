@@ -5,7 +5,7 @@ from psycopg2.extras import RealDictCursor
 from pydantic import BaseModel
 from backend.database.db import get_db
 
-from backend.auth_utils import get_current_user
+from backend.auth_utils import get_current_user, invalidate_user_context
 
 router = APIRouter()
 
@@ -90,6 +90,7 @@ async def update_profile(
         cursor.execute(query, values)
         updated_user = cursor.fetchone()
         db.commit()
+        invalidate_user_context(current_user["id"])
         
         return updated_user
     except Exception as e:
@@ -3,22 +3,39 @@ Advanced RAG Chat Routes
 Main endpoint for RAG-based question answering with document processing
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
 import psycopg2
-from psycopg2.extras import RealDictCursor, execute_values
-from backend.database.db import get_db
+from psycopg2.extras import RealDictCursor
+from backend.database.db import connect, get_db
 from backend.auth_utils import get_current_user
 from backend.models.rag_models import (
     RAGChatResponse, RetrievedChunk, DocumentMetadata,
     ProcessingStatus, UserDocumentIndex
 )
-from backend.utils.advanced_processor import document_processor
-from backend.utils.vector_store import EmbeddingModel, VectorStore, HybridRetriever
+from backend.utils.advanced_processor import Source, document_processor
+from backend.utils.vector_store import VectorStore, HybridRetriever, document_centroid, invalidate_document_chunks
+from backend.utils.rag_services import RAGServices, get_rag_services
+from backend.utils.activity_writer import record_activity
+from backend.utils.admission import Ticket, admission
+from backend.utils.bulk_writer import write_chunks_and_embeddings
+from backend.utils.context_packer import pack_context
+from backend.utils.extractive import extract_sentences, gather_sentences, index_sentences, sentence_spans
+from backend.utils.fast_json import FastJSONResponse
+from backend.utils.pagination import InvalidCursor, cached_count, fetch_page, invalidate_counts, page_limit
+from backend.utils.progress_events import TooManySubscriptions, progress_hub, publish_progress
+from backend.utils.request_budget import current_budget, mark_answer_path, request_budget
+from backend.utils.telemetry import span, trace
+from backend.utils.upload_spool import UploadTooLarge, spool_upload
+from backend.utils.tenant_scheduler import (
+    QuotaExceeded, embedding_scheduler, ingestion_scheduler, tenant_key, tenant_usage
+)
+import numpy as np
 import logging
 import json
 import ast
-import requests
 from backend.config import settings
 from datetime import datetime
 import uuid
@@ -32,16 +49,105 @@ from pathlib import Path
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Global embedding model (loaded once)
-embedding_model = None
+
+# Static prompt prefixes. They are sent as the system message and must stay
+# byte-identical between calls so the provider can serve them from its prefix
+# cache; everything request-specific goes into the user message.
+ANSWER_SYSTEM_PROMPTS = {
+    "documents": (
+        "You are an expert document analysis assistant with a warm, professional, and human-like communication style. "
+        "Your role is to provide accurate, contextually relevant answers based ONLY on the provided document context. "
+        "CRITICAL RULES - FOLLOW STRICTLY:\n"
+        "1. Focus specifically on answering the EXACT question asked - each question requires a unique, tailored response\n"
+        "2. Do NOT repeat or rephrase the user's question in your answer\n"
+        "3. Do NOT ask any questions in your response - provide only statements and answers\n"
+        "4. Do NOT include sentences ending with question marks (?)\n"
+        "5. Do NOT mention sources, filenames, or document names\n"
+        "6. Provide a direct, professional answer that directly addresses what was asked\n"
+        "7. If asked about 'topics', list the main topics. If asked about 'skills', list the skills. "
+        "   If asked about 'education', provide education details. Each question type requires a different response.\n"
+        "8. Write with a natural, human touch - be conversational yet professional\n"
+        "9. Keep responses concise but complete (2-4 sentences for detailed answers, 1-2 for simple facts)\n"
+        "10. Do not include phrases like 'according to the document' or 'the document states'\n"
+        "11. Answer as if you are providing the information directly, not referencing documents\n"
+        "12. NEVER end your response with questions like 'Would you like to know more?' or 'Do you have any other questions?'\n"
+        "13. Vary your responses - different questions should produce different answers, even if from the same document\n"
+        "14. Extract and present information that specifically matches the question's intent\n"
+        "15. FORMATTING: Use markdown formatting to make responses professional and visually appealing:\n"
+        "    - Use **bold** for key terms, important concepts, or section headers\n"
+        "    - Use *italic* for emphasis on specific details\n"
+        "    - Use bullet points (- or *) for lists of items (skills, topics, features, etc.)\n"
+        "    - Use numbered lists (1., 2., 3.) for sequential information\n"
+        "    - Structure longer answers with clear sections using bold headers\n"
+        "    - Example: '**Skills include:**\\n- Python\\n- Machine Learning\\n- *Advanced* AI techniques'\n"
+        "Example 1: If asked 'What are the main topics?', answer: '**Main Topics:**\\n- Topic 1\\n- Topic 2\\n- Topic 3'\n"
+        "Example 2: If asked 'What are the skills?', answer: '**Skills include:**\\n- Skill 1\\n- Skill 2\\n- *Advanced* Skill 3'\n"
+        "Each answer must be unique, tailored to the specific question asked, and professionally formatted."
+    ),
+    "general": (
+        "You are a professional, courteous, and helpful assistant for employees and new interns. Provide friendly, informative, and polite responses about the organization, "
+        "policies, procedures, employee benefits, onboarding, and general workplace questions. "
+        "CRITICAL RULES:\n"
+        "1. Do NOT ask questions in your response - provide only statements and information\n"
+        "2. Do NOT include sentences ending with question marks (?)\n"
+        "3. Always greet users warmly, respond professionally, and end with a polite closing statement (not a question)\n"
+        "4. Be supportive, conversational, and maintain a professional tone using declarative statements only\n"
+        "5. Keep responses concise (2-3 sentences maximum)\n"
+        "6. Focus on helping employees, especially new ones, understand how things work in the organization\n"
+        "7. Offer further assistance using statements like 'I'm available to help with additional questions' NOT 'Do you have any other questions?'"
+    ),
+}
+
+ANSWER_INSTRUCTIONS = (
+    "CRITICAL INSTRUCTIONS:\n"
+    "- Focus ONLY on information that directly answers this specific question\n"
+    "- Use the Question Type to decide which kind of information to extract and present\n"
+    "- Provide a unique, tailored response that directly addresses what was asked\n"
+    "- Do NOT repeat the question. Do NOT ask any questions in your response.\n"
+    "- Do NOT include sentences ending with question marks.\n"
+    "- Do NOT mention that information comes from documents.\n"
+    "- Write naturally with a human touch - be conversational yet professional.\n"
+    "- If the context doesn't contain relevant information, politely state that the information is not available."
+)
+
+NO_CONTEXT_INSTRUCTIONS = (
+    "CRITICAL: Provide a helpful response using only declarative statements. "
+    "Do NOT ask any questions. Do NOT include sentences ending with question marks."
+)
+
+NO_CONTEXT_SYSTEM_PROMPTS = {
+    "general": (
+        "You are a professional, courteous, and friendly assistant for employees and new interns. "
+        "Answer questions about the organization, policies, procedures, employee benefits, onboarding, "
+        "workplace culture, and general employee information. Always greet users warmly and respond professionally. "
+        "CRITICAL RULES:\n"
+        "1. Do NOT ask questions in your response - provide only statements and information\n"
+        "2. Do NOT include sentences ending with question marks (?)\n"
+        "3. Be supportive, conversational, and maintain a polite, professional tone using declarative statements only\n"
+        "4. Keep responses concise (2-3 sentences maximum)\n"
+        "5. Focus on helping employees, especially new ones\n"
+        "6. Always end responses with a polite closing statement (not a question) like 'I'm available to help with additional questions'"
+    ),
+    "documents": (
+        "You are a professional document analysis assistant. "
+        "However, no documents were provided for this query. "
+        "Politely inform the user that they need to upload documents first to get document-based answers, "
+        "and offer to help them with the upload process or answer general questions."
+    )
+}
+
+# Complete system messages, built once
+ANSWER_SYSTEM_MESSAGES = {
+    mode: f"{prompt}\n\n{ANSWER_INSTRUCTIONS}" for mode, prompt in ANSWER_SYSTEM_PROMPTS.items()
+}
+NO_CONTEXT_SYSTEM_MESSAGES = {
+    mode: f"{prompt}\n\n{NO_CONTEXT_INSTRUCTIONS}" for mode, prompt in NO_CONTEXT_SYSTEM_PROMPTS.items()
+}
 
 
 def get_embedding_model():
-    """Get or initialize embedding model"""
-    global embedding_model
-    if embedding_model is None:
-        embedding_model = EmbeddingModel(model_name="all-MiniLM-L6-v2")
-    return embedding_model
+    """Get the shared embedding model from the application service container"""
+    return get_rag_services().embedding_model
 
 
 class AdvancedRAGSystem:
@@ -142,127 +248,41 @@ class AdvancedRAGSystem:
         # This is a simple enhancement - the LLM should handle most formatting
         return text
     
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, services: Optional[RAGServices] = None):
+        # Only the DB connection is request-scoped; everything else is shared
         self.db = db_connection
-        self.embedding_model = get_embedding_model()
-        self.vector_store = VectorStore(db_connection)
-        self.retriever = HybridRetriever(db_connection)
+        self.services = services or get_rag_services()
+        self.embedding_model = self.services.embedding_model
+        self.vector_store = VectorStore(db_connection, embedding_model=self.embedding_model)
+        self.retriever = HybridRetriever(db_connection, vector_store=self.vector_store)
     
-    def ensure_tables_exist(self):
-        """Ensure all RAG tables exist"""
-        try:
-            cursor = self.db.cursor()
-            
-            # Documents table (namespaced for RAG)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rag_documents (
-                    document_id VARCHAR(36) PRIMARY KEY,
-                    user_id VARCHAR(36) NOT NULL,
-                    filename VARCHAR(255) NOT NULL,
-                    file_type VARCHAR(20),
-                    file_size INTEGER,
-                    total_chunks INTEGER DEFAULT 0,
-                    total_tokens INTEGER DEFAULT 0,
-                    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    processing_status VARCHAR(50) DEFAULT 'pending',
-                    error_message TEXT,
-                    embedding_model VARCHAR(100) DEFAULT 'all-MiniLM-L6-v2'
-                );
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_doc_user ON rag_documents(user_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_doc_status ON rag_documents(processing_status)")
-            
-            # Document chunks table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rag_document_chunks (
-                    chunk_id VARCHAR(36) PRIMARY KEY,
-                    document_id VARCHAR(36) NOT NULL,
-                    content TEXT NOT NULL,
-                    chunk_index INTEGER,
-                    start_char INTEGER,
-                    end_char INTEGER,
-                    tokens_count INTEGER,
-                    metadata JSONB,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (document_id) REFERENCES rag_documents(document_id) ON DELETE CASCADE
-                );
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_chunk_doc ON rag_document_chunks(document_id)")
-            
-            # Embeddings table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rag_embeddings (
-                    embedding_id VARCHAR(36) PRIMARY KEY,
-                    chunk_id VARCHAR(36) NOT NULL,
-                    document_id VARCHAR(36) NOT NULL,
-                    user_id VARCHAR(36) NOT NULL,
-                    embedding BYTEA NOT NULL,
-                    embedding_model VARCHAR(100),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (chunk_id) REFERENCES rag_document_chunks(chunk_id) ON DELETE CASCADE
-                );
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_emb_user_doc ON rag_embeddings(user_id, document_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_emb_chunk ON rag_embeddings(chunk_id)")
-            
-            # Chat sessions with RAG context
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rag_chat_sessions (
-                    session_id VARCHAR(36) PRIMARY KEY,
-                    user_id VARCHAR(36) NOT NULL,
-                    title VARCHAR(255),
-                    document_ids JSONB,
-                    total_messages INTEGER DEFAULT 0,
-                    total_tokens INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_user_sessions ON rag_chat_sessions(user_id)")
-            
-            # RAG chat messages
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rag_chat_messages (
-                    message_id VARCHAR(36) PRIMARY KEY,
-                    session_id VARCHAR(36) NOT NULL,
-                    role VARCHAR(20),
-                    content TEXT,
-                    retrieved_chunks JSONB,
-                    confidence FLOAT,
-                    processing_time_ms FLOAT,
-                    tokens_used INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (session_id) REFERENCES rag_chat_sessions(session_id) ON DELETE CASCADE
-                );
-            """)
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_rag_msg_session ON rag_chat_messages(session_id)")
-            
-            self.db.commit()
-            logger.info("All RAG tables created/verified")
-            cursor.close()
-        except Exception as e:
-            logger.error(f"Error creating tables: {e}")
-            self.db.rollback()
-
-    async def _process_bytes(self, document_id: str, file_content: bytes, filename: str, user_id: str):
-        """Process raw bytes for a document (chunking, embedding, storing) with logging.
+    async def _process_file(
+        self, document_id: str, source: Source, filename: str, user_id: str,
+        tenant: Optional[str] = None, organization_id: int = 0
+    ):
+        """Process a document's contents or spooled file (chunking, embedding, storing) with logging.
 
-        This method is safe to call from a background task.
+        This method is safe to call from a background task. With a `tenant`,
+        the ingested tokens count against its quota and embedding batches
+        wait for the tenant's fair share of the embedding workers.
         """
         logger.info(f"Background processing started for document {document_id} (user {user_id})")
         cursor = self.db.cursor()
         try:
-            file_size = len(file_content)
-
+            publish_progress(user_id, document_id, "extracting", filename=filename, status="processing")
             # Chunk the document
             chunks, file_type = await document_processor.process_file_for_rag(
-                file_content, filename, chunking_strategy="semantic"
+                source, filename, chunking_strategy="semantic"
             )
 
             if not chunks:
                 raise Exception("No chunks produced from document")
+            publish_progress(
+                user_id, document_id, "extracted", filename=filename, status="processing",
+                chunks_total=len(chunks)
+            )
 
-            # Prepare chunk insert data
+            # Prepare chunk rows
             chunk_ids = []
             chunk_texts = []
             total_tokens = 0
@@ -273,6 +293,7 @@ class AdvancedRAGSystem:
                 chunk_texts.append(chunk['content'])
                 total_tokens += chunk.get('tokens_count', 0)
                 chunk_data.append((
+                    organization_id,
                     chunk_id,
                     document_id,
                     chunk['content'],
@@ -283,71 +304,76 @@ class AdvancedRAGSystem:
                     json.dumps(chunk.get('metadata', {}))
                 ))
 
-            # Batch insert chunks
-            try:
-                execute_values(
-                    cursor,
-                    """
-                    INSERT INTO rag_document_chunks
-                    (chunk_id, document_id, content, chunk_index, start_char, end_char, tokens_count, metadata)
-                    VALUES %s
-                    """,
-                    chunk_data
-                )
-                self.db.commit()
-                logger.info(f"Inserted {len(chunk_data)} chunks for document {document_id}")
-            except Exception as e:
-                self.db.rollback()
-                logger.error(f"Failed to insert chunks for {document_id}: {e}")
-                raise
+            if tenant:
+                tenant_usage.check(tenant, tokens=total_tokens)
 
-            # Generate embeddings
+            # Generate embeddings, one fairly scheduled batch at a time
             try:
-                embeddings = self.embedding_model.embed_batch(chunk_texts)
+                batch_size = max(settings.EMBEDDING_BATCH_SIZE, 1)
+                batches = []
+                sentence_index = []
+                for start in range(0, len(chunk_texts), batch_size):
+                    batch = chunk_texts[start:start + batch_size]
+                    async with embedding_scheduler.slot(tenant or f"user:{user_id}", len(batch)):
+                        batches.append(await run_in_threadpool(self.embedding_model.embed_batch, batch))
+                        if settings.RAG_SENTENCE_EMBEDDINGS:
+                            sentence_index.extend(
+                                await run_in_threadpool(index_sentences, batch, self.embedding_model.embed_batch)
+                            )
+                    publish_progress(
+                        user_id, document_id, "embedding", filename=filename, status="processing",
+                        chunks_total=len(chunks), chunks_embedded=start + len(batch)
+                    )
+                embeddings = np.vstack(batches).astype('float32', copy=False)
             except Exception as e:
                 logger.error(f"Embedding generation failed for {document_id}: {e}")
                 raise
 
-            # Store embeddings as bytes
-            try:
-                embedding_data = [
-                    (
-                        str(uuid.uuid4()),
-                        chunk_id,
-                        document_id,
-                        user_id,
-                        embeddings[idx].astype('float32').tobytes(),
-                        self.embedding_model.model_name
-                    )
-                    for idx, chunk_id in enumerate(chunk_ids)
-                ]
-
-                execute_values(
-                    cursor,
-                    """
-                    INSERT INTO rag_embeddings
-                    (embedding_id, chunk_id, document_id, user_id, embedding, embedding_model)
-                    VALUES %s
-                    """,
-                    embedding_data
+            # Stream chunks (with their sentence index) and embeddings with COPY
+            # and mark the document completed in the same transaction
+            chunk_rows = (
+                row + (sentence_index[idx] if sentence_index else (None, None))
+                for idx, row in enumerate(chunk_data)
+            )
+            embedding_rows = (
+                (
+                    organization_id,
+                    str(uuid.uuid4()),
+                    chunk_id,
+                    document_id,
+                    user_id,
+                    embeddings[idx].tobytes(),
+                    self.embedding_model.model_name
                 )
+                for idx, chunk_id in enumerate(chunk_ids)
+            )
+            try:
+                stored_chunks, stored_embeddings = write_chunks_and_embeddings(cursor, chunk_rows, embedding_rows)
+                cursor.execute("""
+                    UPDATE rag_documents SET
+                        total_chunks = %s,
+                        total_tokens = %s,
+                        file_type = %s,
+                        processing_status = %s,
+                        centroid = %s
+                    WHERE document_id = %s
+                """, (
+                    stored_chunks, total_tokens, file_type, 'completed',
+                    psycopg2.Binary(document_centroid(embeddings).tobytes()), document_id
+                ))
                 self.db.commit()
-                logger.info(f"Stored {len(embedding_data)} embeddings for document {document_id}")
+                logger.info(f"Stored {stored_chunks} chunks and {stored_embeddings} embeddings for document {document_id}")
             except Exception as e:
                 self.db.rollback()
-                logger.error(f"Failed to store embeddings for {document_id}: {e}")
+                logger.error(f"Failed to store chunks/embeddings for {document_id}: {e}")
                 raise
-
-            # Update document record
-            cursor.execute("""
-                UPDATE rag_documents SET
-                    total_chunks = %s,
-                    total_tokens = %s,
-                    file_type = %s,
-                    processing_status = %s
-                WHERE document_id = %s
-            """, (len(chunk_data), total_tokens, file_type, 'completed', document_id))
-            self.db.commit()
+            if tenant:
+                tenant_usage.record(tenant, user_id, tokens=total_tokens)
+            publish_progress(
+                user_id, document_id, "completed", filename=filename, status="completed",
+                chunks_total=len(chunks), chunks_embedded=len(embeddings), chunks_stored=stored_chunks,
+                total_tokens=total_tokens, file_type=file_type
+            )
             logger.info(f"Document {document_id} processing completed")
 
         except Exception as e:
@@ -357,6 +383,7 @@ class AdvancedRAGSystem:
                 self.db.commit()
             except:
                 self.db.rollback()
+            publish_progress(user_id, document_id, "failed", filename=filename, status="failed", error=str(e))
         finally:
             try:
                 cursor.close()
@@ -366,36 +393,41 @@ class AdvancedRAGSystem:
     async def process_and_index_document(
         self,
         file: UploadFile,
-        user_id: str
+        user_id: str,
+        organization_id: int = 0
     ) -> dict:
         """Process document, chunk it, generate embeddings, and store in vector DB"""
         document_id = str(uuid.uuid4())
         doc_name = file.filename
         
+        # Stream the upload to disk; extractors read from the spooled path
+        try:
+            spooled = await spool_upload(file)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+        
         try:
             cursor = self.db.cursor()
             
-            # Read file content
-            file_content = await file.read()
-            file_size = len(file_content)
-            
             # Ensure user_id is string (RAG tables use VARCHAR)
             user_id_str = str(user_id) if not isinstance(user_id, str) else user_id
             
             # Record initial document metadata
             cursor.execute("""
                 INSERT INTO rag_documents 
-                (document_id, user_id, filename, file_size, processing_status, embedding_model)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                (document_id, user_id, organization_id, filename, file_size, content_sha256,
+                 processing_status, embedding_model)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """, [
-                document_id, user_id_str, doc_name, file_size,
+                document_id, user_id_str, organization_id, doc_name, spooled.size, spooled.sha256,
                 'processing', self.embedding_model.model_name
             ])
             self.db.commit()
+            invalidate_counts("rag_documents")
             
             # Process file and chunk it
             chunks, file_type = await document_processor.process_file_for_rag(
-                file_content, doc_name, chunking_strategy="semantic"
+                spooled.path, doc_name, chunking_strategy="semantic"
             )
             
             # Extract chunk texts and metadata
@@ -412,6 +444,7 @@ class AdvancedRAGSystem:
                 total_tokens += chunk['tokens_count']
                 
                 chunk_data.append((
+                    organization_id,
                     chunk_id,
                     document_id,
                     chunk['content'],
@@ -419,67 +452,54 @@ class AdvancedRAGSystem:
                     chunk['start_char'],
                     chunk['end_char'],
                     chunk['tokens_count'],
-                    str(chunk['metadata'])
+                    json.dumps(chunk['metadata'])
                 ))
             
-            # Batch insert chunks
-            execute_values(
-                cursor,
-                """
-                INSERT INTO rag_document_chunks
-                (chunk_id, document_id, content, chunk_index, start_char, end_char, tokens_count, metadata)
-                VALUES %s
-                """,
-                chunk_data
-            )
-            self.db.commit()
-            
-            logger.info(f"Stored {len(chunks)} chunks for document {document_id}")
-            
             # Generate embeddings for all chunks
             try:
-                embeddings = self.embedding_model.embed_batch(chunk_texts)
-                
-                # Store embeddings
-                embedding_data = [
-                    (
-                        str(uuid.uuid4()),  # embedding_id
-                        chunk_id,
-                        document_id,
-                        user_id,
-                        # Convert numpy array to bytes for storage
-                        embeddings[idx].astype('float32').tobytes(),
-                        self.embedding_model.model_name
-                    )
-                    for idx, chunk_id in enumerate(chunk_ids)
-                ]
-                
-                execute_values(
-                    cursor,
-                    """
-                    INSERT INTO rag_embeddings
-                    (embedding_id, chunk_id, document_id, user_id, embedding, embedding_model)
-                    VALUES %s
-                    """,
-                    embedding_data
-                )
-                self.db.commit()
-                logger.info(f"Generated and stored {len(embeddings)} embeddings")
-                
+                embeddings = self.embedding_model.embed_batch(chunk_texts).astype('float32', copy=False)
+                if settings.RAG_SENTENCE_EMBEDDINGS:
+                    sentence_index = index_sentences(chunk_texts, self.embedding_model.embed_batch)
+                else:
+                    sentence_index = [(None, None)] * len(chunk_texts)
             except Exception as e:
                 logger.error(f"Embedding generation error: {e}")
                 raise
             
-            # Update document status
-            cursor.execute("""
-                UPDATE rag_documents SET
-                    total_chunks = %s,
-                    total_tokens = %s,
-                    file_type = %s,
-                    processing_status = %s
-                WHERE document_id = %s
-            """, [len(chunks), total_tokens, file_type, 'completed', document_id])
-            self.db.commit()
+            # Stream chunks and embeddings with COPY; one transaction with the status update
+            embedding_rows = (
+                (
+                    organization_id,
+                    str(uuid.uuid4()),  # embedding_id
+                    chunk_id,
+                    document_id,
+                    user_id,
+                    embeddings[idx].tobytes(),
+                    self.embedding_model.model_name
+                )
+                for idx, chunk_id in enumerate(chunk_ids)
+            )
+            try:
+                write_chunks_and_embeddings(
+                    cursor, (row + sentence_index[idx] for idx, row in enumerate(chunk_data)), embedding_rows
+                )
+                cursor.execute("""
+                    UPDATE rag_documents SET
+                        total_chunks = %s,
+                        total_tokens = %s,
+                        file_type = %s,
+                        processing_status = %s,
+                        centroid = %s
+                    WHERE document_id = %s
+                """, [
+                    len(chunks), total_tokens, file_type, 'completed',
+                    psycopg2.Binary(document_centroid(embeddings).tobytes()), document_id
+                ])
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            logger.info(f"Stored {len(chunks)} chunks and embeddings for document {document_id}")
             
             cursor.close()
             
@@ -513,6 +533,8 @@ class AdvancedRAGSystem:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to process document: {str(e)}"
             )
+        finally:
+            spooled.cleanup()
     
     async def rag_chat(
         self,
@@ -522,7 +544,8 @@ class AdvancedRAGSystem:
         document_ids: Optional[List[str]] = None,
         top_k: int = 5,
         similarity_threshold: float = 0.3,
-        organization_name: Optional[str] = None
+        organization_name: Optional[str] = None,
+        organization_id: Optional[int] = None
     ) -> dict:
         """RAG-based chat with semantic search and context injection
         
@@ -533,6 +556,9 @@ class AdvancedRAGSystem:
             document_ids: Optional list of document IDs to search in
             top_k: Number of chunks to retrieve
             similarity_threshold: Minimum similarity score
+            organization_id: Owner's organization (0 for none); limits retrieval
+                to that tenant's partitions, where a user's rows are kept even
+                after they change organization (migration 011)
         """
         
         start_time = time.time()
@@ -556,12 +582,14 @@ class AdvancedRAGSystem:
             # For document search context, use RAG with document retrieval
             if context == "documents" and document_ids:
                 # Hybrid search for relevant chunks
-                retrieved_chunks = self.retriever.hybrid_search(
-                    query=question,
-                    document_ids=document_ids,
-                    user_id=user_id,
-                    top_k=top_k
-                )
+                with span("retrieval"):
+                    retrieved_chunks = self.retriever.hybrid_search(
+                        query=question,
+                        document_ids=document_ids,
+                        user_id=user_id,
+                        top_k=top_k,
+                        organization_id=organization_id
+                    )
 
                 # Filter by threshold with better quality control
                 # Use a more strict threshold for better relevance
@@ -575,6 +603,7 @@ class AdvancedRAGSystem:
                 
                 # If still no results, it means the question doesn't match the documents well
                 if not filtered_chunks:
+                    mark_answer_path("no_context")
                     return {
                         "answer": "I couldn't find relevant information in the uploaded documents to answer your question. Please ensure your question relates to the document content, or try rephrasing it. I'm available to help with other questions.",
                         "sources": [],
@@ -593,44 +622,52 @@ class AdvancedRAGSystem:
                 
                 # Score and rank chunks by question relevance
                 scored_chunks = []
-                for chunk in filtered_chunks:
-                    content = chunk.get('content', '').lower()
-                    similarity_score = chunk.get('score', 0)
-                    
-                    # Count question word matches in content
-                    word_matches = sum(1 for word in question_words if word in content)
-                    # Boost score if question words appear in content
-                    relevance_boost = word_matches * 0.1
-                    final_score = similarity_score + relevance_boost
+                with span("rerank"):
+                    for chunk in filtered_chunks:
+                        content = chunk.get('content', '').lower()
+                        similarity_score = chunk.get('score', 0)
+                        
+                        # Count question word matches in content
+                        word_matches = sum(1 for word in question_words if word in content)
+                        # Boost score if question words appear in content
+                        relevance_boost = word_matches * 0.1
+                        final_score = similarity_score + relevance_boost
+                        
+                        scored_chunks.append({
+                            'chunk_id': chunk.get('chunk_id'),
+                            'document_id': chunk.get('document_id'),
+                            'content': chunk.get('content', ''),
+                            'score': final_score,
+                            'original_score': similarity_score,
+                            'word_matches': word_matches,
+                            'sentence_spans': chunk.get('sentence_spans'),
+                            'sentence_embeddings': chunk.get('sentence_embeddings')
+                        })
                     
-                    scored_chunks.append({
-                        'content': chunk.get('content', ''),
-                        'score': final_score,
-                        'original_score': similarity_score,
-                        'word_matches': word_matches
-                    })
+                    # Sort by final relevance score
+                    scored_chunks.sort(key=lambda x: x['score'], reverse=True)
                 
-                # Sort by final relevance score
-                scored_chunks.sort(key=lambda x: x['score'], reverse=True)
-                
-                # Take top chunks, but ensure diversity - don't take all from same section
-                # Limit to top 5-7 chunks to avoid too much context
-                top_chunks = scored_chunks[:min(7, len(scored_chunks))]
-                
-                # Prepare context from top-ranked chunks
-                context_text = "\n\n".join([
-                    chunk['content']
-                    for chunk in top_chunks
-                ])
+                # Pack the ranked chunks into the prompt's token budget, dropping
+                # text repeated by chunk overlap
+                with span("context_packing"):
+                    packed = pack_context(
+                        question,
+                        scored_chunks,
+                        settings.RAG_CONTEXT_TOKEN_BUDGET,
+                        settings.RAG_CONTEXT_MIN_OVERLAP_CHARS
+                    )
+                context_text = packed['text']
 
-                # Fetch filenames for provenance information
-                doc_id_map = {}
+                # Filenames for provenance; semantic hits already carry theirs,
+                # only keyword-only hits need a lookup
+                doc_id_map = {r['document_id']: r['filename'] for r in filtered_chunks if r.get('filename')}
                 try:
-                    doc_ids = list({r.get('document_id') for r in filtered_chunks if r.get('document_id')})
+                    doc_ids = list({r.get('document_id') for r in filtered_chunks if r.get('document_id')} - set(doc_id_map))
                     if doc_ids:
                         c = self.db.cursor(cursor_factory=RealDictCursor)
-                        c.execute("SELECT document_id, filename FROM rag_documents WHERE document_id = ANY(%s)", [doc_ids])
-                        rows = c.fetchall()
+                        with span("provenance_lookup"):
+                            c.execute("SELECT document_id, filename FROM rag_documents WHERE document_id = ANY(%s)", [doc_ids])
+                            rows = c.fetchall()
                         for row in rows:
                             doc_id_map[row['document_id']] = row.get('filename')
                         c.close()
@@ -639,6 +676,7 @@ class AdvancedRAGSystem:
                 
                 # Check if context actually contains relevant information
                 if not context_text or len(context_text.strip()) < 20:
+                    mark_answer_path("no_context")
                     return {
                         "answer": "I couldn't find relevant information in the uploaded documents to answer your question. Please ensure your question relates to the document content, or try rephrasing it. I'm available to help with other questions.",
                         "sources": [],
@@ -650,13 +688,18 @@ class AdvancedRAGSystem:
                     }
                 
                 # Generate response with RAG context
-                answer = self._generate_answer_with_context(question, context_text, context_mode=context)
+                # Blocking LLM call and embedding: keep them off the event loop
+                answer = await run_in_threadpool(
+                    self._generate_answer_with_context,
+                    question, context_text, context_mode=context, chunks=scored_chunks
+                )
                 
                 # Check if answer is meaningful (not empty or just error message)
                 if not answer or len(answer.strip()) < 20:
+                    mark_answer_path("no_context")
                     return {
                         "answer": "The information needed to answer your question is not available in the uploaded documents. Please try asking a different question related to the document content, or ensure the relevant documents are uploaded.",
-                        "sources": sources,
+                        "sources": [],
                         "language": "en-US",
                         "confidence": 0.0,
                         "processing_time_ms": (time.time() - start_time) * 1000,
@@ -707,25 +750,31 @@ class AdvancedRAGSystem:
                 # For general context, try to search organization documents
                 # First check if context is documents but no document_ids provided
                 if context == "documents" and not document_ids:
-                    # Search all user documents - handle both string and integer user_id
-                    cursor = self.db.cursor(cursor_factory=RealDictCursor)
-                    # Convert user_id to string for comparison (RAG tables use VARCHAR)
-                    user_id_str = str(user_id) if not isinstance(user_id, str) else user_id
-                    cursor.execute("SELECT document_id FROM rag_documents WHERE user_id = %s AND processing_status = 'completed'", [user_id_str])
-                    all_doc_ids = [row['document_id'] for row in cursor.fetchall()]
-                    cursor.close()
+                    # Search all user documents: rank documents by centroid first
+                    # and only search chunks of the best matching ones
+                    with span("document_prefilter"):
+                        all_doc_ids = self.vector_store.select_documents(
+                            question, user_id, organization_id=organization_id
+                        )
                     
                     if all_doc_ids:
                         document_ids = all_doc_ids
                         # Recursively call with document IDs
-                        return await self.rag_chat(question, user_id, context, document_ids, top_k, similarity_threshold, organization_name)
+                        return await self.rag_chat(
+                            question, user_id, context, document_ids, top_k, similarity_threshold,
+                            organization_name, organization_id
+                        )
                 
                 # For general context, search organization documents
                 if context == "general":
-                    org_context = await self._search_organization_documents(question, context, top_k)
+                    with span("org_document_search"):
+                        org_context = await self._search_organization_documents(question, context, top_k)
                     if org_context:
                         # Generate response with organization document context
-                        answer = self._generate_answer_with_context(question, org_context['context_text'], context_mode=context)
+                        answer = await run_in_threadpool(
+                            self._generate_answer_with_context,
+                            question, org_context['context_text'], context_mode=context
+                        )
                         # Format answer with organization signature
                         answer = self._format_answer_with_signature(answer, organization_name)
                         processing_time = (time.time() - start_time) * 1000
@@ -786,71 +835,28 @@ class AdvancedRAGSystem:
             logger.error(f"RAG chat error: {e}")
             raise
     
-    @staticmethod
-    def _generate_answer_with_context(question: str, context: str, context_mode: str = "documents") -> str:
+    def _generate_answer_with_context(
+        self, question: str, context: str, context_mode: str = "documents",
+        chunks: Optional[List[dict]] = None
+    ) -> str:
         """Generate answer using LLM or rule-based system with injected context
         
         Args:
             question: User's question
             context: Retrieved document context
             context_mode: Context type - 'documents' or 'general'
+            chunks: Ranked retrieved chunks the context was packed from, used
+                (with their stored sentence embeddings) by the extractive fallback
         """
         if not context:
+            mark_answer_path("no_context")
             return f"I couldn't find relevant information in the uploaded documents to answer your question. Please ensure documents are uploaded and try rephrasing your question. I'm available to help with other questions."
         
-        # Prefer sentence-level extraction and concise responses as a fallback (2-3 sentences max).
-        local_answer = AdvancedRAGSystem._extract_answer_from_context(question, context, max_sentences=3)
-
         # If an external LLM provider is configured, call it with the context + question
+        fallback_path = "extractive"
         provider = getattr(settings, 'LLM_PROVIDER', '').strip().lower()
         if provider:
-            # Context-aware system prompts (employee-focused, professional and polite)
-            system_prompts = {
-                "documents": (
-                    "You are an expert document analysis assistant with a warm, professional, and human-like communication style. "
-                    "Your role is to provide accurate, contextually relevant answers based ONLY on the provided document context. "
-                    "CRITICAL RULES - FOLLOW STRICTLY:\n"
-                    "1. Focus specifically on answering the EXACT question asked - each question requires a unique, tailored response\n"
-                    "2. Do NOT repeat or rephrase the user's question in your answer\n"
-                    "3. Do NOT ask any questions in your response - provide only statements and answers\n"
-                    "4. Do NOT include sentences ending with question marks (?)\n"
-                    "5. Do NOT mention sources, filenames, or document names\n"
-                    "6. Provide a direct, professional answer that directly addresses what was asked\n"
-                    "7. If asked about 'topics', list the main topics. If asked about 'skills', list the skills. "
-                    "   If asked about 'education', provide education details. Each question type requires a different response.\n"
-                    "8. Write with a natural, human touch - be conversational yet professional\n"
-                    "9. Keep responses concise but complete (2-4 sentences for detailed answers, 1-2 for simple facts)\n"
-                    "10. Do not include phrases like 'according to the document' or 'the document states'\n"
-                    "11. Answer as if you are providing the information directly, not referencing documents\n"
-                    "12. NEVER end your response with questions like 'Would you like to know more?' or 'Do you have any other questions?'\n"
-                    "13. Vary your responses - different questions should produce different answers, even if from the same document\n"
-                    "14. Extract and present information that specifically matches the question's intent\n"
-                    "15. FORMATTING: Use markdown formatting to make responses professional and visually appealing:\n"
-                    "    - Use **bold** for key terms, important concepts, or section headers\n"
-                    "    - Use *italic* for emphasis on specific details\n"
-                    "    - Use bullet points (- or *) for lists of items (skills, topics, features, etc.)\n"
-                    "    - Use numbered lists (1., 2., 3.) for sequential information\n"
-                    "    - Structure longer answers with clear sections using bold headers\n"
-                    "    - Example: '**Skills include:**\\n- Python\\n- Machine Learning\\n- *Advanced* AI techniques'\n"
-                    "Example 1: If asked 'What are the main topics?', answer: '**Main Topics:**\\n- Topic 1\\n- Topic 2\\n- Topic 3'\n"
-                    "Example 2: If asked 'What are the skills?', answer: '**Skills include:**\\n- Skill 1\\n- Skill 2\\n- *Advanced* Skill 3'\n"
-                    "Each answer must be unique, tailored to the specific question asked, and professionally formatted."
-                ),
-                "general": (
-                    "You are a professional, courteous, and helpful assistant for employees and new interns. Provide friendly, informative, and polite responses about the organization, "
-                    "policies, procedures, employee benefits, onboarding, and general workplace questions. "
-                    "CRITICAL RULES:\n"
-                    "1. Do NOT ask questions in your response - provide only statements and information\n"
-                    "2. Do NOT include sentences ending with question marks (?)\n"
-                    "3. Always greet users warmly, respond professionally, and end with a polite closing statement (not a question)\n"
-                    "4. Be supportive, conversational, and maintain a professional tone using declarative statements only\n"
-                    "5. Keep responses concise (2-3 sentences maximum)\n"
-                    "6. Focus on helping employees, especially new ones, understand how things work in the organization\n"
-                    "7. Offer further assistance using statements like 'I'm available to help with additional questions' NOT 'Do you have any other questions?'"
-                ),
-            }
-            
-            system_prompt = system_prompts.get(context_mode, system_prompts["documents"])
+            system_prompt = ANSWER_SYSTEM_MESSAGES.get(context_mode, ANSWER_SYSTEM_MESSAGES["documents"])
             
             # Analyze question type to provide better context
             question_lower = question.lower()
@@ -867,32 +873,23 @@ class AdvancedRAGSystem:
                 question_type = "description"
             
             prompt = (
-                f"{system_prompt}\n\n"
                 f"Document Context:\n{context}\n\n"
                 f"User Question: {question}\n"
                 f"Question Type: {question_type}\n\n"
-                f"CRITICAL INSTRUCTIONS:\n"
-                f"- Focus ONLY on information that directly answers this specific question\n"
-                f"- If the question asks about '{question_type}', extract and present ONLY that type of information\n"
-                f"- Provide a unique, tailored response that directly addresses what was asked\n"
-                f"- Do NOT repeat the question. Do NOT ask any questions in your response.\n"
-                f"- Do NOT include sentences ending with question marks.\n"
-                f"- Do NOT mention that information comes from documents.\n"
-                f"- Write naturally with a human touch - be conversational yet professional.\n"
-                f"- If the context doesn't contain relevant information, politely state that the information is not available.\n\n"
                 f"Answer (tailored to the question, statements only, no questions):"
             )
             
             try:
                 # Increase max_tokens for more detailed, question-specific responses
-                llm_response = call_llm(prompt, max_tokens=400)
+                llm_response = call_llm(prompt, max_tokens=400, system=system_prompt)
                 if llm_response:
                     # Prefer LLM response
                     text = llm_response.strip()
-                    # Clean answer to remove question repetition
-                    text = AdvancedRAGSystem._clean_answer(text, question)
-                    # Enhance with markdown formatting if needed
-                    text = AdvancedRAGSystem._enhance_with_markdown(text)
+                    with span("postprocess"):
+                        # Clean answer to remove question repetition
+                        text = AdvancedRAGSystem._clean_answer(text, question)
+                        # Enhance with markdown formatting if needed
+                        text = AdvancedRAGSystem._enhance_with_markdown(text)
                     # Allow more length for detailed answers (up to 800 chars for formatted responses)
                     if len(text) > 800:
                         truncated = text[:800]
@@ -911,11 +908,20 @@ class AdvancedRAGSystem:
                                 else:
                                     text = truncated.rstrip() + '...'
                     return text
+            except TimeoutError as e:
+                logger.warning(f"{e}. Returning the local extractive answer.")
+                fallback_path = "extractive_deadline"
             except Exception as e:
                 logger.error(f"LLM call failed: {e}. Falling back to local extractor.")
 
-        # Fall back to local rule-based extraction
-        answer = local_answer
+        # Fall back to sentence-level extraction (2-3 sentences max). Past the
+        # deadline only stored sentence embeddings are used, nothing is embedded.
+        mark_answer_path(fallback_path)
+        with span("local_extract"):
+            answer = self._extract_answer_from_context(
+                question, context, max_sentences=3, chunks=chunks,
+                stored_only=fallback_path == "extractive_deadline"
+            )
         # Already limited to 400 chars in _extract_answer_from_context
         if not answer:
             return f"I couldn't find relevant information in the documents to answer your question. Please rephrase your question or ensure the relevant documents are uploaded. I'm available to help with other questions."
@@ -932,42 +938,19 @@ class AdvancedRAGSystem:
         provider = getattr(settings, 'LLM_PROVIDER', '').strip().lower()
         
         if provider:
-            system_prompts = {
-                "general": (
-                    "You are a professional, courteous, and friendly assistant for employees and new interns. "
-                    "Answer questions about the organization, policies, procedures, employee benefits, onboarding, "
-                    "workplace culture, and general employee information. Always greet users warmly and respond professionally. "
-                    "CRITICAL RULES:\n"
-                    "1. Do NOT ask questions in your response - provide only statements and information\n"
-                    "2. Do NOT include sentences ending with question marks (?)\n"
-                    "3. Be supportive, conversational, and maintain a polite, professional tone using declarative statements only\n"
-                    "4. Keep responses concise (2-3 sentences maximum)\n"
-                    "5. Focus on helping employees, especially new ones\n"
-                    "6. Always end responses with a polite closing statement (not a question) like 'I'm available to help with additional questions'"
-                ),
-                "documents": (
-                    "You are a professional document analysis assistant. "
-                    "However, no documents were provided for this query. "
-                    "Politely inform the user that they need to upload documents first to get document-based answers, "
-                    "and offer to help them with the upload process or answer general questions."
-                )
-            }
-            
-            system_prompt = system_prompts.get(context_mode, system_prompts["general"])
-            
+            system_prompt = NO_CONTEXT_SYSTEM_MESSAGES.get(context_mode, NO_CONTEXT_SYSTEM_MESSAGES["general"])
             prompt = (
-                f"{system_prompt}\n\n"
                 f"User Question: {question}\n\n"
-                f"CRITICAL: Provide a helpful response using only declarative statements. Do NOT ask any questions. Do NOT include sentences ending with question marks.\n\n"
                 f"Response:"
             )
             
             try:
-                llm_response = call_llm(prompt, max_tokens=200)  # Reduced for concise responses
+                llm_response = call_llm(prompt, max_tokens=200, system=system_prompt)  # Reduced for concise responses
                 if llm_response:
                     text = llm_response.strip()
                     # Clean answer to remove questions and question repetition
-                    text = AdvancedRAGSystem._clean_answer(text, question)
+                    with span("postprocess"):
+                        text = AdvancedRAGSystem._clean_answer(text, question)
                     # Limit to 400 characters for 2-3 sentences
                     if len(text) > 400:
                         truncated = text[:400]
@@ -977,6 +960,9 @@ class AdvancedRAGSystem:
                         else:
                             text = truncated.rstrip() + '...'
                     return text
+            except TimeoutError as e:
+                logger.warning(f"{e}. Returning a rule-based response.")
+                mark_answer_path("rule_based_deadline")
             except Exception as e:
                 logger.error(f"LLM call failed: {e}. Falling back to rule-based response.")
         
@@ -1117,10 +1103,12 @@ class AdvancedRAGSystem:
                 return None
             
             # Combine chunks into context text (without source mentions)
-            context_text = '\n\n'.join([
-                chunk['content']
-                for chunk in top_chunks
-            ])
+            context_text = pack_context(
+                question,
+                [{'content': chunk['content'], 'document_id': chunk['source']} for chunk in top_chunks],
+                settings.RAG_CONTEXT_TOKEN_BUDGET,
+                settings.RAG_CONTEXT_MIN_OVERLAP_CHARS
+            )['text']
             
             return {
                 'context_text': context_text,
@@ -1188,90 +1176,50 @@ class AdvancedRAGSystem:
         
         return answer
 
-    @staticmethod
-    def _extract_answer_from_context(question: str, context: str, max_sentences: int = 3) -> str:
-        """Extract relevant answer from context with improved relevance scoring.
+    def _extract_answer_from_context(
+        self, question: str, context: str, max_sentences: int = 3, chunks: Optional[List[dict]] = None,
+        stored_only: bool = False
+    ) -> str:
+        """Extract relevant answer from context by sentence embedding similarity.
         
         Returns concise, professional answers (2-3 sentences max) without repeating the question.
+        Sentences are scored against the question embedding in one matrix product and
+        picked with MMR so overlapping chunks don't yield the same sentence twice.
 
         Args:
             question: User's question
             context: Retrieved document context
             max_sentences: Maximum number of sentences (default 3 for conciseness)
+            chunks: Retrieved chunks; their stored sentence embeddings are used when
+                present, otherwise the sentences of `context` are embedded here
+            stored_only: Score only sentences with stored embeddings and answer with
+                the leading sentences if there are none (no embedding on the way)
         """
-        def split_into_sentences(text: str):
-            # Improved sentence splitter that handles abbreviations
-            # Split on sentence endings but preserve them
-            sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
-            return [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
-
         if not context or not context.strip():
             return ""
 
-        sentences = split_into_sentences(context)
+        try:
+            with span("extractive_scoring"):
+                sentences, matrix = gather_sentences(
+                    chunks or [{'content': context}],
+                    None if stored_only else self.embedding_model.embed_batch,
+                    self.embedding_model.get_embedding_dim()
+                )
+                selected = extract_sentences(
+                    self.embedding_model.embed_query(question), sentences, matrix,
+                    max_sentences=max_sentences,
+                    diversity_weight=settings.RAG_EXTRACTIVE_MMR_LAMBDA,
+                    min_similarity=settings.RAG_EXTRACTIVE_MIN_SIMILARITY
+                ) if sentences else []
+        except Exception as e:
+            logger.warning(f"Sentence scoring failed, answering with the leading sentences: {e}")
+            sentences, selected = [], []
         if not sentences:
-            return ""
-
-        # Build keyword set from question (tokens longer than 2 chars for better matching)
-        q_words = re.findall(r"\w+", question.lower())
-        q_tokens = [w for w in q_words if len(w) > 2 and w not in ['the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use', 'what', 'when', 'where', 'which']]
-        q_set = set(q_tokens)
-        
-        # Identify question intent keywords (what the question is asking about)
-        question_intent_keywords = []
-        question_lower = question.lower()
-        if any(word in question_lower for word in ["topic", "topics", "subject", "subjects"]):
-            question_intent_keywords.extend(["topic", "subject", "theme", "about", "covers", "discusses"])
-        if any(word in question_lower for word in ["skill", "skills", "ability", "abilities"]):
-            question_intent_keywords.extend(["skill", "ability", "competence", "proficient", "expertise", "capable"])
-        if any(word in question_lower for word in ["education", "degree", "qualification"]):
-            question_intent_keywords.extend(["education", "degree", "qualification", "study", "university", "college", "semester"])
-        if any(word in question_lower for word in ["who", "person", "name"]):
-            question_intent_keywords.extend(["name", "person", "individual", "who"])
-        question_intent_keywords = set(question_intent_keywords)
-
-        # Score sentences by overlap with question tokens and intent keywords
-        scored = []
-        for s in sentences:
-            s_lower = s.lower()
-            # Count keyword matches
-            overlap = sum(1 for t in q_set if t in s_lower)
-            # Count intent keyword matches (higher weight)
-            intent_matches = sum(1 for t in question_intent_keywords if t in s_lower)
-            
-            # Bonus for multiple matches
-            if overlap > 0 or intent_matches > 0:
-                score = overlap * 2 + intent_matches * 3  # Intent keywords weighted higher
-                # Bonus for question words appearing at the start
-                if any(s_lower.startswith(t) for t in q_set):
-                    score += 1
-                # Bonus for intent keywords in sentence
-                if intent_matches > 0:
-                    score += 2
-                # Penalize very long sentences
-                if len(s) > 150:
-                    score = score * 0.8
-                scored.append((score, s, overlap, intent_matches))
-            else:
-                scored.append((0, s, 0, 0))
-
-        # Sort descending by score
-        scored.sort(key=lambda x: x[0], reverse=True)
-
-        # Pick top sentences with positive score, prioritizing intent matches
-        # First try to get sentences with intent keyword matches
-        selected = [s for sc, s, ov, im in scored if im > 0][:max_sentences]
-        if not selected or len(selected) < max_sentences:
-            # Add sentences with high keyword overlap
-            remaining = max_sentences - len(selected)
-            additional = [s for sc, s, ov, im in scored if sc > 0 and s not in selected][:remaining]
-            selected.extend(additional)
-        
+            sentences = [context[start:end] for start, end in sentence_spans(context)]
+            if not sentences:
+                return ""
         if not selected:
-            # Fallback: choose sentences with at least one keyword match
-            selected = [s for sc, s, ov, im in scored if ov > 0][:max_sentences]
-            if not selected:
-                selected = sentences[:max_sentences]
+            selected = sentences[:max_sentences]
 
         # Join and return concise answer (2-3 sentences max)
         answer = ' '.join(selected).strip()
@@ -1390,110 +1338,90 @@ class AdvancedRAGSystem:
         return answer
 
 
-def call_llm(prompt: str, max_tokens: int = 512) -> str:
+def call_llm(prompt: str, max_tokens: int = 512, system: Optional[str] = None) -> str:
     """Call configured external LLM provider (Grok/Groq API).
 
-    Reads `GROK_API_KEY`, `GROK_ENDPOINT`, and `GROK_MODEL` from `settings` and sends a JSON
-    payload in OpenAI-compatible format. Returns the textual output if present.
-    
+    Uses the pooled `LLMClient` held by the application service container.
+    Inside a budgeted request the call is bounded by the time left and
+    hedged when slow.
+
     Returns:
         str: The LLM response text
-        
+
     Raises:
         RuntimeError: If provider is not configured or invalid
+        TimeoutError: If the request budget runs out first
     """
-    provider = getattr(settings, 'LLM_PROVIDER', '').strip().lower()
-    if not provider:
-        raise RuntimeError("No LLM_PROVIDER configured")
-
-    if provider != 'grok':
-        raise RuntimeError(f"LLM_PROVIDER must be 'grok' when using this deployment. Found: {provider}")
+    client = get_rag_services().llm_client
+    with span("llm"):
+        budget = current_budget()
+        if budget is None:
+            return client.complete(prompt, max_tokens=max_tokens, system=system)
+        if budget.exhausted(settings.RAG_LLM_MIN_BUDGET_MS / 1000.0):
+            raise TimeoutError("Request budget exhausted before the LLM call")
+        text, hedged = client.complete_within(prompt, budget.remaining(), max_tokens=max_tokens, system=system)
+        mark_answer_path("llm_hedged" if hedged else "llm")
+        return text
 
-    api_key = getattr(settings, 'GROK_API_KEY', '')
-    endpoint = getattr(settings, 'GROK_ENDPOINT', '')
-    model = getattr(settings, 'GROK_MODEL', 'grok-beta')
-    
-    if not api_key or not endpoint:
-        raise RuntimeError('Grok provider requires GROK_API_KEY and GROK_ENDPOINT in .env')
 
-    # Log which model is being used
-    logger.info(f"Calling Grok API with model: {model} at endpoint: {endpoint}")
-    
-    headers = {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
-    
-    # Check if endpoint is OpenAI-compatible (Groq API format)
-    is_openai_format = 'openai' in endpoint.lower() or 'chat/completions' in endpoint.lower()
-    
-    if is_openai_format:
-        # OpenAI-compatible format (Groq API)
-        body = {
-            'model': model,
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'max_tokens': max_tokens,
-            'temperature': 0.7
-        }
-    else:
-        # Legacy format (direct prompt)
-        body = {
-            'prompt': prompt,
-            'max_tokens': max_tokens
-        }
-        if model:
-            body['model'] = model
-    
-    try:
-        resp = requests.post(endpoint, json=body, headers=headers, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        
-        if isinstance(data, dict):
-            # OpenAI-compatible response format
-            if 'choices' in data and len(data['choices']) > 0:
-                return data['choices'][0].get('message', {}).get('content', '').strip()
-            # Legacy response formats
-            return data.get('text') or data.get('output') or data.get('response') or json.dumps(data)
-        # If data is not a dict, coerce to string
-        return str(data)
-    except requests.exceptions.HTTPError as e:
-        error_msg = f"HTTP {e.response.status_code} error"
-        if e.response.status_code == 400:
-            try:
-                error_detail = e.response.json()
-                error_msg += f": {error_detail}"
-            except:
-                error_msg += f": {e.response.text}"
-        logger.error(f"LLM API call failed: {error_msg}")
-        raise RuntimeError(f"LLM API call failed: {error_msg}")
-    except Exception as e:
-        logger.error(f"LLM API call error: {str(e)}")
-        raise
-    
-    
+# Initialize RAG system
+def get_rag_system(
+    db: psycopg2.extensions.connection = Depends(get_db),
+    services: RAGServices = Depends(get_rag_services)
+) -> AdvancedRAGSystem:
+    """Get a request-scoped RAG system bound to the shared service container"""
+    return AdvancedRAGSystem(db, services)
 
 
-# Initialize RAG system
-def get_rag_system(db: psycopg2.extensions.connection = Depends(get_db)) -> AdvancedRAGSystem:
-    """Get RAG system instance"""
-    rag = AdvancedRAGSystem(db)
-    rag.ensure_tables_exist()
-    return rag
+def _record_upload(current_user: dict, action: str, results: List[dict], started: float):
+    """Emit one activity per upload request (buffered, off the request path)"""
+    failed = [r for r in results if r.get("status") == "failed"]
+    record_activity(
+        "upload",
+        current_user["id"],
+        action,
+        ", ".join(r["filename"] for r in results if r.get("filename")),
+        response_time_ms=(time.perf_counter() - started) * 1000,
+        success=not failed,
+        error_message="; ".join(f"{r['filename']}: {r.get('error')}" for r in failed) or None,
+        organization_id=current_user.get("organization_id")
+    )
 
 
 @router.post("/chat/upload-documents")
 async def upload_documents(
     files: List[UploadFile] = File(...),
     current_user: dict = Depends(get_current_user),
+    ticket: Ticket = Depends(admission("upload")),
     rag: AdvancedRAGSystem = Depends(get_rag_system)
 ):
-    """Upload and process documents for RAG"""
+    """Upload and process documents for RAG.
+
+    The admission slot stays held until the uploaded files have been
+    processed, so concurrent ingestion is bounded by the upload limit.
+    Documents are processed in the tenant's fair share of the ingestion
+    workers and count against its document quota.
+    """
+    started = time.perf_counter()
+    tenant = tenant_key(current_user)
+    organization_id = current_user.get("organization_id") or 0
+    try:
+        tenant_usage.check(tenant, documents=len(files))
+    except QuotaExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     results = []
+    pending = []
 
     for file in files:
+        spooled = None
         try:
-            # Read file bytes immediately (UploadFile will be closed after request)
-            contents = await file.read()
+            # Stream to a temp file now (UploadFile will be closed after request);
+            # background processing reads from the spooled path
+            spooled = await spool_upload(file)
 
             # Create document record in DB with processing status
             document_id = str(uuid.uuid4())
@@ -1502,29 +1430,120 @@ async def upload_documents(
             cursor = rag.db.cursor()
             cursor.execute("""
                 INSERT INTO rag_documents
-                (document_id, user_id, filename, file_size, processing_status, embedding_model)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, [document_id, user_id_str, file.filename, len(contents), 'processing', rag.embedding_model.model_name])
+                (document_id, user_id, organization_id, filename, file_size, content_sha256,
+                 processing_status, embedding_model)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, [
+                document_id, user_id_str, organization_id, file.filename, spooled.size, spooled.sha256,
+                'processing', rag.embedding_model.model_name
+            ])
             rag.db.commit()
 
-            # Schedule background processing (do not await)
-            async def _bg():
-                try:
-                    await rag._process_bytes(document_id, contents, file.filename, user_id_str)
-                except Exception as e:
-                    logger.error(f"Background task error for {document_id}: {e}")
-
-            asyncio.create_task(_bg())
-
-            results.append({"document_id": document_id, "filename": file.filename, "status": "processing"})
+            pending.append((document_id, spooled, user_id_str))
+            publish_progress(user_id_str, document_id, "queued", filename=file.filename, status="processing")
+            results.append({
+                "document_id": document_id,
+                "filename": file.filename,
+                "status": "processing",
+                "sha256": spooled.sha256
+            })
         except Exception as e:
+            if spooled is not None:
+                spooled.cleanup()
             logger.error(f"Upload failed for {file.filename}: {e}")
             results.append({"filename": file.filename, "status": "failed", "error": str(e)})
 
+    if pending:
+        tenant_usage.record(tenant, current_user["id"], documents=len(pending))
+        invalidate_counts("rag_documents")
+
+        # Schedule background processing (do not await); it gets its own
+        # connection because the request-scoped one closes with the request
+        async def _bg():
+            conn = None
+            try:
+                conn = connect()
+                worker = AdvancedRAGSystem(conn, rag.services)
+                for document_id, spooled, user_id_str in pending:
+                    try:
+                        async with ingestion_scheduler.slot(tenant, spooled.size):
+                            await worker._process_file(
+                                document_id, spooled.path, spooled.filename, user_id_str,
+                                tenant=tenant, organization_id=organization_id
+                            )
+                    except Exception as e:
+                        logger.error(f"Background task error for {document_id}: {e}")
+                    finally:
+                        spooled.cleanup()
+            except Exception as e:
+                logger.error(f"Background processing could not start: {e}")
+                for document_id, spooled, user_id_str in pending:
+                    publish_progress(
+                        user_id_str, document_id, "failed", filename=spooled.filename,
+                        status="failed", error=str(e)
+                    )
+            finally:
+                # Files left behind if processing stopped early
+                for _, spooled, _ in pending:
+                    spooled.cleanup()
+                if conn is not None:
+                    conn.close()
+                ticket.release()
+
+        ticket.detach()
+        asyncio.create_task(_bg())
+
+    _record_upload(current_user, "uploaded", results, started)
     return {"uploaded_documents": results}
 
 
-@router.post("/chat/rag")
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+@router.get("/chat/document-events")
+async def document_events(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream the user's document processing progress as server-sent events.
+
+    Each event is a JSON object with document_id, filename, stage (queued,
+    extracting, extracted, embedding, completed or failed), status and chunk
+    counts. Documents still in flight are replayed on connect; idle streams
+    get a comment line every PROGRESS_HEARTBEAT_SECONDS.
+    """
+    user_id = str(current_user["id"])
+    try:
+        queue = progress_hub.subscribe(user_id)
+    except TooManySubscriptions as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+
+    async def _stream():
+        try:
+            yield "retry: 5000\n\n"
+            for event in progress_hub.in_flight(user_id):
+                yield _sse(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.PROGRESS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            progress_hub.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/chat/rag", response_model=RAGChatResponse, response_class=FastJSONResponse)
 async def rag_chat(
     question: str = Form(...),
     context: str = Form("documents"),
@@ -1532,9 +1551,11 @@ async def rag_chat(
     documents: Optional[str] = Form(None),  # JSON array of document IDs
     top_k: int = Form(5),
     similarity_threshold: float = Form(0.3),
+    include_timings: bool = Form(False),  # Return the per-stage latency breakdown
+    deadline_ms: Optional[int] = Form(None),  # Tighter latency budget than RAG_REQUEST_BUDGET_MS
     current_user: dict = Depends(get_current_user),
-    rag: AdvancedRAGSystem = Depends(get_rag_system),
-    db: psycopg2.extensions.connection = Depends(get_db)
+    ticket: Ticket = Depends(admission("rag")),
+    rag: AdvancedRAGSystem = Depends(get_rag_system)
 ):
     """RAG-based chat endpoint with context-aware responses
     
@@ -1542,7 +1563,17 @@ async def rag_chat(
     - 'documents': Search in uploaded documents using RAG
     - 'general': General organizational questions for employees
     """
-    
+    started = time.perf_counter()
+    tenant = tenant_key(current_user)
+    try:
+        tenant_usage.check(tenant, queries=1)
+    except QuotaExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    tenant_usage.record(tenant, current_user["id"], queries=1)
     try:
         # Validate context
         valid_contexts = ["documents", "general"]
@@ -1586,64 +1617,117 @@ async def rag_chat(
         # Convert user_id to string if it's an integer
         user_id_str = str(current_user['id']) if isinstance(current_user['id'], int) else current_user['id']
         
-        # Get organization name
-        organization_name = None
-        if current_user.get('organization_id'):
-            try:
-                cursor = db.cursor(cursor_factory=RealDictCursor)
-                cursor.execute("SELECT name FROM organizations WHERE id = %s", (current_user['organization_id'],))
-                org_row = cursor.fetchone()
-                if org_row:
-                    organization_name = org_row['name']
-                cursor.close()
-            except Exception as e:
-                logger.debug(f"Error fetching organization name: {e}")
-        
-        result = await rag.rag_chat(
-            question=question,
-            user_id=user_id_str,
-            context=context,
-            document_ids=document_ids,
-            top_k=top_k,
-            similarity_threshold=similarity_threshold,
-            organization_name=organization_name
+        # Organization name is resolved together with the user context
+        organization_name = current_user.get('organization_name')
+        
+        budget_ms = settings.RAG_REQUEST_BUDGET_MS
+        if deadline_ms and deadline_ms > 0:
+            budget_ms = min(deadline_ms, budget_ms)
+        
+        with trace("rag_chat") as request_trace, request_budget(budget_ms) as budget:
+            result = await rag.rag_chat(
+                question=question,
+                user_id=user_id_str,
+                context=context,
+                document_ids=document_ids,
+                top_k=top_k,
+                similarity_threshold=similarity_threshold,
+                organization_name=organization_name,
+                organization_id=current_user.get('organization_id') or 0
+            )
+        result["answer_path"] = budget.answer_path or "rule_based"
+        if include_timings:
+            result["timings"] = request_trace.breakdown()
+        
+        record_activity(
+            "chat",
+            current_user["id"],
+            "rag_query",
+            question[:100],
+            response_time_ms=(time.perf_counter() - started) * 1000,
+            organization_id=current_user.get("organization_id"),
+            query_text=question
         )
-        
-        return RAGChatResponse(**result)
+        return FastJSONResponse(RAGChatResponse(**result))
     
     except Exception as e:
         logger.error(f"RAG chat error: {e}")
+        record_activity(
+            "chat",
+            current_user["id"],
+            "rag_query",
+            question[:100],
+            response_time_ms=(time.perf_counter() - started) * 1000,
+            success=False,
+            error_message=str(e),
+            organization_id=current_user.get("organization_id"),
+            query_text=question
+        )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
 
-@router.get("/chat/user-documents")
+@router.get("/chat/tenant-usage")
+async def get_tenant_usage(current_user: dict = Depends(get_current_user)):
+    """Current quota window usage and scheduler queues for the admin's organization"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can view tenant usage")
+    tenant = tenant_key(current_user)
+    usage = tenant_usage.snapshot(tenant)
+    usage["scheduling"] = {
+        scheduler.name: scheduler.stats()["tenants"].get(tenant, {"queued": 0, "served": 0})
+        for scheduler in (ingestion_scheduler, embedding_scheduler)
+    }
+    return usage
+
+
+@router.get("/chat/user-documents", response_class=FastJSONResponse)
 async def get_user_documents(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
-    """Get user's uploaded documents"""
+    """Get a page of the user's uploaded documents, newest first.
+
+    Pass the returned `next_cursor` back as `cursor` for the next page;
+    `total` is cached briefly and may be a planner estimate for very large
+    libraries (`total_estimated`).
+    """
     
     try:
-        cursor = db.cursor(cursor_factory=RealDictCursor)
+        db_cursor = db.cursor(cursor_factory=RealDictCursor)
         
         # Convert user_id to string (RAG tables use VARCHAR)
         user_id_str = str(current_user['id']) if isinstance(current_user['id'], int) else current_user['id']
-        cursor.execute("""
+        documents, next_cursor = fetch_page(
+            db_cursor,
+            """
             SELECT document_id, filename, file_type, total_chunks, total_tokens,
                    upload_date, processing_status, file_size
             FROM rag_documents
-            WHERE user_id = %s
-            ORDER BY upload_date DESC
-        """, [user_id_str])
-        
-        documents = cursor.fetchall()
-        cursor.close()
-        
-        return {"documents": documents, "count": len(documents)}
+            """,
+            ["user_id = %s"], [user_id_str],
+            [("upload_date", "upload_date"), ("document_id", "document_id")],
+            cursor, page_limit(limit)
+        )
+        count = cached_count(
+            db_cursor, ("rag_documents", user_id_str), "rag_documents WHERE user_id = %s", [user_id_str]
+        )
+        db_cursor.close()
+        
+        return FastJSONResponse({
+            "documents": documents,
+            "count": len(documents),
+            "total": count["total"],
+            "total_estimated": count["estimated"],
+            "next_cursor": next_cursor
+        })
     
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching user documents: {e}")
         raise HTTPException(
@@ -1666,18 +1750,25 @@ async def delete_document(
         # Verify ownership - convert user_id to string
         user_id_str = str(current_user['id']) if isinstance(current_user['id'], int) else current_user['id']
         cursor.execute(
-            "SELECT document_id FROM rag_documents WHERE document_id = %s AND user_id = %s",
+            "SELECT organization_id FROM rag_documents WHERE document_id = %s AND user_id = %s",
             [document_id, user_id_str]
         )
+        row = cursor.fetchone()
         
-        if not cursor.fetchone():
+        if not row:
             cursor.close()
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Delete document (cascades to chunks and embeddings)
+        # Delete embeddings and chunks within the tenant's partitions first, so
+        # the cascade from rag_documents has nothing left to find
+        organization_id = row['organization_id']
+        cursor.execute("DELETE FROM rag_embeddings WHERE organization_id = %s AND document_id = %s", [organization_id, document_id])
+        cursor.execute("DELETE FROM rag_document_chunks WHERE organization_id = %s AND document_id = %s", [organization_id, document_id])
         cursor.execute("DELETE FROM rag_documents WHERE document_id = %s", [document_id])
         db.commit()
         cursor.close()
+        invalidate_document_chunks(document_id)
+        invalidate_counts("rag_documents")
         
         return {"message": "Document deleted successfully"}
     
@@ -1758,16 +1849,22 @@ async def upload_organization_documents(
             detail="Only 'general' context is supported. Upload employee-focused documents here."
         )
     
+    started = time.perf_counter()
+
     # Get the path to organization_documents folder
     backend_path = Path(__file__).parent.parent
     org_docs_path = backend_path / "organization_documents" / context
     
     # Ensure the directory exists
     org_docs_path.mkdir(parents=True, exist_ok=True)
+    # Uploads are spooled next to (not inside) the folder the document search
+    # globs, on the same filesystem so moving them into place is an atomic rename
+    staging_path = backend_path / "organization_documents" / ".staging"
     
     results = []
     
     for file in files:
+        spooled = None
         try:
             # Validate file type
             allowed_extensions = ['.pdf', '.txt', '.docx', '.doc']
@@ -1781,8 +1878,8 @@ async def upload_organization_documents(
                 })
                 continue
             
-            # Read file content
-            file_content = await file.read()
+            # Stream into the staging folder, then move into place
+            spooled = await spool_upload(file, directory=str(staging_path))
             
             # Save file to the appropriate folder
             file_path = org_docs_path / file.filename
@@ -1793,21 +1890,22 @@ async def upload_organization_documents(
                 name_without_ext = file_path.stem
                 file_path = org_docs_path / f"{name_without_ext}_{timestamp}{file_ext}"
             
-            # Write file
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
+            os.replace(spooled.path, file_path)
             
             results.append({
                 "filename": file.filename,
                 "saved_as": file_path.name,
                 "context": context,
                 "status": "success",
-                "file_size": len(file_content)
+                "file_size": spooled.size,
+                "sha256": spooled.sha256
             })
             
             logger.info(f"Admin {current_user['email']} uploaded organization document: {file.filename} to {context} context")
         
         except Exception as e:
+            if spooled is not None:
+                spooled.cleanup()
             logger.error(f"Error uploading organization document {file.filename}: {e}")
             results.append({
                 "filename": file.filename,
@@ -1815,6 +1913,7 @@ async def upload_organization_documents(
                 "error": str(e)
             })
     
+    _record_upload(current_user, "uploaded_organization_documents", results, started)
     return {
         "message": "Organization documents uploaded successfully",
         "uploaded_documents": results
@@ -4,6 +4,7 @@ from psycopg2.extras import RealDictCursor
 from pydantic import BaseModel, EmailStr
 import bcrypt
 from backend.database.db import get_db
+from backend.utils.pagination import invalidate_counts
 
 
 router = APIRouter()
@@ -80,6 +81,7 @@ async def signup(user: UserCreate, db: psycopg2.extensions.connection = Depends(
             print(f"User created successfully with ID: {user_id}")
             
             db.commit()
+            invalidate_counts("users")
             return {"message": "Signup successful", "role": role}
         except Exception as e:
             print(f"Database error: {str(e)}")
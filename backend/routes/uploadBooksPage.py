@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File
 from typing import Optional, List
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -6,6 +6,7 @@ from pydantic import BaseModel
 from backend.database.db import get_db
 
 from backend.auth_utils import get_current_user
+from backend.utils.pagination import InvalidCursor, cached_count, fetch_page, invalidate_counts, page_limit, set_page_headers
 
 router = APIRouter()
 
@@ -47,6 +48,7 @@ async def upload_document(
         
         document_id = cursor.fetchone()["id"]
         db.commit()
+        invalidate_counts("documents")
         
         return {
             "message": "Document uploaded successfully",
@@ -61,32 +63,48 @@ async def upload_document(
 
 @router.get("/documents")
 async def get_documents(
+    response: Response,
     category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
+    """One page of the organization's documents, newest first.
+
+    The next page's cursor is returned in `X-Next-Cursor` and the (cached)
+    total in `X-Total-Count`.
+    """
     try:
-        cursor = db.cursor()
+        db_cursor = db.cursor()
         
+        where = ["d.organization_id = %s"]
+        params = [current_user["organization_id"]]
         if category:
-            cursor.execute("""
-                SELECT d.*, u.name as uploaded_by_name
-                FROM documents d
-                JOIN users u ON d.uploaded_by = u.id
-                WHERE d.organization_id = %s AND d.category = %s
-                ORDER BY d.created_at DESC
-            """, (current_user["organization_id"], category))
-        else:
-            cursor.execute("""
-                SELECT d.*, u.name as uploaded_by_name
-                FROM documents d
-                JOIN users u ON d.uploaded_by = u.id
-                WHERE d.organization_id = %s
-                ORDER BY d.created_at DESC
-            """, (current_user["organization_id"],))
-        
-        documents = cursor.fetchall()
+            where.append("d.category = %s")
+            params.append(category)
+        documents, next_cursor = fetch_page(
+            db_cursor,
+            """
+            SELECT d.*, u.name as uploaded_by_name
+            FROM documents d
+            JOIN users u ON d.uploaded_by = u.id
+            """,
+            where, params,
+            [("d.created_at", "created_at"), ("d.id", "id")],
+            cursor, page_limit(limit)
+        )
+        count = cached_count(
+            db_cursor, ("documents", current_user["organization_id"], category),
+            "documents d WHERE " + " AND ".join(where), params
+        )
+        set_page_headers(response, next_cursor, count)
         return documents
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -139,6 +157,7 @@ async def delete_document(
         # Delete the document
         cursor.execute("DELETE FROM documents WHERE id = %s", (doc_id,))
         db.commit()
+        invalidate_counts("documents")
         
         return {"message": "Document deleted successfully"}
         
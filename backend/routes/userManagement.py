@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import List, Optional
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from pydantic import BaseModel, EmailStr
 from backend.database.db import get_db
 
-from backend.auth_utils import get_current_user
+from backend.auth_utils import get_current_user, invalidate_user_context
+from backend.utils.pagination import InvalidCursor, cached_count, fetch_page, invalidate_counts, page_limit, set_page_headers
 
 router = APIRouter()
 
@@ -17,9 +18,13 @@ class UserUpdate(BaseModel):
 
 @router.get("/users")
 async def get_users(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     current_user: dict = Depends(get_current_user),
     db: psycopg2.extensions.connection = Depends(get_db)
 ):
+    """One page of the organization's users, newest first (cursor in `X-Next-Cursor`)"""
     try:
         # Check if user is admin
         if current_user["role"] != "admin":
@@ -28,16 +33,25 @@ async def get_users(
                 detail="Only administrators can access user management"
             )
         
-        cursor = db.cursor()
-        cursor.execute("""
-            SELECT id, name, email, role, is_active, created_at
-            FROM users
-            WHERE organization_id = %s
-            ORDER BY created_at DESC
-        """, (current_user["organization_id"],))
-        
-        users = cursor.fetchall()
+        db_cursor = db.cursor()
+        users, next_cursor = fetch_page(
+            db_cursor,
+            "SELECT id, name, email, role, is_active, created_at FROM users",
+            ["organization_id = %s"], [current_user["organization_id"]],
+            [("created_at", "created_at"), ("id", "id")],
+            cursor, page_limit(limit)
+        )
+        count = cached_count(
+            db_cursor, ("users", current_user["organization_id"]),
+            "users WHERE organization_id = %s", [current_user["organization_id"]]
+        )
+        set_page_headers(response, next_cursor, count)
         return users
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -113,6 +127,7 @@ async def update_user(
         cursor.execute(query, values)
         updated_user = cursor.fetchone()
         db.commit()
+        invalidate_user_context(user_id)
         
         return updated_user
     except Exception as e:
@@ -153,6 +168,8 @@ async def delete_user(
         # Delete user
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
         db.commit()
+        invalidate_user_context(user_id)
+        invalidate_counts("users")
         
         return {"message": "User deleted successfully"}
     except Exception as e:
@@ -0,0 +1,36 @@
+"""
+Shared fixtures. Database tests run against the database configured in
+backend/config.py (POSTGRES_*), with pending migrations applied, and are
+skipped when it is unreachable. Each test's changes are rolled back.
+"""
+
+import psycopg2
+import pytest
+from backend.database.db import connect
+from backend.database.run_migrations import run_migrations
+
+
+@pytest.fixture(scope="session")
+def database():
+    try:
+        conn = connect()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres not available: {e}")
+    run_migrations()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def db(database):
+    yield database
+    database.rollback()
+
+
+@pytest.fixture
+def user_id(db):
+    cursor = db.cursor()
+    cursor.execute(
+        "INSERT INTO users (email, password, name, role) VALUES ('rollup-test@example.com', 'x', 'Test', 'employee') RETURNING id"
+    )
+    return cursor.fetchone()["id"]
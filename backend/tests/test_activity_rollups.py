@@ -0,0 +1,39 @@
+from datetime import date
+from psycopg2.extras import execute_values
+from backend.utils.activity_rollups import counts_by_type, daily_activity, distinct_active_users
+from backend.utils.activity_writer import INSERT_SQL, ActivityWriter
+
+
+def _write(db, *events):
+    """Record events through the writer and insert its rows in the test transaction"""
+    writer = ActivityWriter()
+    for event in events:
+        writer.record(*event[:4], **event[4])
+    rows = [writer._queue.get_nowait() for _ in events]
+    execute_values(db.cursor(), INSERT_SQL, rows)
+
+
+def test_upload_event_is_not_counted_as_query(db, user_id):
+    _write(db, ("upload", user_id, "uploaded_documents", "handbook.pdf", {"response_time_ms": 420}))
+    today = date.today()
+    cursor = db.cursor()
+
+    day = daily_activity(cursor, today, today, user_id=user_id)[today]
+    assert day["activities"] == 0
+    assert day["chat_queries"] == 0
+    assert day["active_users"] == 0
+    assert counts_by_type(cursor, today, today, user_id=user_id) == []
+    assert distinct_active_users(cursor, today, today) == 0
+
+
+def test_queries_are_counted_next_to_uploads(db, user_id):
+    _write(
+        db,
+        ("upload", user_id, "uploaded_dataset", "sales.csv", {"response_time_ms": 300}),
+        ("chat", user_id, "asked", "What is the leave policy?", {"response_time_ms": 80}),
+    )
+    today = date.today()
+    day = daily_activity(db.cursor(), today, today, user_id=user_id)[today]
+    assert day["activities"] == 1
+    assert day["chat_queries"] == 1
+    assert day["active_users"] == 1
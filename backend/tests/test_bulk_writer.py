@@ -0,0 +1,72 @@
+import struct
+import numpy as np
+from backend.utils.bulk_writer import CHUNK_COLUMNS, EMBEDDING_COLUMNS, ENCODERS, _CopyStream, copy_rows
+
+ROW = (7, "c-1", "d-1", "Leave policy – 20 days.", 0, 0, 23, 6, {"page": 1}, None, b"\x00\x01")
+
+
+def _decode(data: bytes):
+    """Parse a PGCOPY binary stream into rows of raw field bytes (None for NULL)"""
+    assert data[:11] == b"PGCOPY\n\xff\r\n\x00"
+    flags, extension = struct.unpack_from("!ii", data, 11)
+    assert (flags, extension) == (0, 0)
+    offset = 19
+    rows = []
+    while True:
+        (fields,) = struct.unpack_from("!h", data, offset)
+        offset += 2
+        if fields == -1:
+            assert offset == len(data)
+            return rows
+        row = []
+        for _ in range(fields):
+            (length,) = struct.unpack_from("!i", data, offset)
+            offset += 4
+            if length == -1:
+                row.append(None)
+            else:
+                row.append(data[offset:offset + length])
+                offset += length
+        rows.append(row)
+
+
+def test_copy_stream_encodes_binary_fields():
+    stream = _CopyStream([ROW, ROW], [ENCODERS[kind] for _, kind in CHUNK_COLUMNS])
+    # Small reads split rows across calls
+    data = b"".join(iter(lambda: stream.read(7), b""))
+
+    rows = _decode(data)
+    assert stream.rows == 2 and len(rows) == 2
+    fields = rows[0]
+    assert struct.unpack("!i", fields[0]) == (7,)
+    assert fields[3].decode("utf-8") == "Leave policy – 20 days."
+    assert fields[8] == b'\x01{"page": 1}'
+    assert fields[9] is None
+    assert fields[10] == b"\x00\x01"
+
+
+def test_copy_round_trip(db):
+    cursor = db.cursor()
+    cursor.execute("CREATE TEMP TABLE copy_embeddings (LIKE rag_embeddings INCLUDING DEFAULTS)")
+    vector = np.arange(4, dtype=np.float32)
+    rows = [(3, f"e-{i}", f"c-{i}", "d-1", 42, vector.tobytes(), "all-MiniLM-L6-v2") for i in range(1000)]
+
+    assert copy_rows(cursor, "copy_embeddings", EMBEDDING_COLUMNS, rows) == 1000
+    cursor.execute("SELECT count(*) AS n, min(user_id) AS user_id FROM copy_embeddings")
+    assert cursor.fetchone() == {"n": 1000, "user_id": 42}
+    cursor.execute("SELECT embedding FROM copy_embeddings WHERE embedding_id = 'e-999'")
+    assert np.array_equal(np.frombuffer(bytes(cursor.fetchone()["embedding"]), dtype=np.float32), vector)
+
+
+def test_copy_round_trip_of_chunks(db):
+    cursor = db.cursor()
+    cursor.execute("CREATE TEMP TABLE copy_chunks (LIKE rag_document_chunks INCLUDING DEFAULTS)")
+
+    assert copy_rows(cursor, "copy_chunks", CHUNK_COLUMNS, [ROW]) == 1
+    cursor.execute("SELECT content, metadata, sentence_spans, sentence_embeddings, tokens_count FROM copy_chunks")
+    row = cursor.fetchone()
+    assert row["content"] == "Leave policy – 20 days."
+    assert row["metadata"] == {"page": 1}
+    assert row["sentence_spans"] is None
+    assert bytes(row["sentence_embeddings"]) == b"\x00\x01"
+    assert row["tokens_count"] == 6
@@ -0,0 +1,25 @@
+from backend.utils.cache import TTLCache
+
+
+def test_byte_bound_evicts_least_recently_used():
+    cache = TTLCache(max_entries=100, max_bytes=10, sizeof=len)
+    cache.set("a", b"xxxx")
+    cache.set("b", b"xxxx")
+    cache.get("a")
+    cache.set("c", b"xxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"xxxx" and cache.get("c") == b"xxxx"
+    assert cache.stats()["bytes"] == 8
+
+
+def test_byte_accounting_follows_replacement_and_invalidation():
+    cache = TTLCache(max_entries=100, max_bytes=10, sizeof=len)
+    cache.set("a", b"xxxx")
+    cache.set("a", b"xx")
+    cache.set("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 2
+
+    cache.invalidate_where(lambda key, value: key == "a")
+    assert cache.stats()["bytes"] == 0
@@ -0,0 +1,50 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from backend.utils import dataset_query
+from backend.utils.dataset_query import DatasetQueryError, run_inline_query, run_query
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = str(tmp_path / "sales.parquet")
+    pq.write_table(pa.table({
+        "region": pa.array(["north", None, "south", "None"]),
+        "units": pa.array([1, 2, None, 4], type=pa.int64()),
+    }), path)
+    dataset_query.dataset_query_cache.clear()
+    return path
+
+
+def _rows(path, *filters):
+    query = {"filters": [dict(zip(("column", "op", "value"), f)) for f in filters]}
+    return run_query(path, 1, query)["rows"]
+
+
+def test_null_value_filters_missing_values(dataset):
+    assert _rows(dataset, ("region", "==", None)) == [{"region": None}]
+    assert [r["units"] for r in _rows(dataset, ("units", "!=", None))] == [1, 2, 4]
+    assert [r["region"] for r in _rows(dataset, ("region", "in", ["south", None]))] == [None, "south"]
+    assert [r["region"] for r in _rows(dataset, ("region", "!=", "None"))] == ["north", None, "south"]
+
+
+def test_pushdown_and_pandas_agree_on_nulls(dataset):
+    rows = pq.read_table(dataset).to_pylist()
+    for f in (("region", "!=", "north"), ("units", "!=", 1), ("region", "not in", ["north"]), ("units", "<", 4)):
+        query = {"filters": [dict(zip(("column", "op", "value"), f))]}
+        inline = [r[f[0]] for r in run_inline_query("inline", 1, rows, query)["rows"]]
+        assert inline == [r[f[0]] for r in run_query(dataset, 1, query)["rows"]], f
+
+
+def test_list_operator_needs_a_list(dataset):
+    with pytest.raises(DatasetQueryError):
+        _rows(dataset, ("region", "in", "north"))
+    with pytest.raises(DatasetQueryError):
+        _rows(dataset, ("units", ">", None))
+
+
+def test_query_cache_is_bounded_by_bytes(dataset, monkeypatch):
+    cache = dataset_query.dataset_query_cache
+    monkeypatch.setattr(cache, "max_bytes", dataset_query._result_bytes(run_query(dataset, 1, {})) + 1)
+    run_query(dataset, 2, {})
+    assert len(cache) == 1
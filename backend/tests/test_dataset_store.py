@@ -0,0 +1,39 @@
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from backend.config import settings
+from backend.utils.dataset_store import write_dataset
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ANALYTICS_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ANALYTICS_PARSE_CHUNK_ROWS", 2)
+
+
+def _csv(*lines):
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+def test_text_in_a_later_chunk_widens_the_column_to_string(store):
+    meta = write_dataset(_csv("code,amount", "1,10", "2,20", "A7,30", "4,40"), "csv", user_id=1)
+
+    table = pq.read_table(meta["storage_path"])
+    assert table.schema.field("code").type == pa.string()
+    assert table.column("code").to_pylist() == ["1", "2", "A7", "4"]
+    assert table.schema.field("amount").type == pa.int64()
+    assert meta["numeric_columns"] == ["amount"]
+    assert meta["text_columns"] == ["code"]
+    assert meta["preview"][2] == {"code": "A7", "amount": 30}
+
+
+def test_integer_column_keeps_its_type_and_widens_to_float_on_decimals(store):
+    meta = write_dataset(_csv("n,x", "1,1", ",2", "3,2.5", "4,3"), "csv", user_id=1)
+
+    table = pq.read_table(meta["storage_path"])
+    assert table.schema.field("n").type == pa.int64()
+    assert table.column("n").to_pylist() == [1, None, 3, 4]
+    assert table.schema.field("x").type == pa.float64()
+    assert table.column("x").to_pylist() == [1.0, 2.0, 2.5, 3.0]
+    assert meta["row_count"] == 4
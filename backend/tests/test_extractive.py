@@ -0,0 +1,27 @@
+import numpy as np
+from backend.utils.extractive import gather_sentences, index_sentences
+
+DIM = 4
+
+
+def _embed(texts):
+    return np.ones((len(texts), DIM), dtype=np.float32)
+
+
+def _indexed_chunk(content):
+    spans_blob, embeddings_blob = index_sentences([content], _embed)[0]
+    return {'content': content, 'sentence_spans': spans_blob, 'sentence_embeddings': embeddings_blob}
+
+
+def test_stored_only_skips_chunks_without_an_index():
+    chunks = [
+        _indexed_chunk("Leave requests go to your manager. Approval takes two days."),
+        {'content': "This legacy chunk has no stored index. Nothing here gets embedded."},
+    ]
+
+    sentences, matrix = gather_sentences(chunks, None, DIM)
+    assert sentences == ["Leave requests go to your manager.", "Approval takes two days."]
+    assert matrix.shape == (2, DIM)
+    assert gather_sentences(chunks[1:], None, DIM)[0] == []
+    # With an embedder the legacy chunk's sentences are computed
+    assert len(gather_sentences(chunks, _embed, DIM)[0]) == 4
@@ -0,0 +1,33 @@
+from backend.routes.homePage import get_dashboard_analytics
+
+
+def _org_member_with_activity(cursor):
+    cursor.execute("INSERT INTO organizations (name) VALUES ('dashboard-test') RETURNING id")
+    organization_id = cursor.fetchone()["id"]
+    cursor.execute(
+        "INSERT INTO users (email, password, name, role, organization_id) "
+        "VALUES ('dashboard-member@example.com', 'x', 'Member', 'employee', %s) RETURNING id",
+        (organization_id,)
+    )
+    user_id = cursor.fetchone()["id"]
+    cursor.execute(
+        "INSERT INTO activities (type, user_id, action, target, organization_id) "
+        "VALUES ('document_upload', %s, 'uploaded', 'report.pdf', %s), ('chat', %s, 'asked', 'q', %s)",
+        (user_id, organization_id, user_id, organization_id)
+    )
+    return {"id": user_id, "organization_id": organization_id}
+
+
+def test_analytics_are_scoped_to_the_organization(db):
+    member = _org_member_with_activity(db.cursor())
+    analytics = get_dashboard_analytics(current_user=member, db=db)
+    assert [row["uploads"] for row in analytics["document_trends"]] == [1]
+    assert analytics["activity_by_type"]
+
+
+def test_user_without_organization_sees_no_other_tenants_activity(db, user_id):
+    _org_member_with_activity(db.cursor())
+    analytics = get_dashboard_analytics(current_user={"id": user_id, "organization_id": None}, db=db)
+    assert analytics["document_trends"] == []
+    assert analytics["activity_trends"] == []
+    assert analytics["activity_by_type"] == []
@@ -0,0 +1,51 @@
+import threading
+import time
+import pytest
+from backend.config import settings
+from backend.utils.llm_client import LLMClient
+
+
+@pytest.fixture(autouse=True)
+def hedging(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_MS", 100)
+
+
+def test_queued_requests_are_cancelled_at_the_deadline(monkeypatch):
+    client = LLMClient(max_concurrency=1)
+    timeouts = []
+    release = threading.Event()
+
+    def complete(prompt, max_tokens, system, timeout):
+        timeouts.append(timeout)
+        # Busy past the deadline; a wait of exactly `timeout` could fail the primary just before it
+        release.wait()
+        raise RuntimeError("provider timed out")
+
+    monkeypatch.setattr(client, "complete", complete)
+    with pytest.raises(TimeoutError):
+        client.complete_within("question", timeout=0.3)
+    release.set()
+    time.sleep(0.05)
+
+    client.close()
+
+    # The hedge was queued behind the busy primary and never ran
+    assert timeouts == [pytest.approx(0.3, abs=0.05)]
+
+
+def test_hedge_is_sent_with_the_time_left(monkeypatch):
+    client = LLMClient(max_concurrency=2)
+    timeouts = []
+
+    def complete(prompt, max_tokens, system, timeout):
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            time.sleep(timeout)
+            raise RuntimeError("provider timed out")
+        return "answer"
+
+    monkeypatch.setattr(client, "complete", complete)
+    assert client.complete_within("question", timeout=0.5) == ("answer", True)
+    client.close()
+    assert timeouts[1] < timeouts[0] - 0.05
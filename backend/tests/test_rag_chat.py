@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("bcrypt")
+from backend.routes.rag_routes import AdvancedRAGSystem  # noqa: E402
+
+CHUNK = {
+    "chunk_id": "chunk-1",
+    "document_id": "doc-1",
+    "filename": "handbook.pdf",
+    "content": "Employees receive twenty days of paid leave every calendar year.",
+    "score": 0.8,
+    "chunk_index": 0,
+}
+
+
+def test_empty_llm_answer_reports_missing_information(monkeypatch):
+    rag = AdvancedRAGSystem.__new__(AdvancedRAGSystem)
+    rag.retriever = SimpleNamespace(hybrid_search=lambda **kwargs: [dict(CHUNK)])
+    rag.embedding_model = SimpleNamespace(model_name="all-MiniLM-L6-v2")
+    monkeypatch.setattr(rag, "_generate_answer_with_context", lambda *args, **kwargs: "")
+
+    result = asyncio.run(rag.rag_chat("How many days of paid leave do employees get?", "1", document_ids=["doc-1"]))
+
+    assert result["answer"].startswith("The information needed to answer your question is not available")
+    assert result["sources"] == []
+    assert result["retrieval_count"] == 1
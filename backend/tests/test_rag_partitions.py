@@ -0,0 +1,75 @@
+import uuid
+import pytest
+
+
+@pytest.fixture
+def organization_id(db):
+    cursor = db.cursor()
+    cursor.execute("INSERT INTO organizations (name) VALUES ('partition-test') RETURNING id")
+    return cursor.fetchone()["id"]
+
+
+def _add_chunk(cursor, organization_id, user_id):
+    document_id = str(uuid.uuid4())
+    cursor.execute(
+        "INSERT INTO rag_documents (document_id, user_id, filename, organization_id) VALUES (%s, %s, 'a.txt', %s)",
+        (document_id, user_id, organization_id)
+    )
+    cursor.execute(
+        "INSERT INTO rag_document_chunks (organization_id, chunk_id, document_id, content) "
+        "VALUES (%s, %s, %s, 'text') RETURNING tableoid::regclass::text AS partition",
+        (organization_id, str(uuid.uuid4()), document_id)
+    )
+    return cursor.fetchone()["partition"]
+
+
+def test_dropping_existing_tenant_keeps_its_partitions(db, user_id, organization_id):
+    cursor = db.cursor()
+    _add_chunk(cursor, organization_id, user_id)
+    cursor.execute("SELECT drop_rag_tenant(%s)", (organization_id,))
+    cursor.execute("SELECT count(*) AS n FROM rag_documents WHERE organization_id = %s", (organization_id,))
+    assert cursor.fetchone()["n"] == 0
+    assert _add_chunk(cursor, organization_id, user_id) == f"rag_document_chunks_org_{organization_id}"
+
+
+def test_dropping_deleted_tenant_removes_its_partitions(db, user_id, organization_id):
+    cursor = db.cursor()
+    cursor.execute("DELETE FROM organizations WHERE id = %s", (organization_id,))
+    cursor.execute("SELECT drop_rag_tenant(%s)", (organization_id,))
+    cursor.execute("SELECT to_regclass(%s) AS partition", (f"rag_document_chunks_org_{organization_id}",))
+    assert cursor.fetchone()["partition"] is None
+
+
+def test_creating_partitions_moves_rows_out_of_default(db, user_id, organization_id):
+    cursor = db.cursor()
+    cursor.execute(f"DROP TABLE rag_document_chunks_org_{organization_id}")
+    assert _add_chunk(cursor, organization_id, user_id) == "rag_document_chunks_default"
+    cursor.execute("SELECT create_rag_tenant_partitions(%s)", (organization_id,))
+    cursor.execute(
+        "SELECT tableoid::regclass::text AS partition FROM rag_document_chunks WHERE organization_id = %s",
+        (organization_id,)
+    )
+    assert [row["partition"] for row in cursor.fetchall()] == [f"rag_document_chunks_org_{organization_id}"]
+
+
+def test_rows_follow_a_user_who_changes_organization(db, user_id, organization_id):
+    cursor = db.cursor()
+    cursor.execute("UPDATE users SET organization_id = %s WHERE id = %s", (organization_id, user_id))
+    _add_chunk(cursor, organization_id, user_id)
+    cursor.execute("INSERT INTO organizations (name) VALUES ('partition-test-2') RETURNING id")
+    new_organization_id = cursor.fetchone()["id"]
+
+    cursor.execute("UPDATE users SET organization_id = %s WHERE id = %s", (new_organization_id, user_id))
+    cursor.execute(
+        "SELECT d.organization_id, c.tableoid::regclass::text AS partition FROM rag_documents d "
+        "JOIN rag_document_chunks c ON c.document_id = d.document_id WHERE d.user_id = %s",
+        (user_id,)
+    )
+    assert [tuple(row.values()) for row in cursor.fetchall()] == [
+        (new_organization_id, f"rag_document_chunks_org_{new_organization_id}")
+    ]
+
+    cursor.execute("UPDATE users SET organization_id = NULL WHERE id = %s", (user_id,))
+    cursor.execute("SELECT c.tableoid::regclass::text AS partition FROM rag_document_chunks c "
+                   "JOIN rag_documents d USING (document_id) WHERE d.user_id = %s", (user_id,))
+    assert cursor.fetchone()["partition"] == "rag_document_chunks_default"
@@ -0,0 +1,162 @@
+import os
+import psycopg2
+import pytest
+from backend.config import settings
+from backend.database import run_migrations as migrations
+from backend.database.db import connect
+
+SCRATCH_DB = "rag_migrations_test"
+
+# RAG tables as AdvancedRAGSystem.ensure_tables_exist created them before migrations
+LEGACY_RAG_SCHEMA = """
+CREATE TABLE organizations (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) UNIQUE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    role VARCHAR(50) NOT NULL CHECK (role IN ('admin', 'employee')),
+    organization_id INTEGER REFERENCES organizations(id)
+);
+CREATE TABLE rag_documents (
+    document_id VARCHAR(36) PRIMARY KEY,
+    user_id VARCHAR(36) NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    file_type VARCHAR(20),
+    file_size INTEGER,
+    total_chunks INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processing_status VARCHAR(50) DEFAULT 'pending',
+    error_message TEXT,
+    embedding_model VARCHAR(100) DEFAULT 'all-MiniLM-L6-v2'
+);
+CREATE TABLE rag_document_chunks (
+    chunk_id VARCHAR(36) PRIMARY KEY,
+    document_id VARCHAR(36) NOT NULL,
+    content TEXT NOT NULL,
+    chunk_index INTEGER,
+    start_char INTEGER,
+    end_char INTEGER,
+    tokens_count INTEGER,
+    metadata JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (document_id) REFERENCES rag_documents(document_id) ON DELETE CASCADE
+);
+CREATE TABLE rag_embeddings (
+    embedding_id VARCHAR(36) PRIMARY KEY,
+    chunk_id VARCHAR(36) NOT NULL,
+    document_id VARCHAR(36) NOT NULL,
+    user_id VARCHAR(36) NOT NULL,
+    embedding BYTEA NOT NULL,
+    embedding_model VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (chunk_id) REFERENCES rag_document_chunks(chunk_id) ON DELETE CASCADE
+);
+CREATE TABLE rag_chat_sessions (
+    session_id VARCHAR(36) PRIMARY KEY,
+    user_id VARCHAR(36) NOT NULL,
+    title VARCHAR(255),
+    document_ids JSONB,
+    total_messages INTEGER DEFAULT 0,
+    total_tokens INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO organizations (id, name) VALUES (1, 'Acme');
+INSERT INTO users (id, email, password, name, role, organization_id)
+VALUES (1, 'a@example.com', 'x', 'A', 'employee', 1), (2, 'b@example.com', 'x', 'B', 'employee', NULL);
+INSERT INTO rag_documents (document_id, user_id, filename) VALUES ('doc-a', '1', 'a.txt'), ('doc-b', '2', 'b.txt'), ('doc-gone', '9', 'c.txt');
+INSERT INTO rag_document_chunks (chunk_id, document_id, content) VALUES ('chunk-a', 'doc-a', 'a'), ('chunk-b', 'doc-b', 'b');
+INSERT INTO rag_embeddings (embedding_id, chunk_id, document_id, user_id, embedding)
+VALUES ('emb-a', 'chunk-a', 'doc-a', '1', '\\x00'), ('emb-b', 'chunk-b', 'doc-b', '2', '\\x00');
+INSERT INTO rag_chat_sessions (session_id, user_id) VALUES ('session-a', '1');
+"""
+
+
+@pytest.fixture
+def scratch_database(database, monkeypatch):
+    """An empty database that settings point at for the duration of the test"""
+    admin = psycopg2.connect(
+        host=settings.POSTGRES_HOST, database=settings.POSTGRES_DB, user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD, port=settings.POSTGRES_PORT
+    )
+    admin.autocommit = True
+    admin.cursor().execute(f"DROP DATABASE IF EXISTS {SCRATCH_DB}")
+    admin.cursor().execute(f"CREATE DATABASE {SCRATCH_DB}")
+    monkeypatch.setattr(settings, "POSTGRES_DB", SCRATCH_DB)
+    conn = connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+        admin.cursor().execute(f"DROP DATABASE IF EXISTS {SCRATCH_DB}")
+        admin.close()
+
+
+def _user_id_types(cursor):
+    cursor.execute(
+        "SELECT table_name, data_type FROM information_schema.columns "
+        "WHERE column_name = 'user_id' AND table_name IN ('rag_documents', 'rag_embeddings', 'rag_chat_sessions')"
+    )
+    return {row["table_name"]: row["data_type"] for row in cursor.fetchall()}
+
+
+def test_failure_is_reported_and_lock_released(database, monkeypatch):
+    def broken(cursor):
+        cursor.execute("SELECT 1 / 0")
+
+    monkeypatch.setattr(migrations, "_ensure_migrations_table", broken)
+    with pytest.raises(psycopg2.errors.DivisionByZero):
+        migrations.run_migrations()
+
+    cursor = database.cursor()
+    cursor.execute("SELECT pg_try_advisory_lock(%s) AS locked", (migrations.MIGRATION_LOCK_ID,))
+    assert cursor.fetchone()["locked"]
+    cursor.execute("SELECT pg_advisory_unlock(%s)", (migrations.MIGRATION_LOCK_ID,))
+    database.rollback()
+
+
+def test_legacy_varchar_schema_is_migrated(scratch_database):
+    cursor = scratch_database.cursor()
+    cursor.execute(LEGACY_RAG_SCHEMA)
+    scratch_database.commit()
+
+    migrations.run_migrations()
+
+    assert set(_user_id_types(cursor).values()) == {"integer"}
+    cursor.execute("SELECT document_id, user_id, organization_id FROM rag_documents ORDER BY document_id")
+    assert [tuple(row.values()) for row in cursor.fetchall()] == [("doc-a", 1, 1), ("doc-b", 2, 0)]
+    cursor.execute("SELECT embedding_id, tableoid::regclass::text AS partition FROM rag_embeddings ORDER BY embedding_id")
+    assert [tuple(row.values()) for row in cursor.fetchall()] == [
+        ("emb-a", "rag_embeddings_org_1"), ("emb-b", "rag_embeddings_default")
+    ]
+
+
+def test_partitioning_converts_columns_left_by_earlier_baseline(scratch_database, monkeypatch, tmp_path):
+    # Databases that applied 001 before it converted legacy columns reach 006 with VARCHAR user_ids
+    cursor = scratch_database.cursor()
+    cursor.execute(LEGACY_RAG_SCHEMA)
+    scratch_database.commit()
+    for version, name, path in migrations.discover_migrations():
+        if version < 6:
+            (tmp_path / os.path.basename(path)).write_text(open(path).read())
+    all_migrations = migrations.MIGRATIONS_DIR
+    monkeypatch.setattr(migrations, "MIGRATIONS_DIR", str(tmp_path))
+    migrations.run_migrations()
+    for table in ("rag_documents", "rag_embeddings", "rag_chat_sessions"):
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {table}_user_id_fkey")
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN user_id TYPE VARCHAR(36)")
+    scratch_database.commit()
+
+    monkeypatch.setattr(migrations, "MIGRATIONS_DIR", all_migrations)
+    assert 6 in migrations.run_migrations()
+
+    assert set(_user_id_types(cursor).values()) == {"integer"}
+    cursor.execute("SELECT organization_id FROM rag_documents WHERE document_id = 'doc-a'")
+    assert cursor.fetchone()["organization_id"] == 1
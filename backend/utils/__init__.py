@@ -3,9 +3,10 @@ Document processing module for extracting text from uploaded files
 """
 import os
 import PyPDF2
-from io import BytesIO
 from fastapi import UploadFile
 import logging
+from backend.utils.advanced_processor import Source, open_source
+from backend.utils.upload_spool import spool_upload
 
 logger = logging.getLogger(__name__)
 
@@ -16,24 +17,26 @@ class DocumentProcessor:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     
     @staticmethod
-    async def extract_text_from_pdf(file_content: bytes) -> str:
-        """Extract text from PDF file"""
+    async def extract_text_from_pdf(file_content: Source) -> str:
+        """Extract text from PDF file contents or path"""
         try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            with open_source(file_content) as pdf_file:
+                pdf_reader = PyPDF2.PdfReader(pdf_file)
+                text = ""
+                for page in pdf_reader.pages:
+                    text += page.extract_text() + "\n"
             return text.strip()
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             return ""
     
     @staticmethod
-    async def extract_text_from_docx(file_content: bytes) -> str:
-        """Extract text from DOCX file"""
+    async def extract_text_from_docx(file_content: Source) -> str:
+        """Extract text from DOCX file contents or path"""
         try:
             from docx import Document
-            doc = Document(BytesIO(file_content))
+            with open_source(file_content) as docx_file:
+                doc = Document(docx_file)
             text = "\n".join([para.text for para in doc.paragraphs])
             return text.strip()
         except Exception as e:
@@ -41,10 +44,11 @@ class DocumentProcessor:
             return ""
     
     @staticmethod
-    async def extract_text_from_txt(file_content: bytes) -> str:
-        """Extract text from TXT file"""
+    async def extract_text_from_txt(file_content: Source) -> str:
+        """Extract text from TXT file contents or path"""
         try:
-            return file_content.decode('utf-8').strip()
+            with open_source(file_content) as txt_file:
+                return txt_file.read().decode('utf-8').strip()
         except Exception as e:
             logger.error(f"Error reading TXT file: {str(e)}")
             return ""
@@ -59,21 +63,16 @@ class DocumentProcessor:
         if file.content_type not in cls.ALLOWED_TYPES:
             raise ValueError(f"Unsupported file type: {file.content_type}")
         
-        # Read file content
-        content = await file.read()
-        
-        # Validate file size
-        if len(content) > cls.MAX_FILE_SIZE:
-            raise ValueError(f"File too large. Maximum size is {cls.MAX_FILE_SIZE / 1024 / 1024}MB")
-        
-        # Extract text based on file type
+        # Stream to disk, rejecting oversized files before they are fully read
+        # (UploadTooLarge is a ValueError), and extract from the spooled file
         text = ""
-        if file.content_type == 'application/pdf':
-            text = await cls.extract_text_from_pdf(content)
-        elif file.content_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-            text = await cls.extract_text_from_docx(content)
-        elif file.content_type == 'text/plain':
-            text = await cls.extract_text_from_txt(content)
+        with await spool_upload(file, max_bytes=cls.MAX_FILE_SIZE) as spooled:
+            if file.content_type == 'application/pdf':
+                text = await cls.extract_text_from_pdf(spooled.path)
+            elif file.content_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+                text = await cls.extract_text_from_docx(spooled.path)
+            elif file.content_type == 'text/plain':
+                text = await cls.extract_text_from_txt(spooled.path)
         
         return text, file.filename
     
@@ -0,0 +1,134 @@
+"""
+Daily activity rollup queries
+Reads the trigger-maintained `activity_daily_rollups` table (see migration
+003) so dashboard views cost one small indexed scan regardless of how many raw
+activity rows exist.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Union
+
+# Upload types, left out of query/activity totals and active users: 'rag_upload' and
+# 'document_upload' are rolled up from the document tables, 'upload' is the
+# per-request event the upload routes write to `activities`
+UPLOAD_TYPES = ('rag_upload', 'document_upload', 'upload')
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, None]
+
+_UPLOAD_TYPES_SQL = ", ".join(f"'{t}'" for t in UPLOAD_TYPES)
+
+DateLike = Union[str, date, datetime]
+
+
+def _as_date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _scope_sql(user_id=None, organization_id=None):
+    clauses, params = [], []
+    if user_id is not None:
+        clauses.append("user_id = %s")
+        params.append(user_id)
+    if organization_id is not None:
+        clauses.append("organization_id = %s")
+        params.append(organization_id)
+    return "".join(f" AND {c}" for c in clauses), params
+
+
+def daily_activity(
+    cursor,
+    start_day: DateLike,
+    end_day: DateLike,
+    user_id: Optional[int] = None,
+    organization_id: Optional[int] = None
+) -> Dict[date, dict]:
+    """Per-day totals keyed by date.
+
+    Each value has: activities, chat_queries, document_queries, rag_uploads,
+    document_uploads, active_users, latency_sum_ms and latency_count.
+    """
+    scope, params = _scope_sql(user_id, organization_id)
+    cursor.execute(f"""
+        SELECT
+            day,
+            COALESCE(SUM(event_count) FILTER (WHERE type NOT IN ({_UPLOAD_TYPES_SQL})), 0) AS activities,
+            COALESCE(SUM(event_count) FILTER (WHERE type = 'chat'), 0) AS chat_queries,
+            COALESCE(SUM(event_count) FILTER (WHERE type = 'document_query'), 0) AS document_queries,
+            COALESCE(SUM(event_count) FILTER (WHERE type = 'rag_upload'), 0) AS rag_uploads,
+            COALESCE(SUM(event_count) FILTER (WHERE type = 'document_upload'), 0) AS document_uploads,
+            COUNT(DISTINCT user_id) FILTER (WHERE type NOT IN ({_UPLOAD_TYPES_SQL})) AS active_users,
+            COALESCE(SUM(latency_sum_ms), 0)::BIGINT AS latency_sum_ms,
+            COALESCE(SUM(latency_count), 0) AS latency_count
+        FROM activity_daily_rollups
+        WHERE day BETWEEN %s AND %s{scope}
+        GROUP BY day
+    """, [_as_date(start_day), _as_date(end_day)] + params)
+    return {row['day']: row for row in cursor.fetchall()}
+
+
+def daily_counts(
+    cursor,
+    start_day: DateLike,
+    end_day: DateLike,
+    types: Iterable[str],
+    user_id: Optional[int] = None,
+    organization_id: Optional[int] = None
+) -> List[dict]:
+    """Per-day event counts for the given rollup types, ordered by day"""
+    scope, params = _scope_sql(user_id, organization_id)
+    cursor.execute(f"""
+        SELECT day, SUM(event_count) AS count
+        FROM activity_daily_rollups
+        WHERE day BETWEEN %s AND %s AND type = ANY(%s){scope}
+        GROUP BY day
+        ORDER BY day
+    """, [_as_date(start_day), _as_date(end_day), list(types)] + params)
+    return cursor.fetchall()
+
+
+def counts_by_type(
+    cursor,
+    start_day: DateLike,
+    end_day: DateLike,
+    user_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    include_uploads: bool = False
+) -> List[dict]:
+    """Total events per activity type over the range, most frequent first"""
+    scope, params = _scope_sql(user_id, organization_id)
+    uploads_filter = "" if include_uploads else f" AND type NOT IN ({_UPLOAD_TYPES_SQL})"
+    cursor.execute(f"""
+        SELECT type, SUM(event_count) AS count
+        FROM activity_daily_rollups
+        WHERE day BETWEEN %s AND %s{uploads_filter}{scope}
+        GROUP BY type
+        ORDER BY count DESC
+    """, [_as_date(start_day), _as_date(end_day)] + params)
+    return cursor.fetchall()
+
+
+def distinct_active_users(
+    cursor,
+    start_day: DateLike,
+    end_day: DateLike,
+    organization_id: Optional[int] = None
+) -> int:
+    """Number of distinct users with any non-upload activity in the range"""
+    scope, params = _scope_sql(organization_id=organization_id)
+    cursor.execute(f"""
+        SELECT COUNT(DISTINCT user_id) AS total
+        FROM activity_daily_rollups
+        WHERE day BETWEEN %s AND %s AND type NOT IN ({_UPLOAD_TYPES_SQL}){scope}
+    """, [_as_date(start_day), _as_date(end_day)] + params)
+    row = cursor.fetchone()
+    return (row['total'] if row else 0) or 0
+
+
+def day_range(start_day: DateLike, end_day: DateLike) -> List[date]:
+    start, end = _as_date(start_day), _as_date(end_day)
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
@@ -0,0 +1,204 @@
+"""
+Buffered activity writer
+Request handlers enqueue activity/telemetry events without touching the
+database; a background thread flushes them to `activities` in multi-row
+batches every ACTIVITY_BATCH_SIZE events or ACTIVITY_FLUSH_INTERVAL_MS.
+When the queue is full new events are dropped (and counted) instead of
+slowing requests down.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from psycopg2.extras import execute_values
+from backend.config import settings
+from backend.database.db import connect
+from backend.utils.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = """
+    INSERT INTO activities
+    (type, user_id, action, target, response_time, response_time_ms, success,
+     error_message, organization_id, query_text, created_at)
+    VALUES %s
+"""
+
+_STOP = object()
+
+
+class ActivityWriter:
+    """Bounded in-process queue drained by a single writer thread"""
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 200,
+        flush_interval_ms: int = 500
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self._last_drop_log = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+                self._thread.start()
+
+    def record(
+        self,
+        type: str,
+        user_id: int,
+        action: str,
+        target: str = "",
+        response_time_ms: Optional[float] = None,
+        success: bool = True,
+        error_message: Optional[str] = None,
+        organization_id: Optional[int] = None,
+        query_text: Optional[str] = None
+    ) -> bool:
+        """Enqueue one activity; never blocks. Returns False if it was dropped."""
+        latency = int(round(response_time_ms)) if response_time_ms is not None else 0
+        row = (
+            type, user_id, (action or "")[:255], (target or "")[:255], latency, latency, success,
+            error_message[:1000] if error_message else None, organization_id, query_text,
+            datetime.now()
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._last_drop_log > 10:
+                self._last_drop_log = now
+                logger.warning(f"Activity queue full, dropping events ({self.dropped} dropped so far)")
+            return False
+        self.enqueued += 1
+        return True
+
+    def _run(self):
+        batch: List[tuple] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch: List[tuple]):
+        if not batch:
+            return
+        for attempt in (1, 2):
+            try:
+                if self._conn is None or self._conn.closed:
+                    self._conn = connect()
+                cursor = self._conn.cursor()
+                execute_values(cursor, INSERT_SQL, batch, page_size=len(batch))
+                self._conn.commit()
+                cursor.close()
+                self.written += len(batch)
+                self.flushes += 1
+                return
+            except Exception as e:
+                logger.error(f"Activity flush failed (attempt {attempt}, {len(batch)} events): {e}")
+                self._reset_connection()
+        self.failed += len(batch)
+
+    def _reset_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def close(self, timeout: float = 5.0):
+        """Flush whatever is queued and stop the writer thread"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning("Activity queue still full at shutdown; pending events are lost")
+            thread.join(timeout)
+        self._thread = None
+        self._reset_connection()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+
+_writer: Optional[ActivityWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_activity_writer() -> ActivityWriter:
+    """Process-wide writer, started on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ActivityWriter(
+                    max_queue=settings.ACTIVITY_QUEUE_SIZE,
+                    batch_size=settings.ACTIVITY_BATCH_SIZE,
+                    flush_interval_ms=settings.ACTIVITY_FLUSH_INTERVAL_MS
+                )
+                _writer.start()
+    return _writer
+
+
+def record_activity(type: str, user_id: int, action: str, target: str = "", **kwargs) -> bool:
+    """Shortcut for `get_activity_writer().record(...)`"""
+    return get_activity_writer().record(type, user_id, action, target, **kwargs)
+
+
+def _writer_metrics() -> List[str]:
+    if _writer is None:
+        return []
+    stats = _writer.stats()
+    lines = ["# TYPE activity_queue_depth gauge", f"activity_queue_depth {stats['queued']}"]
+    for key in ("enqueued", "written", "dropped", "failed"):
+        lines.append(f"# TYPE activity_events_{key}_total counter")
+        lines.append(f"activity_events_{key}_total {stats[key]}")
+    return lines
+
+
+registry.register_collector(_writer_metrics)
+
+
+def shutdown_activity_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
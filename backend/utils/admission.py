@@ -0,0 +1,205 @@
+"""
+Admission control for expensive endpoints
+Each endpoint class gets a concurrency limit and a bounded wait queue, and all
+classes share a global slot pool; when a slot frees up, waiting requests of
+higher-priority classes (queries) are admitted before lower ones (uploads).
+Requests that find the queue full are rejected with 429, requests that wait
+longer than the queue timeout with 503, both with a Retry-After hint, so
+admitted requests keep a flat tail latency under overload.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
+from backend.config import settings
+from backend.utils.telemetry import increment, registry
+
+logger = logging.getLogger(__name__)
+
+queue_wait = registry.histogram(
+    "admission_queue_wait_seconds", "Time admitted requests spent waiting for a slot"
+)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, endpoint: str, status_code: int, reason: str, retry_after: int):
+        super().__init__(f"{endpoint}: {reason}")
+        self.endpoint = endpoint
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _EndpointClass:
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float, priority: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.priority = priority
+        self.in_flight = 0
+        self.waiters: deque = deque()
+        # Exponentially weighted mean service time (seconds), for Retry-After
+        self.service_time = 1.0
+
+
+class Ticket:
+    """An admitted request's slot; release exactly once (extra calls are no-ops)"""
+
+    def __init__(self, controller: "AdmissionController", endpoint: _EndpointClass):
+        self._controller = controller
+        self._endpoint = endpoint
+        self._started = time.monotonic()
+        self._released = False
+        self.detached = False
+
+    def detach(self):
+        """Hand the slot to background work; the request scope will no longer release it"""
+        self.detached = True
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self._endpoint, time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Priority-aware concurrency limiter; use from the event loop only"""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._endpoints: Dict[str, _EndpointClass] = {}
+
+    def register(self, name: str, limit: int, max_queue: int, queue_timeout: float, priority: int = 0):
+        """Higher `priority` classes are admitted first"""
+        self._endpoints[name] = _EndpointClass(name, limit, max_queue, queue_timeout, priority)
+
+    def _has_capacity(self, endpoint: _EndpointClass) -> bool:
+        return endpoint.in_flight < endpoint.limit and self.in_flight < self.max_concurrency
+
+    def _retry_after(self, endpoint: _EndpointClass) -> int:
+        backlog = len(endpoint.waiters) + endpoint.in_flight
+        return max(1, math.ceil(endpoint.service_time * backlog / max(endpoint.limit, 1)))
+
+    def _admit(self, endpoint: _EndpointClass) -> Ticket:
+        endpoint.in_flight += 1
+        self.in_flight += 1
+        increment("admission_admitted_total", help="Requests admitted by the admission controller", endpoint=endpoint.name)
+        return Ticket(self, endpoint)
+
+    def _reject(self, endpoint: _EndpointClass, status_code: int, reason: str):
+        increment(
+            "admission_rejected_total", help="Requests rejected by the admission controller",
+            endpoint=endpoint.name, reason=reason
+        )
+        raise AdmissionRejected(endpoint.name, status_code, reason, self._retry_after(endpoint))
+
+    async def acquire(self, name: str) -> Ticket:
+        endpoint = self._endpoints[name]
+        # Slots are handed out on release, so anyone still waiting cannot be
+        # admitted yet; only queue-jumping within this class must be prevented
+        if self._has_capacity(endpoint) and not endpoint.waiters:
+            queue_wait.observe(0.0, endpoint=name)
+            return self._admit(endpoint)
+        if len(endpoint.waiters) >= endpoint.max_queue:
+            self._reject(endpoint, status.HTTP_429_TOO_MANY_REQUESTS, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        endpoint.waiters.append(waiter)
+        started = time.monotonic()
+        try:
+            ticket = await asyncio.wait_for(waiter, timeout=endpoint.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject(endpoint, status.HTTP_503_SERVICE_UNAVAILABLE, "queue_timeout")
+        except asyncio.CancelledError:
+            # Client went away; hand the slot on if it was granted in the meantime
+            if waiter.done() and not waiter.cancelled():
+                waiter.result().release()
+            raise
+        finally:
+            if waiter in endpoint.waiters:
+                endpoint.waiters.remove(waiter)
+        queue_wait.observe(time.monotonic() - started, endpoint=name)
+        return ticket
+
+    def _release(self, endpoint: _EndpointClass, elapsed: float):
+        endpoint.in_flight -= 1
+        self.in_flight -= 1
+        endpoint.service_time = 0.8 * endpoint.service_time + 0.2 * elapsed
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiters, highest priority first"""
+        for endpoint in sorted(self._endpoints.values(), key=lambda e: -e.priority):
+            while endpoint.waiters and self._has_capacity(endpoint):
+                waiter = endpoint.waiters.popleft()
+                if waiter.done():
+                    continue  # timed out or cancelled
+                waiter.set_result(self._admit(endpoint))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"in_flight": e.in_flight, "queued": len(e.waiters), "limit": e.limit, "max_queue": e.max_queue}
+            for name, e in self._endpoints.items()
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        controller = AdmissionController(settings.ADMISSION_MAX_CONCURRENCY)
+        controller.register(
+            "rag", settings.ADMISSION_RAG_CONCURRENCY, settings.ADMISSION_RAG_QUEUE,
+            settings.ADMISSION_RAG_QUEUE_TIMEOUT_MS / 1000.0, priority=10
+        )
+        controller.register(
+            "upload", settings.ADMISSION_UPLOAD_CONCURRENCY, settings.ADMISSION_UPLOAD_QUEUE,
+            settings.ADMISSION_UPLOAD_QUEUE_TIMEOUT_MS / 1000.0, priority=0
+        )
+        _controller = controller
+    return _controller
+
+
+def admission(name: str):
+    """FastAPI dependency admitting the request into endpoint class `name`.
+
+    Yields the Ticket; the slot is released when the request finishes unless
+    the handler detached it to release from background work.
+    """
+    async def dependency():
+        try:
+            ticket = await get_admission_controller().acquire(name)
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=f"Server is busy ({e.reason}), please retry later",
+                headers={"Retry-After": str(e.retry_after)}
+            )
+        try:
+            yield ticket
+        finally:
+            if not ticket.detached:
+                ticket.release()
+    return dependency
+
+
+def _admission_metrics() -> List[str]:
+    if _controller is None:
+        return []
+    stats = _controller.stats()
+    lines = []
+    for metric, key in (("admission_in_flight", "in_flight"), ("admission_queue_depth", "queued")):
+        lines.append(f"# TYPE {metric} gauge")
+        lines.extend(f'{metric}{{endpoint="{name}"}} {values[key]}' for name, values in stats.items())
+    return lines
+
+
+registry.register_collector(_admission_metrics)
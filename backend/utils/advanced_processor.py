@@ -7,12 +7,24 @@ import PyPDF2
 import docx
 import re
 import logging
-from typing import List, Tuple, Optional, Dict, Any
+import mmap
+import os
+from typing import BinaryIO, List, Tuple, Optional, Dict, Any, Union
 from io import BytesIO
 import tiktoken
 
 logger = logging.getLogger(__name__)
 
+# File contents, or the path of a file holding them (e.g. a spooled upload)
+Source = Union[bytes, str, os.PathLike]
+
+
+def open_source(source: Source) -> BinaryIO:
+    """Binary stream over `source`; close it (or use `with`) when done"""
+    if isinstance(source, (bytes, bytearray)):
+        return BytesIO(source)
+    return open(source, 'rb')
+
 
 class TextPreprocessor:
     """Preprocesses text for better chunking and embedding"""
@@ -23,11 +35,16 @@ class TextPreprocessor:
         # Remove extra whitespace
         text = re.sub(r'\s+', ' ', text)
         # Remove control characters
-        text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
+        text = TextPreprocessor.strip_control_chars(text)
         # Remove URLs if needed (optional)
         text = re.sub(r'http\S+|www\S+', '', text)
         return text.strip()
     
+    @staticmethod
+    def strip_control_chars(text: str) -> str:
+        """Drop control characters other than newline and tab"""
+        return ''.join(char for char in text if ord(char) >= 32 or char in '\n\t')
+    
     @staticmethod
     def split_by_paragraphs(text: str) -> List[str]:
         """Split text into paragraphs"""
@@ -180,17 +197,17 @@ class AdvancedDocumentProcessor:
         self.preprocessor = TextPreprocessor()
     
     @staticmethod
-    async def extract_text_from_pdf(file_content: bytes) -> str:
+    async def extract_text_from_pdf(file_content: Source) -> str:
         """Extract text from PDF with better handling"""
         try:
-            pdf_file = BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                # Add metadata about page
-                text += f"\n[Page {page_num + 1}]\n{page_text}\n"
+            with open_source(file_content) as pdf_file:
+                pdf_reader = PyPDF2.PdfReader(pdf_file)
+                text = ""
+                
+                for page_num, page in enumerate(pdf_reader.pages):
+                    page_text = page.extract_text()
+                    # Add metadata about page
+                    text += f"\n[Page {page_num + 1}]\n{page_text}\n"
             
             return text
         except Exception as e:
@@ -198,11 +215,11 @@ class AdvancedDocumentProcessor:
             raise ValueError(f"Failed to extract PDF content: {str(e)}")
     
     @staticmethod
-    async def extract_text_from_docx(file_content: bytes) -> str:
+    async def extract_text_from_docx(file_content: Source) -> str:
         """Extract text from DOCX"""
         try:
-            docx_file = BytesIO(file_content)
-            doc = docx.Document(docx_file)
+            with open_source(file_content) as docx_file:
+                doc = docx.Document(docx_file)
             text = ""
             
             for para in doc.paragraphs:
@@ -215,18 +232,25 @@ class AdvancedDocumentProcessor:
             raise ValueError(f"Failed to extract DOCX content: {str(e)}")
     
     @staticmethod
-    async def extract_text_from_txt(file_content: bytes) -> str:
+    async def extract_text_from_txt(file_content: Source) -> str:
         """Extract text from TXT"""
         try:
-            text = file_content.decode('utf-8', errors='ignore')
+            if isinstance(file_content, (bytes, bytearray)):
+                return file_content.decode('utf-8', errors='ignore')
+            # Decode straight from the page cache instead of reading into a bytes copy
+            with open(file_content, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return ""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    text = str(mapped, 'utf-8', errors='ignore')
             return text
         except Exception as e:
             logger.error(f"TXT extraction error: {e}")
             raise ValueError(f"Failed to extract TXT content: {str(e)}")
     
-    async def process_file(self, file_content: bytes, filename: str) -> Tuple[str, str]:
+    async def process_file(self, file_content: Source, filename: str) -> Tuple[str, str]:
         """
-        Process file and return (extracted_text, file_type)
+        Process file contents or a file path and return (extracted_text, file_type)
         """
         file_ext = filename.lower().split('.')[-1]
         
@@ -249,7 +273,7 @@ class AdvancedDocumentProcessor:
     
     async def process_file_for_rag(
         self,
-        file_content: bytes,
+        file_content: Source,
         filename: str,
         chunking_strategy: str = "semantic"
     ) -> Tuple[List[Dict[str, Any]], str]:
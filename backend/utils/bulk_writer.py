@@ -0,0 +1,136 @@
+"""
+Bulk loading of RAG chunks and embeddings
+Streams rows into Postgres with `COPY ... FROM STDIN (FORMAT binary)` from
+any iterable, so a document's chunks and embeddings are never rendered into
+one large SQL string and BYTEA vectors are sent as raw bytes instead of
+escaped text. The caller owns the transaction: write chunks, embeddings and
+the document status, then commit once.
+"""
+
+import json
+import logging
+import struct
+from typing import Any, Callable, Dict, Iterable, Iterator, Sequence, Tuple
+from backend.utils.telemetry import increment, span
+
+logger = logging.getLogger(__name__)
+
+_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_TRAILER = struct.pack("!h", -1)
+_NULL = struct.pack("!i", -1)
+
+
+def _int4(value: Any) -> bytes:
+    return struct.pack("!i", int(value))
+
+
+def _text(value: Any) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else str(value).encode("utf-8")
+
+
+def _bytea(value: Any) -> bytes:
+    return bytes(value)
+
+
+def _jsonb(value: Any) -> bytes:
+    # jsonb's binary format is a version byte followed by the JSON text
+    return b"\x01" + (value if isinstance(value, str) else json.dumps(value)).encode("utf-8")
+
+
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {"int4": _int4, "text": _text, "bytea": _bytea, "jsonb": _jsonb}
+
+# (column, binary type) in the order rows are given
+CHUNK_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("organization_id", "int4"),
+    ("chunk_id", "text"),
+    ("document_id", "text"),
+    ("content", "text"),
+    ("chunk_index", "int4"),
+    ("start_char", "int4"),
+    ("end_char", "int4"),
+    ("tokens_count", "int4"),
+    ("metadata", "jsonb"),
+    ("sentence_spans", "bytea"),
+    ("sentence_embeddings", "bytea"),
+)
+EMBEDDING_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("organization_id", "int4"),
+    ("embedding_id", "text"),
+    ("chunk_id", "text"),
+    ("document_id", "text"),
+    ("user_id", "int4"),
+    ("embedding", "bytea"),
+    ("embedding_model", "text"),
+)
+
+
+class _CopyStream:
+    """File-like reader producing PGCOPY binary data from rows on demand"""
+
+    def __init__(self, rows: Iterable[Sequence[Any]], encoders: Sequence[Callable[[Any], bytes]]):
+        self._rows: Iterator[Sequence[Any]] = iter(rows)
+        self._encoders = encoders
+        self._field_count = struct.pack("!h", len(encoders))
+        self._buffer = bytearray(_HEADER)
+        self._done = False
+        self.rows = 0
+
+    def _encode(self, row: Sequence[Any]):
+        if len(row) != len(self._encoders):
+            raise ValueError(f"Expected {len(self._encoders)} fields, got {len(row)}")
+        buffer = self._buffer
+        buffer += self._field_count
+        for value, encode in zip(row, self._encoders):
+            if value is None:
+                buffer += _NULL
+            else:
+                data = encode(value)
+                buffer += struct.pack("!i", len(data))
+                buffer += data
+        self.rows += 1
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._done and (size < 0 or len(self._buffer) < size):
+            row = next(self._rows, None)
+            if row is None:
+                self._buffer += _TRAILER
+                self._done = True
+            else:
+                self._encode(row)
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+
+def copy_rows(cursor, table: str, columns: Sequence[Tuple[str, str]], rows: Iterable[Sequence[Any]]) -> int:
+    """COPY `rows` into `table`; returns the number of rows written.
+
+    `columns` lists (name, type) pairs with type one of int4, text, bytea or
+    jsonb, matching the order of each row's fields. Does not commit.
+    """
+    stream = _CopyStream(rows, [ENCODERS[kind] for _, kind in columns])
+    column_list = ", ".join(name for name, _ in columns)
+    with span("bulk_copy"):
+        cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN WITH (FORMAT binary)", stream)
+    increment("rag_bulk_rows_total", stream.rows, help="Rows written by COPY bulk loads", table=table)
+    return stream.rows
+
+
+def write_chunks_and_embeddings(
+    cursor,
+    chunk_rows: Iterable[Sequence[Any]],
+    embedding_rows: Iterable[Sequence[Any]],
+    chunk_table: str = "rag_document_chunks",
+    embedding_table: str = "rag_embeddings"
+) -> Tuple[int, int]:
+    """COPY a document's chunks, then its embeddings, in the cursor's open transaction.
+
+    Rows follow CHUNK_COLUMNS and EMBEDDING_COLUMNS. Returns (chunks, embeddings).
+    """
+    chunks = copy_rows(cursor, chunk_table, CHUNK_COLUMNS, chunk_rows)
+    embeddings = copy_rows(cursor, embedding_table, EMBEDDING_COLUMNS, embedding_rows)
+    return chunks, embeddings
@@ -0,0 +1,147 @@
+"""
+In-process caching utilities
+Thread-safe LRU cache with optional time-to-live, optional byte bound and
+hit/miss accounting.
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from backend.utils.telemetry import registry
+
+_MISSING = object()
+_caches: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries optionally expire after `ttl_seconds`.
+
+    With `max_bytes` set, `sizeof(value)` is charged per entry and least
+    recently used entries are evicted until the total fits; a single value
+    larger than `max_bytes` is not cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        name: str = "cache",
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= now:
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self._sizeof(value) if self.max_bytes is not None and self._sizeof is not None else 0
+        with self._lock:
+            old = self._data.pop(key, _MISSING)
+            if old is not _MISSING:
+                self._bytes -= old[2]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, calling `loader` on a miss.
+
+        `None` results are not cached so that missing rows are re-checked.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+            if entry is _MISSING:
+                return False
+            self._bytes -= entry[2]
+            return True
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        with self._lock:
+            keys = [k for k, (v, _, _) in self._data.items() if predicate(k, v)]
+            for k in keys:
+                self._bytes -= self._data.pop(k)[2]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _cache_metrics() -> List[str]:
+    """Exposition lines for every live TTLCache"""
+    lines = []
+    for metric, kind in (
+        ("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge"), ("bytes", "gauge")
+    ):
+        name = f"cache_{metric}_total" if kind == "counter" else f"cache_{metric}"
+        lines.append(f"# TYPE {name} {kind}")
+        for cache in list(_caches):
+            lines.append(f'{name}{{cache="{cache.name}"}} {cache.stats()[metric]}')
+    return lines
+
+
+registry.register_collector(_cache_metrics)
@@ -0,0 +1,166 @@
+"""
+Negotiated response compression
+ASGI middleware that compresses response bodies with brotli or gzip,
+whichever the client prefers in Accept-Encoding (brotli when both rank the
+same and the `brotli` package is installed). Bodies below `minimum_size`
+are sent unchanged: the first chunks are held back until the threshold is
+reached, so streamed responses are judged by their size too. Event streams
+and already-encoded responses pass through untouched.
+"""
+
+import logging
+import zlib
+from typing import Dict, List, Optional
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Never compressed: streams need every event flushed as it happens
+PASSTHROUGH_TYPES = ("text/event-stream",)
+# Larger chunks are compressed in a worker thread instead of on the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding for an Accept-Encoding header, or None"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Gzip:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressor(self, encoding: str):
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.compressor = None
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message.get("headers", []))
+            if (
+                "content-encoding" in headers
+                or headers.get("content-type", "").startswith(PASSTHROUGH_TYPES)
+                or message["status"] in (204, 304)
+            ):
+                self.passthrough = True
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is not None:
+            data = await self._compress(body)
+            if not more_body:
+                data += self.compressor.finish()
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        # Hold chunks back until the body is known to reach the threshold
+        self.pending.append(body)
+        self.pending_size += len(body)
+        if self.pending_size < self.middleware.minimum_size:
+            if more_body:
+                return
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": b"".join(self.pending), "more_body": False})
+            return
+
+        self.compressor = self.middleware.compressor(self.encoding)
+        data = await self._compress(b"".join(self.pending))
+        self.pending = []
+        headers = MutableHeaders(scope=self.start)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            data += self.compressor.finish()
+            headers["Content-Length"] = str(len(data))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _compress(self, data: bytes) -> bytes:
+        if len(data) >= OFFLOAD_BYTES:
+            return await anyio.to_thread.run_sync(self.compressor.compress, data)
+        return self.compressor.compress(data)
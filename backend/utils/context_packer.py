@@ -0,0 +1,144 @@
+"""
+Context packing for LLM prompts
+Fits retrieved chunks into a token budget: text repeated by the overlap of
+neighbouring chunks of the same document is removed, whole chunks are taken
+in rank order while they fit, and the rest of the budget is filled with the
+sentences of the remaining chunks that best match the question.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List
+from backend.utils.advanced_processor import TextPreprocessor
+from backend.utils.telemetry import increment
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = "\n\n"
+# Below this many tokens of headroom, extractive filling is not worth it
+MIN_FILL_TOKENS = 16
+
+
+def _suffix_prefix_overlap(left: str, right: str, min_chars: int) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`"""
+    if len(left) < min_chars or len(right) < min_chars:
+        return 0
+    anchor = right[:min_chars]
+    best = 0
+    pos = left.find(anchor, max(len(left) - len(right), 0))
+    while pos != -1:
+        length = len(left) - pos
+        if right.startswith(left[pos:]):
+            best = length
+            break  # earliest match is the longest
+        pos = left.find(anchor, pos + 1)
+    return best
+
+
+def dedupe_overlaps(chunks: List[Dict[str, Any]], min_overlap_chars: int = 30) -> List[Dict[str, Any]]:
+    """Trim text shared with already-kept chunks of the same document.
+
+    Chunks are processed in rank order; a chunk fully contained in a kept
+    chunk is dropped, otherwise any prefix repeating the end of a kept chunk
+    (or suffix repeating its start) is cut. Returned chunks are shallow
+    copies with `content` replaced and `trimmed` set.
+    """
+    kept: List[Dict[str, Any]] = []
+    by_document: Dict[Any, List[str]] = {}
+    for chunk in chunks:
+        content = (chunk.get("content") or "").strip()
+        if not content:
+            continue
+        siblings = by_document.setdefault(chunk.get("document_id"), [])
+        if any(content in other for other in siblings):
+            continue
+        original_length = len(content)
+        for other in siblings:
+            head = _suffix_prefix_overlap(other, content, min_overlap_chars)
+            if head:
+                content = content[head:].strip()
+            tail = _suffix_prefix_overlap(content, other, min_overlap_chars)
+            if tail:
+                content = content[:len(content) - tail].strip()
+            if not content:
+                break
+        if not content:
+            continue
+        siblings.append(content)
+        kept.append({**chunk, "content": content, "trimmed": len(content) != original_length})
+    return kept
+
+
+def _question_terms(question: str) -> set:
+    return {w for w in re.findall(r"\w+", question.lower()) if len(w) > 3}
+
+
+def select_sentences(question: str, texts: List[str], token_budget: int) -> List[str]:
+    """Highest-scoring sentences of `texts` that fit `token_budget`, in their original order"""
+    terms = _question_terms(question)
+    candidates = []
+    for text in texts:
+        for sentence in TextPreprocessor.split_by_sentences(text):
+            if len(sentence) < 20:
+                continue
+            lower = sentence.lower()
+            score = sum(1 for term in terms if term in lower)
+            if score:
+                candidates.append((score, len(candidates), sentence))
+
+    selected = []
+    used = 0
+    for score, position, sentence in sorted(candidates, key=lambda c: (-c[0], c[1])):
+        tokens = TextPreprocessor.count_tokens(sentence)
+        if used + tokens > token_budget:
+            continue
+        selected.append((position, sentence))
+        used += tokens
+    return [sentence for _, sentence in sorted(selected)]
+
+
+def pack_context(
+    question: str,
+    chunks: List[Dict[str, Any]],
+    token_budget: int,
+    min_overlap_chars: int = 30
+) -> Dict[str, Any]:
+    """Build the prompt context for `question` from ranked `chunks`.
+
+    Returns a dict with the packed `text`, its estimated `tokens`, and counts
+    of whole chunks used, chunks trimmed for overlap and sentences extracted.
+    """
+    pieces = dedupe_overlaps(chunks, min_overlap_chars)
+    parts: List[str] = []
+    used = 0
+    overflow: List[str] = []
+    for piece in pieces:
+        if overflow:
+            overflow.append(piece["content"])
+            continue
+        tokens = TextPreprocessor.count_tokens(piece["content"])
+        if used + tokens <= token_budget:
+            parts.append(piece["content"])
+            used += tokens
+        else:
+            overflow.append(piece["content"])
+
+    sentences: List[str] = []
+    if overflow and token_budget - used >= MIN_FILL_TOKENS:
+        sentences = select_sentences(question, overflow, token_budget - used)
+        if sentences:
+            block = " ".join(sentences)
+            parts.append(block)
+            used += TextPreprocessor.count_tokens(block)
+
+    total_in = sum(len(c.get("content") or "") for c in chunks)
+    text = SEPARATOR.join(parts)
+    increment("rag_context_chars_total", total_in, help="Characters of retrieved context before and after packing", stage="retrieved")
+    increment("rag_context_chars_total", len(text), help="Characters of retrieved context before and after packing", stage="packed")
+    return {
+        "text": text,
+        "tokens": used,
+        "chunks_used": len(parts) - (1 if sentences else 0),
+        "chunks_trimmed": sum(1 for p in pieces if p["trimmed"]),
+        "sentences_selected": len(sentences),
+    }
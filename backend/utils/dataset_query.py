@@ -0,0 +1,350 @@
+"""
+Aggregation and downsampling over stored analytics datasets
+Runs filters, group-by aggregates and time bucketing with vectorized
+pandas/NumPy, and reduces line series to at most N points with the
+Largest-Triangle-Three-Buckets algorithm. Results are cached per
+(dataset version, query).
+"""
+
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from backend.config import settings
+from backend.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+AGGREGATIONS = ('sum', 'mean', 'min', 'max', 'count', 'median')
+FILTER_OPS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+LIST_OPS = ('in', 'not in')
+TIME_BUCKETS = {
+    'minute': 'min',
+    'hour': 'h',
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+    'quarter': 'Q',
+    'year': 'Y'
+}
+
+def _result_bytes(result: Dict[str, Any]) -> int:
+    """Rough in-memory size of a query result, extrapolated from its first row"""
+    rows = result.get("rows") or []
+    if not rows:
+        return 1024
+    first = rows[0]
+    row_bytes = sys.getsizeof(first) + sum(sys.getsizeof(v) for v in first.values())
+    return sys.getsizeof(rows) + len(rows) * row_bytes
+
+
+dataset_query_cache = TTLCache(
+    max_entries=settings.DATASET_QUERY_CACHE_SIZE,
+    ttl_seconds=None,  # keys carry the dataset version, so entries never go stale
+    name="dataset_query",
+    max_bytes=settings.DATASET_QUERY_CACHE_MB * 1024 * 1024,
+    sizeof=_result_bytes
+)
+
+
+class DatasetQueryError(ValueError):
+    """Query references unknown columns or unsupported operations"""
+
+
+def _metric_alias(metric: Dict[str, Any]) -> str:
+    if metric.get("alias"):
+        return metric["alias"]
+    return f"{metric['agg']}_{metric['column']}" if metric.get("column") else "count"
+
+
+def _needed_columns(query: Dict[str, Any]) -> List[str]:
+    columns = list(query.get("group_by") or [])
+    columns += [f["column"] for f in query.get("filters") or []]
+    columns += [m["column"] for m in query.get("metrics") or [] if m.get("column")]
+    aliases = {_metric_alias(m) for m in query.get("metrics") or []}
+    for key in ("time_column", "x_column", "y_column"):
+        # x/y may name an aggregate output rather than a source column
+        if query.get(key) and query[key] not in aliases:
+            columns.append(query[key])
+    return list(dict.fromkeys(columns))
+
+
+def _validate(query: Dict[str, Any], available: List[str]):
+    missing = [c for c in _needed_columns(query) if c not in available]
+    if missing:
+        raise DatasetQueryError(f"Unknown column(s): {', '.join(missing)}")
+    for f in query.get("filters") or []:
+        if f["op"] not in FILTER_OPS:
+            raise DatasetQueryError(f"Unsupported filter operator: {f['op']}")
+        problem = filter_value_error(f["op"], f["value"])
+        if problem:
+            raise DatasetQueryError(problem)
+    for m in query.get("metrics") or []:
+        if m["agg"] not in AGGREGATIONS:
+            raise DatasetQueryError(f"Unsupported aggregation: {m['agg']}")
+    if query.get("time_bucket") and query["time_bucket"] not in TIME_BUCKETS:
+        raise DatasetQueryError(f"Unsupported time bucket: {query['time_bucket']}")
+    if query.get("time_bucket") and not query.get("time_column"):
+        raise DatasetQueryError("time_bucket requires time_column")
+
+
+def filter_value_error(op: str, value: Any) -> Optional[str]:
+    """Why `value` can't be used with `op`, or None if it can"""
+    if op in LIST_OPS and not isinstance(value, list):
+        return f"'{op}' filters take a list of values"
+    if op not in LIST_OPS and isinstance(value, list):
+        return f"'{op}' filters take a single value"
+    if value is None and op not in ('==', '!='):
+        return f"'{op}' filters can't compare with null"
+    return None
+
+
+def _pushdown_filters(filters: List[dict], schema) -> Optional[pc.Expression]:
+    """Translate filters for pyarrow so non-matching row groups are skipped.
+
+    A null value means IS NULL (==) or IS NOT NULL (!=). As in `apply_filters`,
+    `!=` and `not in` keep rows whose column is null. Filters whose value can't
+    be cast to the column type, and lists holding null, are left to pandas.
+    """
+    pushed = []
+    for f in filters or []:
+        if f["value"] is None:
+            is_null = pc.field(f["column"]).is_null()
+            pushed.append(is_null if f["op"] == '==' else ~is_null)
+            continue
+        column_type = schema.field(f["column"]).type
+        is_numeric = pa.types.is_integer(column_type) or pa.types.is_floating(column_type)
+        cast = float if is_numeric else str
+        values = f["value"] if isinstance(f["value"], list) else [f["value"]]
+        if any(v is None for v in values):
+            continue
+        try:
+            value = [cast(v) for v in values] if isinstance(f["value"], list) else cast(f["value"])
+        except (TypeError, ValueError):
+            continue
+        condition = pq.filters_to_expression([(f["column"], f["op"], value)])
+        if f["op"] == '!=':
+            # Arrow comparisons drop nulls; pandas `!=` (and `not in` in both) keeps them
+            condition = condition | pc.field(f["column"]).is_null()
+        pushed.append(condition)
+    if not pushed:
+        return None
+    expression = pushed[0]
+    for condition in pushed[1:]:
+        expression = expression & condition
+    return expression
+
+
+def load_frame(path: str, query: Dict[str, Any]) -> pd.DataFrame:
+    """Read only the columns (and row groups) the query touches"""
+    schema = pq.ParquetFile(path).schema_arrow
+    _validate(query, schema.names)
+    columns = _needed_columns(query) or schema.names
+    table = pq.read_table(path, columns=columns, filters=_pushdown_filters(query.get("filters"), schema))
+    return table.to_pandas()
+
+
+def _coerce(series: pd.Series, value: Any) -> Any:
+    """Match filter values to the column dtype (query values arrive as JSON); nulls stay None"""
+    if isinstance(value, list):
+        return [_coerce(series, v) for v in value]
+    if value is None:
+        return None
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(value, errors='coerce')
+    return str(value)
+
+
+def apply_filters(frame: pd.DataFrame, filters: List[dict]) -> pd.DataFrame:
+    if not filters:
+        return frame
+    mask = np.ones(len(frame), dtype=bool)
+    for f in filters:
+        series = frame[f["column"]]
+        value = _coerce(series, f["value"])
+        op = f["op"]
+        if op in LIST_OPS:
+            matches = series.isin([v for v in value if v is not None])
+            if None in value:
+                matches |= series.isna()
+            mask &= (matches if op == 'in' else ~matches).to_numpy()
+        elif value is None:
+            mask &= (series.isna() if op == '==' else series.notna()).to_numpy()
+        elif op == '==':
+            mask &= (series == value).to_numpy()
+        elif op == '!=':
+            mask &= (series != value).to_numpy()
+        elif op == '<':
+            mask &= (series < value).to_numpy()
+        elif op == '<=':
+            mask &= (series <= value).to_numpy()
+        elif op == '>':
+            mask &= (series > value).to_numpy()
+        elif op == '>=':
+            mask &= (series >= value).to_numpy()
+    return frame[mask]
+
+
+def _bucket_times(series: pd.Series, bucket: str) -> pd.Series:
+    times = pd.to_datetime(series, errors='coerce')
+    freq = TIME_BUCKETS[bucket]
+    if freq in ('min', 'h', 'D'):
+        return times.dt.floor(freq)
+    return times.dt.to_period(freq).dt.start_time
+
+
+def aggregate(frame: pd.DataFrame, query: Dict[str, Any]) -> pd.DataFrame:
+    """Group by `group_by` (and the time bucket) and compute the metrics"""
+    keys = list(query.get("group_by") or [])
+    time_column = query.get("time_column")
+    if query.get("time_bucket"):
+        frame = frame.assign(**{time_column: _bucket_times(frame[time_column], query["time_bucket"])})
+        if time_column not in keys:
+            keys.insert(0, time_column)
+
+    metrics = query.get("metrics") or []
+    named = {}
+    for m in metrics:
+        column = m.get("column")
+        alias = _metric_alias(m)
+        if m["agg"] == 'count' and not column:
+            named[alias] = (keys[0] if keys else frame.columns[0], 'size')
+        else:
+            named[alias] = (column, m["agg"])
+
+    if not keys:
+        row = {alias: frame[col].agg(func) if func != 'size' else len(frame) for alias, (col, func) in named.items()}
+        return pd.DataFrame([row])
+
+    grouped = frame.groupby(keys, sort=True, dropna=True)
+    result = grouped.agg(**named) if named else grouped.size().to_frame("count")
+    result = result.reset_index()
+
+    order_by = query.get("order_by")
+    if order_by and order_by in result.columns:
+        result = result.sort_values(order_by, ascending=not query.get("descending", False))
+    return result
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    `x` must be sorted ascending. Always keeps the first and last point.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("LTTB needs a threshold of at least 3 points")
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    # Interior points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(frame: pd.DataFrame, x_column: Optional[str], y_column: str, max_points: int) -> pd.DataFrame:
+    """Reduce a line series to at most `max_points` rows with LTTB"""
+    frame = frame[frame[y_column].notna()]
+    if x_column:
+        frame = frame[frame[x_column].notna()].sort_values(x_column, kind='stable')
+    if len(frame) <= max_points:
+        return frame
+
+    y = frame[y_column].to_numpy(dtype=np.float64)
+    if x_column and pd.api.types.is_datetime64_any_dtype(frame[x_column]):
+        x = frame[x_column].astype('int64').to_numpy(dtype=np.float64)
+    elif x_column and pd.api.types.is_numeric_dtype(frame[x_column]):
+        x = frame[x_column].to_numpy(dtype=np.float64)
+    else:
+        # Categorical x axis: keep file order and use the row position
+        x = np.arange(len(frame), dtype=np.float64)
+    return frame.iloc[lttb(x, y, max_points)]
+
+
+def _to_records(frame: pd.DataFrame) -> List[dict]:
+    frame = frame.replace([np.inf, -np.inf], np.nan)
+    for col in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[col]):
+            frame[col] = frame[col].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    frame = frame.astype(object).where(pd.notna(frame), None)
+    return frame.to_dict('records')
+
+
+def execute(frame: pd.DataFrame, query: Dict[str, Any]) -> Dict[str, Any]:
+    """Filter, aggregate and downsample an in-memory frame"""
+    _validate(query, list(frame.columns))
+    source_rows = len(frame)
+    frame = apply_filters(frame, query.get("filters"))
+    matched_rows = len(frame)
+
+    if query.get("metrics") or query.get("group_by") or query.get("time_bucket"):
+        frame = aggregate(frame, query)
+
+    downsampled = False
+    max_points = query.get("max_points")
+    y_column = query.get("y_column")
+    if max_points and y_column and y_column in frame.columns and len(frame) > max_points:
+        x_column = query.get("x_column")
+        if query.get("time_bucket") and not x_column:
+            x_column = query.get("time_column")
+        frame = downsample(frame, x_column if x_column in frame.columns else None, y_column, max_points)
+        downsampled = True
+
+    limit = query.get("limit") or settings.ANALYTICS_MAX_ROWS_PER_READ
+    truncated = len(frame) > limit
+    frame = frame.head(limit)
+    return {
+        "columns": [str(c) for c in frame.columns],
+        "rows": _to_records(frame),
+        "row_count": len(frame),
+        "matched_rows": matched_rows,
+        "source_rows": source_rows,
+        "downsampled": downsampled,
+        "truncated": truncated
+    }
+
+
+def cache_key(dataset_key: Any, version: int, query: Dict[str, Any]) -> tuple:
+    return (dataset_key, version, json.dumps(query, sort_keys=True, default=str))
+
+
+def run_query(path: str, version: int, query: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute `query` against a stored Parquet dataset, memoized per version"""
+    key = cache_key(path, version, query)
+    cached = dataset_query_cache.get(key)
+    if cached is not None:
+        return cached
+    result = execute(load_frame(path, query), query)
+    dataset_query_cache.set(key, result)
+    return result
+
+
+def run_inline_query(dataset_key: Any, version: int, rows: List[dict], query: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute `query` against a legacy dataset stored inline in the database"""
+    key = cache_key(dataset_key, version, query)
+    cached = dataset_query_cache.get(key)
+    if cached is not None:
+        return cached
+    result = execute(pd.DataFrame.from_records(rows), query)
+    dataset_query_cache.set(key, result)
+    return result
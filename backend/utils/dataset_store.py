@@ -0,0 +1,269 @@
+"""
+Columnar storage for uploaded analytics datasets
+Parses CSV/Excel uploads in bounded chunks and persists them as Parquet files,
+so reads can project columns and slice rows without loading the whole dataset.
+"""
+
+import logging
+import os
+import uuid
+from typing import BinaryIO, Dict, Iterator, List, Optional, Any
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('csv', 'xlsx', 'xls')
+STORAGE_FORMAT = 'parquet'
+
+
+def _dataset_dir(user_id) -> str:
+    path = os.path.join(settings.ANALYTICS_DATA_DIR, str(user_id))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _iter_xlsx(file_obj: BinaryIO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Stream the first worksheet in row batches (openpyxl read-only mode)"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise pd.errors.EmptyDataError("No columns to parse from file")
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        width = len(columns)
+        batch = []
+        for row in rows:
+            batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_frames(file_obj: BinaryIO, file_ext: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Yield the uploaded sheet as DataFrames of at most `chunk_rows` rows"""
+    if file_ext == 'csv':
+        yield from pd.read_csv(file_obj, chunksize=chunk_rows)
+    elif file_ext == 'xlsx':
+        yield from _iter_xlsx(file_obj, chunk_rows)
+    elif file_ext == 'xls':
+        # Legacy .xls has no streaming reader; split after parsing
+        frame = pd.read_excel(file_obj)
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+    else:
+        raise ValueError(f"Unsupported file type: {file_ext}")
+
+
+def _column_type(series: pd.Series) -> Optional[pa.DataType]:
+    """Storage type of one chunk's column: int64, float64 (also booleans) or
+    string; None when the chunk has no values to go on"""
+    values = series.dropna()
+    if values.empty:
+        return None
+    if pd.api.types.is_bool_dtype(series):
+        return pa.float64()
+    if pd.api.types.is_integer_dtype(series):
+        return pa.int64()
+    if pd.api.types.is_numeric_dtype(series):
+        # Integer columns with blanks are read as float
+        finite = values[np.isfinite(values)]
+        if len(finite) == len(values) and (finite % 1 == 0).all() and finite.abs().max() < 2 ** 53:
+            return pa.int64()
+        return pa.float64()
+    return pa.string()
+
+
+def _widest(current: Optional[pa.DataType], chunk: Optional[pa.DataType]) -> Optional[pa.DataType]:
+    """Type holding both: int64 widens to float64, any mix with text to string"""
+    if current is None or chunk is None or current == chunk:
+        return current or chunk
+    if pa.types.is_string(current) or pa.types.is_string(chunk):
+        return pa.string()
+    return pa.float64()
+
+
+def _infer_schema(frame: pd.DataFrame, schema: Optional[pa.Schema] = None) -> pa.Schema:
+    """Schema for `frame`, or `schema` widened so `frame` fits it.
+
+    Columns without any value yet stay float64 until a chunk says otherwise.
+    """
+    frame = frame.rename(columns=str)
+    current = {f.name: f.type for f in schema} if schema is not None else {}
+    names = list(schema.names) if schema is not None else list(frame.columns)
+    fields = []
+    for name in names:
+        seen = current.get(name)
+        chunk = _column_type(frame[name]) if name in frame.columns else None
+        fields.append(pa.field(name, _widest(seen, chunk) or pa.float64()))
+    return pa.schema(fields)
+
+
+def _is_numeric(data_type: pa.DataType) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def _to_table(frame: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Convert a chunk to the dataset schema (already widened to fit it)"""
+    frame = frame.rename(columns=str)
+    arrays = []
+    for field in schema:
+        if field.name in frame.columns:
+            series = frame[field.name]
+        else:
+            series = pd.Series([None] * len(frame), dtype=object)
+        if _is_numeric(field.type):
+            values = pd.to_numeric(series, errors='coerce').astype('float64')
+            values = values.replace([np.inf, -np.inf], np.nan)
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        else:
+            values = series.astype(object).where(pd.notna(series), None)
+            arrays.append(pa.array([v if v is None else _as_text(v) for v in values], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _as_text(value: Any) -> str:
+    """Numbers as pyarrow casts them, so widened row groups and later ones agree ("2", not "2.0")"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _rewrite(path: str, schema: pa.Schema) -> pq.ParquetWriter:
+    """Re-encode the row groups written so far with the widened `schema` and
+    return a writer positioned after them"""
+    old_path = f"{path}.old"
+    os.replace(path, old_path)
+    try:
+        writer = pq.ParquetWriter(path, schema, compression='zstd')
+        try:
+            old = pq.ParquetFile(old_path)
+            for i in range(old.num_row_groups):
+                writer.write_table(old.read_row_group(i).cast(schema))
+        except Exception:
+            writer.close()
+            raise
+    finally:
+        os.remove(old_path)
+    return writer
+
+
+def write_dataset(file_obj: BinaryIO, file_ext: str, user_id, preview_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Parse an uploaded CSV/Excel file chunk by chunk into a Parquet file.
+
+    Only one chunk is held in memory at a time; each chunk becomes a Parquet
+    row group. The schema comes from the first chunk; when a later chunk
+    doesn't fit it (text in a numeric column, decimals in an integer one)
+    the column is widened and the row groups already written are re-encoded.
+
+    Returns:
+        Column metadata, row count, storage path and the first `preview_rows` rows
+    """
+    chunk_rows = settings.ANALYTICS_PARSE_CHUNK_ROWS
+    preview_rows = settings.ANALYTICS_PREVIEW_ROWS if preview_rows is None else preview_rows
+    path = os.path.join(_dataset_dir(user_id), f"{uuid.uuid4()}.{STORAGE_FORMAT}")
+    tmp_path = f"{path}.tmp"
+
+    writer = None
+    schema = None
+    row_count = 0
+    try:
+        for frame in iter_frames(file_obj, file_ext, chunk_rows):
+            if writer is None:
+                schema = _infer_schema(frame)
+                writer = pq.ParquetWriter(tmp_path, schema, compression='zstd')
+            else:
+                widened = _infer_schema(frame, schema)
+                if not widened.equals(schema):
+                    logger.info(f"Widening dataset columns after {row_count} rows: {schema} -> {widened}")
+                    schema = widened
+                    writer.close()
+                    writer = None
+                    writer = _rewrite(tmp_path, schema)
+            table = _to_table(frame, schema)
+            writer.write_table(table)
+            row_count += table.num_rows
+
+        if writer is None:
+            raise pd.errors.EmptyDataError("No columns to parse from file")
+        writer.close()
+        writer = None
+        os.replace(tmp_path, path)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    columns = schema.names
+    numeric_columns = [f.name for f in schema if _is_numeric(f.type)]
+    text_columns = [f.name for f in schema if not _is_numeric(f.type)]
+    logger.info(f"Stored analytics dataset {path}: {row_count} rows, {len(columns)} columns")
+
+    return {
+        "storage_path": path,
+        "storage_format": STORAGE_FORMAT,
+        "columns": columns,
+        "numeric_columns": numeric_columns,
+        "text_columns": text_columns,
+        "label_column": text_columns[0] if text_columns else None,
+        "row_count": row_count,
+        # Read back rather than kept from the first chunk, which may predate a widening
+        "preview": read_rows(path, limit=preview_rows) if preview_rows else []
+    }
+
+
+def _projection(parquet_file: pq.ParquetFile, columns: Optional[List[str]]) -> Optional[List[str]]:
+    if not columns:
+        return None
+    available = set(parquet_file.schema_arrow.names)
+    return [c for c in columns if c in available]
+
+
+def read_rows(path: str, columns: Optional[List[str]] = None, offset: int = 0, limit: int = 100) -> List[dict]:
+    """Read rows [offset, offset + limit) of the projected columns.
+
+    Only the row groups overlapping the slice are decoded.
+    """
+    parquet_file = pq.ParquetFile(path)
+    projection = _projection(parquet_file, columns)
+    rows: List[dict] = []
+    group_start = 0
+    for i in range(parquet_file.num_row_groups):
+        group_rows = parquet_file.metadata.row_group(i).num_rows
+        if len(rows) >= limit:
+            break
+        if group_start + group_rows <= offset:
+            group_start += group_rows
+            continue
+        table = parquet_file.read_row_group(i, columns=projection)
+        local_offset = max(offset - group_start, 0)
+        rows.extend(table.slice(local_offset, limit - len(rows)).to_pylist())
+        group_start += group_rows
+    return rows
+
+
+def delete_dataset(path: Optional[str]):
+    """Remove a stored dataset file, ignoring paths outside the data directory"""
+    if not path:
+        return
+    data_dir = os.path.realpath(settings.ANALYTICS_DATA_DIR)
+    real_path = os.path.realpath(path)
+    if not real_path.startswith(data_dir + os.sep):
+        logger.warning(f"Refusing to delete dataset outside data directory: {path}")
+        return
+    try:
+        os.remove(real_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,277 @@
+"""
+Shared embedding model sidecar
+uvicorn's workers are separate (spawned) processes, so each one that builds
+an EmbeddingModel holds its own copy of the SentenceTransformer weights and
+the torch runtime around them. The sidecar loads the model once and serves
+embeddings to every worker over a Unix socket; workers use
+`RemoteEmbeddingModel`, a drop-in EmbeddingModel that sends texts instead of
+encoding them. Requests arriving together from different workers are
+encoded as one batch.
+
+    python -m backend.utils.embedding_sidecar --socket /run/rag/embeddings.sock
+    EMBEDDING_SIDECAR_SOCKET=/run/rag/embeddings.sock uvicorn backend.main:app --workers 4
+
+Frames are a 4-byte big-endian length followed by the payload. Requests are
+JSON ({"op": "info"} or {"op": "embed", "texts": [...]}); replies are a JSON
+header, followed for embeddings by one frame of float32 row-major vectors.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from backend.config import settings
+from backend.utils.telemetry import increment
+from backend.utils.vector_store import EmbeddingModel
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct("!I")
+# Frames above this are refused, so a bad client can't make the sidecar allocate without bound
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+def _pack(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError("Embedding sidecar closed the connection")
+        received += count
+    return bytes(buffer)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return _recv_exactly(sock, size)
+
+
+class EmbeddingServer:
+    """Serves one model's embeddings on a Unix socket, batching concurrent requests"""
+
+    def __init__(self, model: EmbeddingModel, socket_path: str, max_batch: int = 64):
+        self.model = model
+        self.socket_path = socket_path
+        self.max_batch = max(max_batch, 1)
+        self._queue: Optional[asyncio.Queue] = None
+        # torch parallelizes each encode itself; one call at a time avoids oversubscription
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+    async def serve(self):
+        self._queue = asyncio.Queue()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        batcher = asyncio.create_task(self._batcher())
+        logger.info(f"Embedding sidecar serving {self.model.model_path} on {self.socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._executor.shutdown(wait=False)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "ok": True,
+            "model_name": self.model.model_name,
+            "model_path": self.model.model_path,
+            "dim": self.model.get_embedding_dim(),
+            "pid": os.getpid()
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                except asyncio.IncompleteReadError:
+                    break  # client went away between requests
+                if size > MAX_FRAME_BYTES:
+                    writer.write(_pack(json.dumps({"ok": False, "error": "Request too large"}).encode("utf-8")))
+                    break
+                request = json.loads(await reader.readexactly(size))
+                if request.get("op") == "info":
+                    writer.write(_pack(json.dumps(self.info()).encode("utf-8")))
+                elif request.get("op") == "embed":
+                    future = asyncio.get_running_loop().create_future()
+                    await self._queue.put((list(request.get("texts") or []), future))
+                    try:
+                        vectors = await future
+                    except Exception as e:
+                        writer.write(_pack(json.dumps({"ok": False, "error": str(e)}).encode("utf-8")))
+                    else:
+                        header = {"ok": True, "shape": list(vectors.shape)}
+                        writer.write(_pack(json.dumps(header).encode("utf-8")) + _pack(vectors.tobytes()))
+                else:
+                    writer.write(_pack(json.dumps({"ok": False, "error": f"Unknown op {request.get('op')!r}"}).encode("utf-8")))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.debug(f"Embedding client disconnected: {e}")
+        finally:
+            writer.close()
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs: List[Tuple[List[str], asyncio.Future]] = [await self._queue.get()]
+            total = len(jobs[0][0])
+            while total < self.max_batch and not self._queue.empty():
+                job = self._queue.get_nowait()
+                jobs.append(job)
+                total += len(job[0])
+            texts = [text for job_texts, _ in jobs for text in job_texts]
+            try:
+                if texts:
+                    vectors = await loop.run_in_executor(self._executor, self.model.embed_batch, texts)
+                    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+                else:
+                    vectors = np.zeros((0, self.model.get_embedding_dim()), dtype=np.float32)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+                for _, future in jobs:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            increment("embedding_sidecar_texts_total", len(texts), help="Texts embedded by the sidecar")
+            offset = 0
+            for job_texts, future in jobs:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(job_texts)])
+                offset += len(job_texts)
+
+
+class RemoteEmbeddingModel(EmbeddingModel):
+    """EmbeddingModel backed by the sidecar; holds no weights in this process.
+
+    Safe to share between threads: each thread keeps its own connection.
+    """
+
+    def __init__(self, socket_path: str, model_name: str = "all-MiniLM-L6-v2", timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._dim = 0
+        super().__init__(model_name=model_name)
+
+    def _load_model(self):
+        """Wait for the sidecar and check it serves the requested model"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                info = self._call({"op": "info"})
+                break
+            except OSError as e:
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Embedding sidecar not reachable at {self.socket_path}: {e}")
+                time.sleep(0.5)
+        if info["model_path"] != self.model_path:
+            raise RuntimeError(
+                f"Embedding sidecar at {self.socket_path} serves {info['model_path']}, expected {self.model_path}"
+            )
+        self.model = None
+        self._dim = int(info["dim"])
+        logger.info(f"Using embedding sidecar {self.socket_path} (pid {info.get('pid')}), dimension {self._dim}")
+
+    def get_embedding_dim(self) -> int:
+        return self._dim
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        increment("embedding_sidecar_requests_total", help="Embedding requests sent to the sidecar")
+        return self._call({"op": "embed", "texts": list(texts)})
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _call(self, request: Dict[str, Any]) -> Any:
+        payload = _pack(json.dumps(request).encode("utf-8"))
+        # A connection the sidecar dropped (e.g. it restarted) is replaced once
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(payload)
+                header = json.loads(_recv_frame(sock))
+                if not header.get("ok"):
+                    raise RuntimeError(f"Embedding sidecar error: {header.get('error')}")
+                if request["op"] != "embed":
+                    return header
+                rows, dim = header["shape"]
+                return np.frombuffer(_recv_frame(sock), dtype=np.float32).reshape(rows, dim)
+            except OSError:
+                self._drop_connection()
+                if attempt:
+                    raise
+
+
+def create_embedding_model(model_name: str = "all-MiniLM-L6-v2") -> EmbeddingModel:
+    """The sidecar client when EMBEDDING_SIDECAR_SOCKET is set, else an in-process model"""
+    if settings.EMBEDDING_SIDECAR_SOCKET:
+        return RemoteEmbeddingModel(
+            settings.EMBEDDING_SIDECAR_SOCKET, model_name=model_name,
+            timeout=settings.EMBEDDING_SIDECAR_TIMEOUT_SECONDS
+        )
+    return EmbeddingModel(model_name=model_name)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve embeddings to the API workers over a Unix socket")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SIDECAR_SOCKET or "/tmp/rag-embeddings.sock")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--max-batch", type=int, default=settings.EMBEDDING_BATCH_SIZE,
+                        help="Most texts encoded together when requests queue up")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    server = EmbeddingServer(EmbeddingModel(model_name=args.model, device=args.device), args.socket, args.max_batch)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
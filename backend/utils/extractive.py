@@ -0,0 +1,173 @@
+"""
+Extractive answers from sentence embeddings
+The LLM-free answer mode: each retrieved chunk's sentences are scored
+against the question embedding in one matrix product and the answer is
+built from the best ones with maximal marginal relevance (MMR), so
+near-duplicate sentences from overlapping chunks are not repeated.
+
+Sentence boundaries and embeddings are computed at ingestion and stored with
+the chunk (`sentence_spans`: int32 start/end offsets into the content,
+`sentence_embeddings`: float16 vectors in the same order). Chunks without a
+stored index (older documents, keyword-only hits, organization files) have
+their sentences embedded on the fly, unless the caller is out of time and
+asks for stored indexes only.
+"""
+
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.utils.telemetry import increment
+
+logger = logging.getLogger(__name__)
+
+# Sentence end followed by whitespace and a capital letter, which keeps most
+# abbreviations ("e.g. the") inside their sentence
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+MIN_SENTENCE_CHARS = 10
+# Sentences over this length lose some relevance: they make poor short answers
+LONG_SENTENCE_CHARS = 150
+LONG_SENTENCE_PENALTY = 0.9
+
+EmbedBatch = Callable[[List[str]], np.ndarray]
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the sentences of `text`, whitespace trimmed"""
+    spans = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+    trimmed = []
+    for start, end in spans:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end - start > MIN_SENTENCE_CHARS:
+            trimmed.append((start, end))
+    return trimmed
+
+
+def encode_sentence_index(spans: Sequence[Tuple[int, int]], embeddings: np.ndarray) -> Tuple[bytes, bytes]:
+    """Serialize a chunk's sentence index for the chunk row"""
+    return (
+        np.asarray(spans, dtype=np.int32).reshape(-1, 2).tobytes(),
+        np.asarray(embeddings, dtype=np.float16).tobytes()
+    )
+
+
+def decode_sentence_index(
+    content: str, spans_blob: Optional[bytes], embeddings_blob: Optional[bytes], dim: int
+) -> Optional[Tuple[List[str], np.ndarray]]:
+    """(sentences, float32 matrix) of a stored index, or None if absent or from another model"""
+    if spans_blob is None or embeddings_blob is None:
+        return None
+    spans = np.frombuffer(bytes(spans_blob), dtype=np.int32).reshape(-1, 2)
+    if len(embeddings_blob) != len(spans) * dim * 2:
+        return None
+    matrix = np.frombuffer(bytes(embeddings_blob), dtype=np.float16).reshape(len(spans), dim).astype(np.float32)
+    return [content[start:end] for start, end in spans], matrix
+
+
+def index_sentences(texts: List[str], embed_batch: EmbedBatch) -> List[Tuple[bytes, bytes]]:
+    """Sentence index of each of `texts`, embedding all their sentences in one batch"""
+    spans = [sentence_spans(text) for text in texts]
+    sentences = [text[start:end] for text, chunk_spans in zip(texts, spans) for start, end in chunk_spans]
+    embeddings = embed_batch(sentences) if sentences else np.zeros((0, 0), dtype=np.float32)
+    index = []
+    offset = 0
+    for chunk_spans in spans:
+        index.append(encode_sentence_index(chunk_spans, embeddings[offset:offset + len(chunk_spans)]))
+        offset += len(chunk_spans)
+    return index
+
+
+def gather_sentences(
+    chunks: Sequence[Dict[str, Any]], embed_batch: Optional[EmbedBatch], dim: int
+) -> Tuple[List[str], np.ndarray]:
+    """Sentences of `chunks` in rank order with their embeddings.
+
+    Stored indexes are used as they are; sentences of the other chunks are
+    embedded in a single batch, or left out when `embed_batch` is None.
+    Sentences repeated by chunk overlap are kept once.
+    """
+    sentences: List[str] = []
+    blocks: List[Optional[np.ndarray]] = []
+    missing: List[str] = []
+    seen = set()
+    for chunk in chunks:
+        content = chunk.get('content') or ''
+        stored = decode_sentence_index(content, chunk.get('sentence_spans'), chunk.get('sentence_embeddings'), dim)
+        if stored is None:
+            if embed_batch is None:
+                continue
+            chunk_sentences = [content[start:end] for start, end in sentence_spans(content)]
+            rows = None
+        else:
+            chunk_sentences, rows = stored
+        for i, sentence in enumerate(chunk_sentences):
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            sentences.append(sentence)
+            if rows is None:
+                missing.append(sentence)
+                blocks.append(None)
+            else:
+                blocks.append(rows[i])
+
+    if not sentences:
+        return [], np.zeros((0, dim), dtype=np.float32)
+    increment("rag_extractive_sentences_total", len(sentences) - len(missing), help="Sentences scored by the extractive answerer", index="stored")
+    if missing:
+        increment("rag_extractive_sentences_total", len(missing), help="Sentences scored by the extractive answerer", index="computed")
+        computed = iter(np.asarray(embed_batch(missing), dtype=np.float32))
+        blocks = [next(computed) if row is None else row for row in blocks]
+    return sentences, np.vstack(blocks)
+
+
+def mmr_select(relevance: np.ndarray, normalized: np.ndarray, k: int, diversity_weight: float) -> List[int]:
+    """Greedy MMR: indices maximizing λ·relevance − (1−λ)·max similarity to those already picked"""
+    selected: List[int] = []
+    if k <= 0 or not len(relevance):
+        return selected
+    redundancy = np.full(len(relevance), -np.inf, dtype=np.float32)
+    available = np.ones(len(relevance), dtype=bool)
+    for _ in range(min(k, len(relevance))):
+        if selected:
+            score = diversity_weight * relevance - (1 - diversity_weight) * redundancy
+        else:
+            score = relevance.copy()
+        score[~available] = -np.inf
+        best = int(np.argmax(score))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, normalized @ normalized[best])
+    return selected
+
+
+def extract_sentences(
+    query_embedding: np.ndarray,
+    sentences: List[str],
+    matrix: np.ndarray,
+    max_sentences: int = 3,
+    diversity_weight: float = 0.7,
+    min_similarity: float = 0.0
+) -> List[str]:
+    """Up to `max_sentences` sentences answering the query, most relevant first"""
+    if not sentences:
+        return []
+    normalized = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    relevance = normalized @ (query / max(float(np.linalg.norm(query)), 1e-12))
+    lengths = np.fromiter((len(s) for s in sentences), dtype=np.int32, count=len(sentences))
+    relevance = np.where(lengths > LONG_SENTENCE_CHARS, relevance * LONG_SENTENCE_PENALTY, relevance)
+
+    candidates = np.flatnonzero(relevance >= min_similarity)
+    if not len(candidates):
+        return []
+    picked = mmr_select(relevance[candidates], normalized[candidates], max_sentences, diversity_weight)
+    return [sentences[candidates[i]] for i in picked]
@@ -0,0 +1,45 @@
+"""
+Fast JSON responses
+`FastJSONResponse` renders Pydantic models with pydantic-core's serializer
+(straight to JSON bytes in Rust) and everything else with orjson, instead of
+walking the payload through `jsonable_encoder` and encoding it with the
+stdlib `json` module. Heavy routes return it directly, which also skips
+FastAPI's own response serialization; their `response_model` still documents
+the schema.
+"""
+
+import base64
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Types orjson doesn't handle natively"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "isoformat"):  # e.g. pandas Timestamp
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if isinstance(content, BaseModel):
+        return to_json(content)
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
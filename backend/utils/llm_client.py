@@ -0,0 +1,215 @@
+"""
+External LLM client
+Wraps the configured Grok/Groq endpoint behind a pooled HTTP session so that
+requests reuse TCP/TLS connections instead of reconnecting per call.
+`complete_within` bounds a call by a deadline and hedges slow requests with a
+second one once the first has run past the recent latency percentile.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional, Tuple
+import requests
+from backend.config import settings
+from backend.utils.telemetry import increment
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClient:
+    """OpenAI-compatible (or legacy prompt-style) completion client"""
+
+    def __init__(self, timeout: float = 30, max_concurrency: int = 32):
+        self.timeout = timeout
+        self._local = threading.local()
+        # Recent successful call latencies (seconds), for the hedge delay
+        self._latencies: deque = deque(maxlen=256)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+
+    @property
+    def session(self) -> requests.Session:
+        """Per-thread pooled session (requests.Session is not thread-safe)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    @staticmethod
+    def is_configured() -> bool:
+        return bool(getattr(settings, 'LLM_PROVIDER', '').strip())
+
+    def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 512,
+        system: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Send `prompt` to the configured provider and return the response text.
+
+        `system` goes first as a separate system message; keep it identical
+        across calls so providers can reuse their cached prompt prefix.
+
+        Raises:
+            RuntimeError: If provider is not configured or the call fails
+        """
+        provider = getattr(settings, 'LLM_PROVIDER', '').strip().lower()
+        if not provider:
+            raise RuntimeError("No LLM_PROVIDER configured")
+
+        if provider != 'grok':
+            raise RuntimeError(f"LLM_PROVIDER must be 'grok' when using this deployment. Found: {provider}")
+
+        api_key = getattr(settings, 'GROK_API_KEY', '')
+        endpoint = getattr(settings, 'GROK_ENDPOINT', '')
+        model = getattr(settings, 'GROK_MODEL', 'grok-beta')
+
+        if not api_key or not endpoint:
+            raise RuntimeError('Grok provider requires GROK_API_KEY and GROK_ENDPOINT in .env')
+
+        logger.info(f"Calling Grok API with model: {model} at endpoint: {endpoint}")
+
+        headers = {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
+
+        # Check if endpoint is OpenAI-compatible (Groq API format)
+        is_openai_format = 'openai' in endpoint.lower() or 'chat/completions' in endpoint.lower()
+
+        if is_openai_format:
+            body = {
+                'model': model,
+                'messages': (
+                    [{'role': 'system', 'content': system}] if system else []
+                ) + [
+                    {'role': 'user', 'content': prompt}
+                ],
+                'max_tokens': max_tokens,
+                'temperature': 0.7
+            }
+        else:
+            # Legacy format (direct prompt)
+            body = {
+                'prompt': f"{system}\n\n{prompt}" if system else prompt,
+                'max_tokens': max_tokens
+            }
+            if model:
+                body['model'] = model
+
+        try:
+            started = time.perf_counter()
+            resp = self.session.post(endpoint, json=body, headers=headers, timeout=timeout or self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+            self._latencies.append(time.perf_counter() - started)
+            increment("llm_requests_total", help="LLM completion calls by outcome", outcome="success")
+
+            if isinstance(data, dict):
+                usage = data.get('usage') or {}
+                for kind in ('prompt', 'completion'):
+                    if usage.get(f'{kind}_tokens'):
+                        increment("llm_tokens_total", usage[f'{kind}_tokens'], help="LLM tokens reported by the provider", kind=kind)
+                # OpenAI-compatible response format
+                if 'choices' in data and len(data['choices']) > 0:
+                    return data['choices'][0].get('message', {}).get('content', '').strip()
+                # Legacy response formats
+                return data.get('text') or data.get('output') or data.get('response') or json.dumps(data)
+            return str(data)
+        except requests.exceptions.HTTPError as e:
+            increment("llm_requests_total", help="LLM completion calls by outcome", outcome="http_error")
+            error_msg = f"HTTP {e.response.status_code} error"
+            if e.response.status_code == 400:
+                try:
+                    error_detail = e.response.json()
+                    error_msg += f": {error_detail}"
+                except Exception:
+                    error_msg += f": {e.response.text}"
+            logger.error(f"LLM API call failed: {error_msg}")
+            raise RuntimeError(f"LLM API call failed: {error_msg}")
+        except Exception as e:
+            increment("llm_requests_total", help="LLM completion calls by outcome", outcome="error")
+            logger.error(f"LLM API call error: {str(e)}")
+            raise
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on a call before hedging it: the configured
+        percentile of recent latencies, floored at LLM_HEDGE_MIN_DELAY_MS"""
+        floor = settings.LLM_HEDGE_MIN_DELAY_MS / 1000.0
+        samples = sorted(self._latencies)
+        if len(samples) < 20:
+            return max(floor, samples[-1] if samples else 0.0)
+        index = min(int(len(samples) * settings.LLM_HEDGE_PERCENTILE / 100.0), len(samples) - 1)
+        return max(floor, samples[index])
+
+    def complete_within(
+        self,
+        prompt: str,
+        timeout: float,
+        max_tokens: int = 512,
+        system: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """Complete `prompt` within `timeout` seconds.
+
+        If the call is still running after `hedge_delay()` (or fails early), a
+        second identical request is issued and whichever succeeds first wins.
+        Returns (text, hedged) where `hedged` is True when the second request
+        produced the answer. Each request's HTTP timeout is the time left when
+        it is sent, and requests still queued when the call returns are
+        cancelled, so none outlives the deadline.
+
+        Raises:
+            TimeoutError: If no request succeeded in time
+            RuntimeError: If every request failed
+        """
+        deadline = time.monotonic() + timeout
+
+        futures = []
+
+        def submit():
+            # Each request may only use the time left, not the whole timeout
+            future = self._pool.submit(self.complete, prompt, max_tokens, system, max(deadline - time.monotonic(), 0.001))
+            futures.append(future)
+            return future
+
+        try:
+            primary = submit()
+            pending = {primary}
+            hedge = None
+            last_error: Optional[BaseException] = None
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait_for = remaining
+                if hedge is None and settings.LLM_HEDGE_ENABLED:
+                    wait_for = min(remaining, max(self.hedge_delay() - (timeout - remaining), 0))
+                done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            increment("llm_hedge_wins_total", help="Hedged LLM requests that answered first")
+                        return future.result(), future is hedge
+                    last_error = future.exception()
+                if hedge is None and settings.LLM_HEDGE_ENABLED and deadline - time.monotonic() > 0:
+                    # Primary is slow or failed: race a second request
+                    hedge = submit()
+                    pending.add(hedge)
+                    increment("llm_hedged_requests_total", help="Second LLM requests issued to hedge a slow or failed call")
+            if pending:
+                increment("llm_deadline_exceeded_total", help="LLM calls abandoned at the request deadline")
+                raise TimeoutError(f"LLM call did not finish within {timeout:.2f}s")
+            raise RuntimeError(f"LLM call failed: {last_error}")
+        finally:
+            # Drop requests still queued behind busy pool threads
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            session.close()
+            self._local.session = None
@@ -0,0 +1,127 @@
+"""
+Keyset pagination and cached list totals
+List endpoints page with an opaque cursor holding the sort key of the last
+row returned, i.e. `WHERE (created_at, id) < (%s, %s) ORDER BY created_at
+DESC, id DESC LIMIT n`, so every page is an index range scan however deep it
+is and rows inserted meanwhile don't shift later pages. Totals come from a
+short-lived cache; above LIST_EXACT_COUNT_THRESHOLD matching rows the
+planner's estimate is returned instead of counting them.
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+from backend.config import settings
+from backend.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Totals per (table, scope...) key; writes invalidate their table's entries
+list_count_cache = TTLCache(
+    max_entries=settings.LIST_COUNT_CACHE_SIZE,
+    ttl_seconds=settings.LIST_COUNT_CACHE_TTL_SECONDS,
+    name="list_counts"
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def page_limit(limit: Optional[int], default: Optional[int] = None) -> int:
+    """Clamp a requested page size to 1..LIST_MAX_PAGE_SIZE"""
+    if limit is None:
+        limit = default or settings.LIST_PAGE_SIZE
+    return min(max(limit, 1), settings.LIST_MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [{"ts": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [datetime.fromisoformat(v["ts"]) if isinstance(v, dict) else v for v in payload]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if len(values) != size:
+        raise InvalidCursor("Invalid cursor: wrong number of keys")
+    return values
+
+
+def fetch_page(
+    cursor,
+    select: str,
+    where: Sequence[str],
+    params: Sequence[Any],
+    order: Sequence[Tuple[str, str]],
+    after: Optional[str],
+    limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """Run one keyset page of `select` and return (rows, next_cursor).
+
+    `order` lists (SQL expression, result column) pairs, newest first; the
+    last pair must be unique (the primary key) so the order is total. Rows
+    must be dicts (the default cursor factory). `next_cursor` is None on the
+    last page.
+    """
+    conditions = list(where)
+    values = list(params)
+    if after:
+        keys = decode_cursor(after, len(order))
+        columns = ", ".join(expression for expression, _ in order)
+        conditions.append(f"({columns}) < ({', '.join(['%s'] * len(order))})")
+        values.extend(keys)
+    sql = select
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(f"{expression} DESC" for expression, _ in order) + " LIMIT %s"
+    values.append(limit + 1)
+
+    cursor.execute(sql, values)
+    rows = cursor.fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][column] for _, column in order])
+
+
+def cached_count(cursor, key: Hashable, source: str, params: Sequence[Any]) -> Dict[str, Any]:
+    """Total rows of `SELECT ... FROM {source}` as {"total", "estimated"}, cached per `key`.
+
+    `key` should start with the table name so invalidate_counts() finds it.
+    """
+    def load() -> Dict[str, Any]:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {source}", list(params))
+        row = cursor.fetchone()
+        plan = row["QUERY PLAN"] if isinstance(row, dict) else row[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= settings.LIST_EXACT_COUNT_THRESHOLD:
+            return {"total": estimate, "estimated": True}
+        cursor.execute(f"SELECT COUNT(*) AS total FROM {source}", list(params))
+        row = cursor.fetchone()
+        return {"total": int(row["total"] if isinstance(row, dict) else row[0]), "estimated": False}
+
+    return dict(list_count_cache.get_or_load(key, load))
+
+
+def invalidate_counts(table: str):
+    """Drop cached totals of `table` after rows were added or removed"""
+    list_count_cache.invalidate_where(lambda key, _: isinstance(key, tuple) and key[0] == table)
+
+
+def set_page_headers(response, next_cursor: Optional[str], count: Optional[Dict[str, Any]] = None):
+    """Pagination metadata for endpoints whose body stays a bare list"""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if count is not None:
+        response.headers["X-Total-Count"] = str(count["total"])
+        response.headers["X-Total-Count-Estimated"] = "true" if count["estimated"] else "false"
@@ -0,0 +1,198 @@
+"""
+Document processing progress events
+Ingestion publishes progress (queued, chunks extracted, embedded, stored and
+the final status) to a per-user subscription registry; each connected client
+holds one bounded queue and receives its own documents' events, instead of
+polling the document list. In-flight state is kept per document so a client
+that (re)connects mid-ingestion starts from the current progress.
+
+With PROGRESS_EVENTS_CHANNEL set, events are relayed through Postgres
+LISTEN/NOTIFY so subscribers connected to another worker process see them.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set
+from backend.config import settings
+from backend.database.db import connect
+from backend.utils.telemetry import increment, registry
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STAGES = ("completed", "failed")
+
+
+class TooManySubscriptions(Exception):
+    pass
+
+
+class ProgressHub:
+    """Per-user fan-out of progress events to subscriber queues.
+
+    Use from the event loop only. A subscriber that falls behind by more than
+    `queue_size` events loses the oldest ones rather than slowing ingestion.
+    """
+
+    def __init__(self, queue_size: int, max_subscriptions_per_user: int):
+        self.queue_size = queue_size
+        self.max_subscriptions_per_user = max_subscriptions_per_user
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._in_flight: Dict[str, Dict[str, Dict[str, Any]]] = {}  # user -> document -> latest event
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: Any) -> asyncio.Queue:
+        """Register a new subscriber queue; pair with unsubscribe()"""
+        key = str(user_id)
+        queues = self._subscribers.get(key, set())
+        if self.max_subscriptions_per_user and len(queues) >= self.max_subscriptions_per_user:
+            raise TooManySubscriptions(f"At most {self.max_subscriptions_per_user} progress streams per user")
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(key, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: Any, queue: asyncio.Queue):
+        key = str(user_id)
+        queues = self._subscribers.get(key)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[key]
+
+    def in_flight(self, user_id: Any) -> List[Dict[str, Any]]:
+        """Latest event of each of the user's documents still being processed"""
+        return list(self._in_flight.get(str(user_id), {}).values())
+
+    def dispatch(self, user_id: Any, event: Dict[str, Any]):
+        key = str(user_id)
+        documents = self._in_flight.setdefault(key, {})
+        if event.get("stage") in TERMINAL_STAGES:
+            documents.pop(event.get("document_id"), None)
+        else:
+            documents[event.get("document_id")] = event
+        if not documents:
+            self._in_flight.pop(key, None)
+
+        self.published += 1
+        for queue in self._subscribers.get(key, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+                increment("progress_events_dropped_total", help="Progress events dropped for slow subscribers")
+            queue.put_nowait(event)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._subscribers),
+            "subscriptions": sum(len(q) for q in self._subscribers.values()),
+            "documents_in_flight": sum(len(d) for d in self._in_flight.values()),
+            "published": self.published,
+            "dropped": self.dropped
+        }
+
+
+class _PostgresRelay:
+    """LISTEN/NOTIFY bridge so every worker's hub sees every event"""
+
+    def __init__(self, hub: ProgressHub, channel: str):
+        self.hub = hub
+        self.channel = channel
+        self._conn = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._conn = connect()
+        self._conn.autocommit = True
+        cursor = self._conn.cursor()
+        cursor.execute(f'LISTEN "{self.channel}"')
+        cursor.close()
+        self._loop.add_reader(self._conn.fileno(), self._on_readable)
+        logger.info(f"Progress events relayed on Postgres channel {self.channel}")
+
+    def stop(self):
+        if self._conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._conn.fileno())
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    @property
+    def active(self) -> bool:
+        return self._conn is not None and not self._conn.closed
+
+    def notify(self, user_id: Any, event: Dict[str, Any]):
+        cursor = self._conn.cursor()
+        cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, json.dumps({"user_id": str(user_id), "event": event})))
+        cursor.close()
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except Exception as e:
+            logger.error(f"Progress relay connection lost, falling back to in-process events: {e}")
+            self.stop()
+            return
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                message = json.loads(notify.payload)
+                self.hub.dispatch(message["user_id"], message["event"])
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Ignoring malformed progress notification: {e}")
+
+
+progress_hub = ProgressHub(settings.PROGRESS_QUEUE_SIZE, settings.PROGRESS_MAX_SUBSCRIPTIONS_PER_USER)
+_relay: Optional[_PostgresRelay] = None
+
+
+def publish_progress(user_id: Any, document_id: str, stage: str, **fields: Any):
+    """Publish one progress event for a user's document (call from the event loop)"""
+    event = {"document_id": document_id, "stage": stage, **fields}
+    if _relay is not None and _relay.active:
+        try:
+            _relay.notify(user_id, event)
+            return
+        except Exception as e:
+            logger.error(f"Progress relay notify failed, delivering locally: {e}")
+            _relay.stop()
+    progress_hub.dispatch(user_id, event)
+
+
+async def start_progress_relay():
+    """Start the LISTEN/NOTIFY relay when PROGRESS_EVENTS_CHANNEL is configured"""
+    global _relay
+    if not settings.PROGRESS_EVENTS_CHANNEL or _relay is not None:
+        return
+    relay = _PostgresRelay(progress_hub, settings.PROGRESS_EVENTS_CHANNEL)
+    try:
+        relay.start()
+    except Exception as e:
+        logger.error(f"Progress relay unavailable, events stay in-process: {e}")
+        relay.stop()
+        return
+    _relay = relay
+
+
+def stop_progress_relay():
+    global _relay
+    if _relay is not None:
+        _relay.stop()
+        _relay = None
+
+
+def _progress_metrics() -> List[str]:
+    stats = progress_hub.stats()
+    return [
+        "# TYPE progress_subscriptions gauge",
+        f"progress_subscriptions {stats['subscriptions']}",
+        "# TYPE progress_documents_in_flight gauge",
+        f"progress_documents_in_flight {stats['documents_in_flight']}",
+    ]
+
+
+registry.register_collector(_progress_metrics)
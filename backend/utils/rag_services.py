@@ -0,0 +1,87 @@
+"""
+Application-scoped RAG service container
+Holds the long-lived pieces of the RAG pipeline (embedding model, LLM client,
+in-memory indexes and caches) so they are built once per process instead of
+once per request. Only the database connection stays request-scoped.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+from backend.config import settings
+from backend.utils.embedding_sidecar import create_embedding_model
+from backend.utils.llm_client import LLMClient
+
+logger = logging.getLogger(__name__)
+
+
+class RAGServices:
+    """Thread-safe container for process-wide RAG services"""
+
+    def __init__(self, embedding_model_name: str = "all-MiniLM-L6-v2"):
+        # In-process model, or a client of the shared sidecar (EMBEDDING_SIDECAR_SOCKET)
+        self.embedding_model = create_embedding_model(embedding_model_name)
+        self.llm_client = LLMClient(max_concurrency=settings.LLM_MAX_CONCURRENCY)
+        self._components: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def get_or_create(self, name: str, factory: Callable[[], Any]) -> Any:
+        """Return the named shared component (index, cache, ...), creating it once"""
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        with self._lock:
+            component = self._components.get(name)
+            if component is None:
+                component = factory()
+                self._components[name] = component
+                logger.info(f"Registered RAG service component: {name}")
+            return component
+
+    def components(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._components)
+
+    def close(self):
+        self.llm_client.close()
+        with self._lock:
+            for name, component in self._components.items():
+                close = getattr(component, 'close', None)
+                if callable(close):
+                    try:
+                        close()
+                    except Exception as e:
+                        logger.warning(f"Error closing RAG service component {name}: {e}")
+            self._components.clear()
+
+
+_services: Optional[RAGServices] = None
+_services_lock = threading.Lock()
+
+
+def init_rag_services() -> RAGServices:
+    """Create the process-wide container (called from the FastAPI lifespan)"""
+    global _services
+    with _services_lock:
+        if _services is None:
+            _services = RAGServices()
+        return _services
+
+
+def get_rag_services() -> RAGServices:
+    """FastAPI dependency returning the shared container.
+
+    Falls back to lazy creation so scripts and background jobs that never ran
+    the app lifespan still get a working container.
+    """
+    if _services is None:
+        return init_rag_services()
+    return _services
+
+
+def shutdown_rag_services():
+    global _services
+    with _services_lock:
+        if _services is not None:
+            _services.close()
+            _services = None
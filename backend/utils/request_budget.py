@@ -0,0 +1,61 @@
+"""
+Per-request latency budgets
+A request's deadline lives in a context variable so retrieval and generation
+code can check how much time is left without it being passed through every
+call. The budget also records which path produced the answer.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class RequestBudget:
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000.0
+        self.answer_path: Optional[str] = None
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def exhausted(self, reserve_seconds: float = 0.0) -> bool:
+        return self.remaining() <= reserve_seconds
+
+
+_current_budget: contextvars.ContextVar = contextvars.ContextVar("current_budget", default=None)
+
+
+@contextmanager
+def request_budget(budget_ms: float) -> Iterator[RequestBudget]:
+    """Run the enclosed request against a `budget_ms` deadline"""
+    budget = RequestBudget(budget_ms)
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def current_budget() -> Optional[RequestBudget]:
+    return _current_budget.get()
+
+
+def remaining_seconds() -> Optional[float]:
+    """Time left in the current request's budget, or None outside a budgeted request"""
+    budget = _current_budget.get()
+    return budget.remaining() if budget is not None else None
+
+
+def budget_exhausted(reserve_seconds: float = 0.0) -> bool:
+    budget = _current_budget.get()
+    return budget is not None and budget.exhausted(reserve_seconds)
+
+
+def mark_answer_path(path: str):
+    """Record which path (llm, llm_hedged, extractive_deadline, no_context, ...) served the answer"""
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.answer_path = path
@@ -0,0 +1,236 @@
+"""
+Per-tenant fair sharing of ingestion and embedding
+Tenants are organizations (or individual users without one). Ingestion jobs
+and embedding batches wait in per-tenant queues served by deficit round
+robin, so one tenant's bulk upload cannot starve everyone else's work.
+Usage (documents, ingested tokens, queries) is accounted per fixed time
+window and checked against configurable per-tenant quotas.
+
+Both are in-memory and per process. Under `uvicorn --workers N` each worker
+schedules and counts on its own, so a tenant's effective quota is up to N
+times the configured one; size the settings per worker.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from backend.config import settings
+from backend.utils.telemetry import increment, registry
+
+logger = logging.getLogger(__name__)
+
+
+def tenant_key(user: Dict[str, Any]) -> str:
+    """Scheduling/quota key for an authenticated user context"""
+    if user.get("organization_id"):
+        return f"org:{user['organization_id']}"
+    return f"user:{user['id']}"
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    """'org:1=2,org:7=0.5' -> {'org:1': 2.0, 'org:7': 0.5}"""
+    weights = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            key, value = item.rsplit("=", 1)
+            try:
+                weights[key.strip()] = float(value)
+            except ValueError:
+                logger.warning(f"Ignoring invalid tenant weight: {item}")
+    return weights
+
+
+class _TenantQueue:
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.waiters: deque = deque()  # (cost, future)
+        self.deficit = 0.0
+        self.served = 0.0
+
+
+class FairScheduler:
+    """Deficit round robin over per-tenant queues with `concurrency` slots.
+
+    Each turn a tenant's deficit grows by quantum * weight and it may start
+    queued jobs while their cost fits the deficit; then the next tenant goes.
+    Use from the event loop only.
+    """
+
+    def __init__(self, name: str, concurrency: int, quantum: float, weights: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.concurrency = concurrency
+        self.quantum = quantum
+        self.weights = weights or {}
+        self.running = 0
+        self._queues: Dict[str, _TenantQueue] = {}
+        self._active: deque = deque()  # tenants with queued work, in round-robin order
+        self._turn_open = False
+
+    @asynccontextmanager
+    async def slot(self, tenant: str, cost: float = 1.0) -> AsyncIterator[None]:
+        """Wait for `tenant`'s turn, then hold one slot for the enclosed work"""
+        queue = self._queues.get(tenant)
+        if queue is None:
+            queue = self._queues[tenant] = _TenantQueue(self.weights.get(tenant, 1.0))
+        waiter = asyncio.get_running_loop().create_future()
+        if not queue.waiters:
+            self._active.append(tenant)
+        queue.waiters.append((max(cost, 0.0), waiter))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._finish()
+            else:
+                self._forget(tenant, waiter)
+            raise
+        try:
+            yield
+        finally:
+            self._finish()
+
+    def _forget(self, tenant: str, waiter):
+        queue = self._queues[tenant]
+        queue.waiters = deque(w for w in queue.waiters if w[1] is not waiter)
+        if not queue.waiters and tenant in self._active:
+            if self._active[0] == tenant:
+                self._turn_open = False
+            self._active.remove(tenant)
+            queue.deficit = 0.0
+
+    def _finish(self):
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.concurrency and self._active:
+            tenant = self._active[0]
+            queue = self._queues[tenant]
+            if not self._turn_open:
+                queue.deficit += self.quantum * queue.weight
+                self._turn_open = True
+            cost, waiter = queue.waiters[0]
+            if cost <= queue.deficit:
+                queue.waiters.popleft()
+                queue.deficit -= cost
+                queue.served += cost
+                self.running += 1
+                waiter.set_result(None)
+                if not queue.waiters:
+                    # Idle tenants don't bank credit
+                    queue.deficit = 0.0
+                    self._active.popleft()
+                    self._turn_open = False
+            else:
+                self._active.rotate(-1)
+                self._turn_open = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "tenants": {
+                tenant: {"queued": len(q.waiters), "weight": q.weight, "served": q.served}
+                for tenant, q in self._queues.items()
+                if q.waiters or q.served
+            }
+        }
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, tenant: str, kind: str, limit: int, retry_after: int):
+        super().__init__(f"{kind} quota of {limit} per {settings.TENANT_QUOTA_WINDOW_SECONDS}s exceeded")
+        self.tenant = tenant
+        self.kind = kind
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class TenantUsage:
+    """Per-tenant usage counters over fixed windows, with per-user breakdown.
+
+    Counts only this process's usage; see the module docstring.
+    """
+
+    KINDS = ("documents", "tokens", "queries")
+
+    def __init__(self, window_seconds: float, quotas: Dict[str, int]):
+        self.window_seconds = window_seconds
+        self.quotas = quotas  # kind -> limit per window; 0 means unlimited
+        self._windows: Dict[str, Dict[str, Any]] = {}
+
+    def _window(self, tenant: str) -> Dict[str, Any]:
+        now = time.time()
+        start = now - now % self.window_seconds
+        window = self._windows.get(tenant)
+        if window is None or window["start"] != start:
+            window = {"start": start, "totals": dict.fromkeys(self.KINDS, 0), "users": {}}
+            self._windows[tenant] = window
+        return window
+
+    def check(self, tenant: str, **amounts: int):
+        """Raise QuotaExceeded if adding `amounts` would pass a quota"""
+        window = self._window(tenant)
+        for kind, amount in amounts.items():
+            limit = self.quotas.get(kind, 0)
+            if limit and window["totals"][kind] + amount > limit:
+                retry_after = max(1, math.ceil(window["start"] + self.window_seconds - time.time()))
+                increment("tenant_quota_rejections_total", help="Requests rejected by per-tenant quotas", kind=kind)
+                raise QuotaExceeded(tenant, kind, limit, retry_after)
+
+    def record(self, tenant: str, user_id: Any, **amounts: int):
+        window = self._window(tenant)
+        user = window["users"].setdefault(str(user_id), dict.fromkeys(self.KINDS, 0))
+        for kind, amount in amounts.items():
+            window["totals"][kind] += amount
+            user[kind] += amount
+
+    def snapshot(self, tenant: str) -> Dict[str, Any]:
+        window = self._window(tenant)
+        return {
+            "tenant": tenant,
+            "window_start": window["start"],
+            "window_seconds": self.window_seconds,
+            "usage": dict(window["totals"]),
+            "quotas": {kind: self.quotas.get(kind) or None for kind in self.KINDS},
+            "users": {user_id: dict(counts) for user_id, counts in window["users"].items()}
+        }
+
+
+_weights = _parse_weights(settings.TENANT_WEIGHTS)
+
+# Whole documents; cost is the upload size in bytes
+ingestion_scheduler = FairScheduler(
+    "ingestion", settings.INGESTION_WORKERS, settings.INGESTION_QUANTUM_BYTES, _weights
+)
+# Embedding batches; cost is the number of chunks in the batch
+embedding_scheduler = FairScheduler(
+    "embedding", settings.EMBEDDING_WORKERS, settings.EMBEDDING_BATCH_SIZE, _weights
+)
+tenant_usage = TenantUsage(
+    settings.TENANT_QUOTA_WINDOW_SECONDS,
+    {
+        "documents": settings.TENANT_DOCUMENT_QUOTA,
+        "tokens": settings.TENANT_TOKEN_QUOTA,
+        "queries": settings.TENANT_QUERY_QUOTA
+    }
+)
+
+
+def _scheduler_metrics() -> List[str]:
+    lines = ["# TYPE tenant_scheduler_queued gauge"]
+    for scheduler in (ingestion_scheduler, embedding_scheduler):
+        for tenant, stats in scheduler.stats()["tenants"].items():
+            lines.append(f'tenant_scheduler_queued{{scheduler="{scheduler.name}",tenant="{tenant}"}} {stats["queued"]}')
+    lines.append("# TYPE tenant_scheduler_running gauge")
+    for scheduler in (ingestion_scheduler, embedding_scheduler):
+        lines.append(f'tenant_scheduler_running{{scheduler="{scheduler.name}"}} {scheduler.running}')
+    return lines
+
+
+registry.register_collector(_scheduler_metrics)
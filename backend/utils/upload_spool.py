@@ -0,0 +1,95 @@
+"""
+Streaming upload spooling
+Copies an UploadFile to a temp file on disk in fixed-size chunks, computing
+its size and SHA-256 on the way and stopping as soon as the size limit is
+passed, so request handlers and background tasks hold a path instead of the
+whole file in memory.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Optional
+from fastapi import UploadFile
+from backend.config import settings
+from backend.utils.telemetry import increment
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, filename: str, limit: int):
+        super().__init__(f"{filename} exceeds the maximum upload size of {limit / 1024 / 1024:.0f}MB")
+        self.filename = filename
+        self.limit = limit
+
+
+class SpooledUpload:
+    """An upload copied to disk; call cleanup() (or use as a context manager) when done"""
+
+    def __init__(self, path: str, filename: str, size: int, sha256: str):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove spooled upload {self.path}: {e}")
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+async def spool_upload(
+    upload: UploadFile,
+    max_bytes: Optional[int] = None,
+    directory: Optional[str] = None,
+    chunk_size: Optional[int] = None
+) -> SpooledUpload:
+    """Stream `upload` to a new temp file in `directory` (default UPLOAD_SPOOL_DIR).
+
+    Raises UploadTooLarge without reading the body when the multipart parser
+    already knows the size, otherwise as soon as `max_bytes` is passed.
+    """
+    filename = upload.filename or "upload"
+    max_bytes = settings.UPLOAD_MAX_FILE_BYTES if max_bytes is None else max_bytes
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+    if max_bytes and upload.size is not None and upload.size > max_bytes:
+        increment("upload_rejected_total", help="Uploads rejected for exceeding the size limit")
+        raise UploadTooLarge(filename, max_bytes)
+
+    directory = directory or settings.UPLOAD_SPOOL_DIR or None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=os.path.splitext(filename)[1], dir=directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    increment("upload_rejected_total", help="Uploads rejected for exceeding the size limit")
+                    raise UploadTooLarge(filename, max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+    increment("upload_spooled_bytes_total", size, help="Bytes of uploads streamed to disk")
+    return SpooledUpload(path, filename, size, digest.hexdigest())
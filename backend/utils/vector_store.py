@@ -8,12 +8,59 @@ import psycopg2
 from psycopg2.extras import execute_values
 from sentence_transformers import SentenceTransformer, util
 import logging
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Optional, Dict, Any
 import time
 import uuid
+from backend.config import settings
+from backend.utils.bulk_writer import EMBEDDING_COLUMNS, copy_rows
+from backend.utils.cache import TTLCache
+from backend.utils.request_budget import budget_exhausted
+from backend.utils.telemetry import increment, span
 
 logger = logging.getLogger(__name__)
 
+# Connections default to RealDictCursor; scoring paths read plain tuples,
+# which are cheaper to build for thousands of rows
+TUPLE_CURSOR = psycopg2.extensions.cursor
+
+# chunk_id -> {chunk_id, document_id, content, chunk_index, filename}
+chunk_content_cache = TTLCache(
+    max_entries=settings.CHUNK_CONTENT_CACHE_SIZE,
+    ttl_seconds=settings.CHUNK_CONTENT_CACHE_TTL_SECONDS,
+    name="chunk_content"
+)
+# chunk_id -> (document_id, sentence_spans, sentence_embeddings); the blobs are
+# far larger than the content, so they get their own cache bounded by bytes
+sentence_index_cache = TTLCache(
+    max_entries=settings.CHUNK_CONTENT_CACHE_SIZE,
+    ttl_seconds=settings.CHUNK_CONTENT_CACHE_TTL_SECONDS,
+    name="sentence_index",
+    max_bytes=settings.SENTENCE_INDEX_CACHE_MB * 1024 * 1024,
+    sizeof=lambda entry: len(entry[1] or b'') + len(entry[2] or b'')
+)
+# (model, query text) -> query embedding; repeated and recursive searches embed once
+query_embedding_cache = TTLCache(max_entries=1024, ttl_seconds=600, name="query_embedding")
+
+
+def cosine_scores(matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Cosine similarity of each row of `matrix` with `query`"""
+    norms = np.linalg.norm(matrix, axis=1) * max(float(np.linalg.norm(query)), 1e-12)
+    return (matrix @ query) / np.maximum(norms, 1e-12)
+
+
+def document_centroid(embeddings: np.ndarray) -> np.ndarray:
+    """Mean of the L2-normalized chunk embeddings, normalized again"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    centroid = matrix.mean(axis=0)
+    return (centroid / max(float(np.linalg.norm(centroid)), 1e-12)).astype(np.float32)
+
+
+def invalidate_document_chunks(document_id: str) -> int:
+    """Drop a deleted document's chunks from the content and sentence index caches"""
+    sentence_index_cache.invalidate_where(lambda _, entry: entry[0] == document_id)
+    return chunk_content_cache.invalidate_where(lambda _, chunk: chunk["document_id"] == document_id)
+
 
 class EmbeddingModel:
     """Manages embedding generation using Sentence Transformers"""
@@ -63,6 +110,12 @@ class EmbeddingModel:
         """Generate embedding for single text"""
         return self.model.encode(text, convert_to_numpy=True)
     
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embedding for a search query, cached for repeated questions"""
+        return query_embedding_cache.get_or_load(
+            (self.model_path, text), lambda: np.asarray(self.embed_text(text), dtype=np.float32)
+        )
+    
     def embed_batch(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for multiple texts"""
         return self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
@@ -80,76 +133,34 @@ class EmbeddingModel:
 class VectorStore:
     """Vector storage and retrieval system using PostgreSQL + pgvector"""
     
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, embedding_model: Optional[EmbeddingModel] = None):
         self.db = db_connection
-        self.embedding_model = EmbeddingModel()
-    
-    def create_or_ensure_vector_table(self):
-        """Create pgvector extension and embedding table"""
-        try:
-            cursor = self.db.cursor()
-            
-            # Create pgvector extension (if not using pgvector, we'll use array storage)
-            try:
-                cursor.execute("CREATE EXTENSION IF NOT EXISTS vector;")
-                self.db.commit()
-                logger.info("pgvector extension created/already exists")
-            except psycopg2.Error as e:
-                logger.warning(f"pgvector not available: {e}. Using FLOAT8[] instead")
-                self.db.rollback()
-            
-            # Create RAG embeddings table using BYTEA to store serialized float32
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS rag_embeddings (
-                    embedding_id VARCHAR(36) PRIMARY KEY,
-                    chunk_id VARCHAR(36) NOT NULL,
-                    document_id VARCHAR(36) NOT NULL,
-                    user_id VARCHAR(36) NOT NULL,
-                    embedding BYTEA NOT NULL,
-                    embedding_model VARCHAR(100) DEFAULT 'all-MiniLM-L6-v2',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (document_id) REFERENCES rag_documents(document_id) ON DELETE CASCADE
-                );
-            """)
-            
-            self.db.commit()
-            logger.info("Embeddings table created/already exists")
-            cursor.close()
-        except Exception as e:
-            logger.error(f"Error creating vector table: {e}")
-            raise
+        self.embedding_model = embedding_model or EmbeddingModel()
     
     def store_embeddings(
         self,
         embeddings: List[np.ndarray],
         chunk_ids: List[str],
         document_id: str,
-        user_id: str
+        user_id: str,
+        organization_id: int = 0
     ) -> bool:
-        """Store embeddings in database"""
+        """Store embeddings in the document owner's organization partition"""
         try:
             cursor = self.db.cursor()
-            data = [
+            rows = (
                 (
+                    organization_id,
                     str(uuid.uuid4()),  # embedding_id
                     chunk_id,
                     document_id,
                     user_id,
-                    embedding.astype('float32').tobytes(),  # store as bytes
+                    np.asarray(embedding, dtype=np.float32).tobytes(),  # store as bytes
                     self.embedding_model.model_name
                 )
                 for chunk_id, embedding in zip(chunk_ids, embeddings)
-            ]
-            
-            execute_values(
-                cursor,
-                """
-                INSERT INTO rag_embeddings 
-                (embedding_id, chunk_id, document_id, user_id, embedding, embedding_model)
-                VALUES %s
-                """,
-                data
             )
+            copy_rows(cursor, "rag_embeddings", EMBEDDING_COLUMNS, rows)
             
             self.db.commit()
             logger.info(f"Stored {len(embeddings)} embeddings for document {document_id}")
@@ -166,22 +177,33 @@ class VectorStore:
         document_ids: Optional[List[str]] = None,
         user_id: Optional[str] = None,
         top_k: int = 5,
-        threshold: float = 0.3
-    ) -> List[Tuple[str, str, str, float]]:
+        threshold: float = 0.3,
+        organization_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Semantic similarity search
-        Returns: List of (chunk_id, document_id, content, similarity_score)
+        Candidates are scored on (chunk_id, document_id, embedding) only; content,
+        chunk_index and filename are materialized afterwards for the top_k winners.
+        With `organization_id`, only that tenant's partitions are scanned; a user's
+        rows follow them when their organization changes (migration 011).
+        Returns: List of dicts with chunk_id, document_id, content, chunk_index,
+        filename and similarity_score
         """
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.embed_text(query)
+            with span("embed_query"):
+                query_embedding = self.embedding_model.embed_query(query)
             
-            cursor = self.db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = self.db.cursor(cursor_factory=TUPLE_CURSOR)
 
             # Build SQL query to fetch candidate embeddings
             where_clauses = []
             params = []
 
+            if organization_id is not None:
+                where_clauses.append("e.organization_id = %s")
+                params.append(organization_id)
+
             if user_id:
                 # Ensure user_id is string (RAG tables use VARCHAR)
                 user_id_str = str(user_id) if not isinstance(user_id, str) else user_id
@@ -195,58 +217,205 @@ class VectorStore:
             where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
 
             sql = f"""
-                SELECT e.chunk_id, e.document_id, dc.content, e.embedding
+                SELECT e.chunk_id, e.document_id, e.embedding
                 FROM rag_embeddings e
-                JOIN rag_document_chunks dc ON e.chunk_id = dc.chunk_id
                 WHERE {where_sql}
                 LIMIT 1000
             """
 
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
+            with span("candidate_fetch"):
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            cursor.close()
+            increment("rag_candidates_scanned_total", len(rows), help="Candidate embeddings scored by similarity search")
+            increment(
+                "rag_retrieval_bytes_total", sum(len(r[0]) + len(r[1]) + len(r[2]) for r in rows),
+                help="Bytes fetched from the database by similarity search", phase="score"
+            )
 
-            # Compute similarity in Python
-            scored = []
-            for row in rows:
-                try:
-                    emb_bytes = row['embedding']
-                    emb_array = np.frombuffer(emb_bytes, dtype=np.float32)
-                    sim = float(self.embedding_model.similarity(query_embedding, emb_array))
-                    if sim > threshold:
-                        scored.append((row['chunk_id'], row['document_id'], row['content'], sim))
-                except Exception:
-                    continue
+            # Cosine similarity of every candidate in one matrix product
+            with span("vector_scoring"):
+                dim = query_embedding.shape[0]
+                # Rows embedded with a different model have another dimension
+                rows = [r for r in rows if len(r[2]) == dim * 4]
+                if not rows:
+                    return []
+                matrix = np.frombuffer(b"".join(bytes(r[2]) for r in rows), dtype=np.float32).reshape(len(rows), dim)
+                sims = cosine_scores(matrix, query_embedding)
 
-            # Sort and return top_k (only high-quality matches)
-            scored.sort(key=lambda x: x[3], reverse=True)
-            # Filter for better quality - only return results with similarity > 0.3
-            quality_results = [r for r in scored if r[3] > 0.3][:top_k]
-            # If we have quality results, use them; otherwise use best available
-            if quality_results:
-                results = [dict(zip(['chunk_id', 'document_id', 'content', 'similarity_score'], r)) for r in quality_results]
-            else:
-                # Fallback: use top results even if below threshold
-                results = [dict(zip(['chunk_id', 'document_id', 'content', 'similarity_score'], r)) for r in scored[:top_k]]
-            cursor.close()
+                order = [i for i in np.argsort(-sims, kind="stable") if sims[i] > threshold]
+                # Prefer high-quality matches (> 0.3); otherwise use best available
+                quality = [i for i in order if sims[i] > 0.3][:top_k]
+                winners = quality or order[:top_k]
+
+            with span("chunk_materialize"):
+                details = self.fetch_chunks([rows[i][0] for i in winners], organization_id)
+
+            results = []
+            for i in winners:
+                chunk_id, document_id = rows[i][0], rows[i][1]
+                detail = details.get(chunk_id)
+                if detail is None:
+                    continue  # deleted since scoring
+                results.append({
+                    'chunk_id': chunk_id,
+                    'document_id': document_id,
+                    'content': detail['content'],
+                    'chunk_index': detail['chunk_index'],
+                    'filename': detail['filename'],
+                    'sentence_spans': detail.get('sentence_spans'),
+                    'sentence_embeddings': detail.get('sentence_embeddings'),
+                    'similarity_score': float(sims[i])
+                })
             return results
         
         except Exception as e:
             logger.error(f"Similarity search error: {e}")
             return []
 
+    def select_documents(
+        self,
+        query: str,
+        user_id: str,
+        top_documents: Optional[int] = None,
+        min_documents: Optional[int] = None,
+        organization_id: Optional[int] = None
+    ) -> List[str]:
+        """
+        Stage one of a search over all of a user's completed documents
+        With more than `min_documents` documents, returns the `top_documents`
+        whose centroids best match the query, plus any document whose centroid
+        cannot be compared (so it is never silently excluded); otherwise all.
+        """
+        top_documents = settings.RAG_PREFILTER_TOP_DOCUMENTS if top_documents is None else top_documents
+        min_documents = settings.RAG_PREFILTER_MIN_DOCUMENTS if min_documents is None else min_documents
+        user_id_str = str(user_id) if not isinstance(user_id, str) else user_id
+
+        cursor = self.db.cursor(cursor_factory=TUPLE_CURSOR)
+        try:
+            cursor.execute(
+                "SELECT document_id, centroid FROM rag_documents WHERE user_id = %s AND processing_status = 'completed'",
+                [user_id_str]
+            )
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        if top_documents <= 0 or len(rows) <= max(min_documents, top_documents):
+            return [r[0] for r in rows]
+
+        missing = [r[0] for r in rows if r[1] is None]
+        centroids = {r[0]: r[1] for r in rows if r[1] is not None}
+        if missing:
+            centroids.update(self.backfill_centroids(missing[:50], organization_id))
+
+        query_embedding = self.embedding_model.embed_query(query)
+        dim = query_embedding.shape[0]
+        comparable = [(doc_id, c) for doc_id, c in centroids.items() if len(c) == dim * 4]
+        comparable_ids = {doc_id for doc_id, _ in comparable}
+        selected = [r[0] for r in rows if r[0] not in comparable_ids]
+        if comparable:
+            matrix = np.frombuffer(b"".join(bytes(c) for _, c in comparable), dtype=np.float32).reshape(len(comparable), dim)
+            sims = cosine_scores(matrix, query_embedding)
+            selected.extend(comparable[i][0] for i in np.argsort(-sims, kind="stable")[:top_documents])
+        increment("rag_prefilter_documents_total", len(rows), help="Documents considered and kept by the centroid prefilter", stage="considered")
+        increment("rag_prefilter_documents_total", len(selected), help="Documents considered and kept by the centroid prefilter", stage="kept")
+        return selected
+
+    def backfill_centroids(self, document_ids: List[str], organization_id: Optional[int] = None) -> Dict[str, bytes]:
+        """Compute and store centroids for documents indexed before they existed"""
+        cursor = self.db.cursor(cursor_factory=TUPLE_CURSOR)
+        try:
+            sql = "SELECT document_id, embedding FROM rag_embeddings WHERE document_id = ANY(%s)"
+            params: List[Any] = [document_ids]
+            if organization_id is not None:
+                sql += " AND organization_id = %s"
+                params.append(organization_id)
+            cursor.execute(sql + " ORDER BY document_id", params)
+            by_document: Dict[str, List[np.ndarray]] = {}
+            for document_id, embedding in cursor.fetchall():
+                by_document.setdefault(document_id, []).append(np.frombuffer(bytes(embedding), dtype=np.float32))
+            centroids = {}
+            for document_id, vectors in by_document.items():
+                if len({v.shape[0] for v in vectors}) != 1:
+                    continue
+                centroids[document_id] = document_centroid(np.vstack(vectors)).tobytes()
+            if centroids:
+                execute_values(
+                    cursor,
+                    "UPDATE rag_documents d SET centroid = v.centroid FROM (VALUES %s) AS v(document_id, centroid) "
+                    "WHERE d.document_id = v.document_id",
+                    [(doc_id, psycopg2.Binary(c)) for doc_id, c in centroids.items()]
+                )
+            self.db.commit()
+            return centroids
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Centroid backfill failed: {e}")
+            return {}
+        finally:
+            cursor.close()
+
+    def fetch_chunks(self, chunk_ids: List[str], organization_id: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Content, chunk_index, filename and sentence index for `chunk_ids`, from cache or one query"""
+        found = {}
+        missing = []
+        for chunk_id in chunk_ids:
+            cached = chunk_content_cache.get(chunk_id)
+            index = sentence_index_cache.get(chunk_id) if cached is not None else None
+            if index is None:
+                missing.append(chunk_id)
+            else:
+                found[chunk_id] = {**cached, 'sentence_spans': index[1], 'sentence_embeddings': index[2]}
+        if not missing:
+            return found
+
+        sql = """
+            SELECT dc.chunk_id, dc.document_id, dc.content, dc.chunk_index, d.filename,
+                   dc.sentence_spans, dc.sentence_embeddings
+            FROM rag_document_chunks dc
+            JOIN rag_documents d ON d.document_id = dc.document_id
+            WHERE dc.chunk_id = ANY(%s)
+        """
+        params: List[Any] = [missing]
+        if organization_id is not None:
+            sql += " AND dc.organization_id = %s"
+            params.append(organization_id)
+        cursor = self.db.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        try:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        increment(
+            "rag_retrieval_bytes_total",
+            sum(len(r['content'] or '') + len(r['sentence_embeddings'] or b'') for r in rows),
+            help="Bytes fetched from the database by similarity search", phase="materialize"
+        )
+        for row in rows:
+            chunk = dict(row)
+            spans, embeddings = (
+                bytes(chunk.pop(column)) if chunk[column] is not None else chunk.pop(column)
+                for column in ('sentence_spans', 'sentence_embeddings')
+            )
+            chunk_content_cache.set(chunk['chunk_id'], chunk)
+            sentence_index_cache.set(chunk['chunk_id'], (chunk['document_id'], spans, embeddings))
+            found[chunk['chunk_id']] = {**chunk, 'sentence_spans': spans, 'sentence_embeddings': embeddings}
+        return found
+
 
 class HybridRetriever:
     """Hybrid retrieval combining keyword and semantic search"""
     
-    def __init__(self, db_connection):
-        self.vector_store = VectorStore(db_connection)
+    def __init__(self, db_connection, vector_store: Optional[VectorStore] = None):
+        self.vector_store = vector_store or VectorStore(db_connection)
         self.db = db_connection
     
     def keyword_search(
         self,
         query: str,
         document_ids: Optional[List[str]] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        organization_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Simple keyword-based search"""
         try:
@@ -260,18 +429,23 @@ class HybridRetriever:
             if document_ids:
                 where_clause += " AND dc.document_id = ANY(%s)"
                 params.append(document_ids)
+
+            if organization_id is not None:
+                where_clause += " AND dc.organization_id = %s"
+                params.append(organization_id)
             
-            cursor.execute(
-                f"""
-                SELECT dc.chunk_id, dc.document_id, dc.content, dc.chunk_index
-                FROM rag_document_chunks dc
-                WHERE {where_clause}
-                LIMIT %s
-                """,
-                params + [top_k]
-            )
-            
-            results = cursor.fetchall()
+            with span("keyword_search"):
+                cursor.execute(
+                    f"""
+                    SELECT dc.chunk_id, dc.document_id, dc.content, dc.chunk_index
+                    FROM rag_document_chunks dc
+                    WHERE {where_clause}
+                    LIMIT %s
+                    """,
+                    params + [top_k]
+                )
+                
+                results = cursor.fetchall()
             cursor.close()
             return results
         except Exception as e:
@@ -284,16 +458,21 @@ class HybridRetriever:
         document_ids: Optional[List[str]] = None,
         user_id: Optional[str] = None,
         top_k: int = 5,
-        semantic_weight: float = 0.7
+        semantic_weight: float = 0.7,
+        organization_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Combine keyword and semantic search"""
         # Semantic search (70% weight)
         semantic_results = self.vector_store.similarity_search(
-            query, document_ids, user_id, top_k
+            query, document_ids, user_id, top_k, organization_id=organization_id
         )
         
-        # Keyword search (30% weight)
-        keyword_results = self.keyword_search(query, document_ids, top_k)
+        # Keyword search (30% weight); it only refines semantic results, so
+        # skip it once the request budget is spent
+        if semantic_results and budget_exhausted():
+            keyword_results = []
+        else:
+            keyword_results = self.keyword_search(query, document_ids, top_k, organization_id)
         
         # Combine results with weighted scoring
         combined = {}
@@ -306,15 +485,24 @@ class HybridRetriever:
                     doc_id = item.get('document_id')
                     content = item.get('content')
                     similarity = item.get('similarity_score', 0)
+                    chunk_index = item.get('chunk_index')
+                    filename = item.get('filename')
+                    sentence_spans = item.get('sentence_spans')
+                    sentence_embeddings = item.get('sentence_embeddings')
                 else:
                     # legacy tuple form
                     chunk_id, doc_id, content, similarity = item
+                    chunk_index = filename = sentence_spans = sentence_embeddings = None
 
                 score = (similarity or 0) * semantic_weight
                 combined[chunk_id] = {
                     'chunk_id': chunk_id,
                     'document_id': doc_id,
                     'content': content,
+                    'chunk_index': chunk_index,
+                    'filename': filename,
+                    'sentence_spans': sentence_spans,
+                    'sentence_embeddings': sentence_embeddings,
                     'score': score,
                     'source': 'semantic'
                 }
@@ -334,6 +522,7 @@ class HybridRetriever:
                     'chunk_id': chunk_id,
                     'document_id': result['document_id'],
                     'content': result['content'],
+                    'chunk_index': result.get('chunk_index'),
                     'score': score,
                     'source': 'keyword'
                 }
@@ -347,6 +536,7 @@ class HybridRetriever:
                     'chunk_id': r.get('chunk_id'),
                     'document_id': r.get('document_id'),
                     'content': r.get('content'),
+                    'chunk_index': r.get('chunk_index'),
                     'score': 0.1,  # low base score for keyword-only
                     'source': 'keyword'
                 })
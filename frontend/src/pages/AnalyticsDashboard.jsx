@@ -85,6 +85,9 @@ const CustomTooltip = ({ active, payload, label, isDarkMode }) => {
   return null;
 };
 
+// Upper bound on points sent to line and area charts
+const MAX_CHART_POINTS = 500;
+
 const TABS = {
   admin: [
     { key: 'analytics', label: 'Analytics' },
@@ -313,14 +316,55 @@ export default function AnalyticsDashboard({ role: initialRole }) {
     }
   };
 
+  // Aggregate the full saved dataset server-side; line/area charts are downsampled
+  const fetchChartData = async (xColumn, yColumn, chartType) => {
+    const response = await axios.post('http://localhost:8000/api/analytics/query', {
+      group_by: [xColumn],
+      metrics: [
+        { column: yColumn, agg: 'sum', alias: yColumn },
+        { agg: 'count', alias: 'count' }
+      ],
+      order_by: yColumn,
+      descending: true,
+      y_column: yColumn,
+      max_points: chartType === 'line' || chartType === 'area' ? MAX_CHART_POINTS : null
+    }, {
+      headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
+    });
+
+    const rows = response.data.rows || [];
+    if (chartType === 'pie') {
+      const total = rows.reduce((sum, row) => sum + (row[yColumn] || 0), 0);
+      return rows.map(row => ({
+        name: row[xColumn],
+        value: row[yColumn] || 0,
+        count: row.count,
+        percentage: total > 0 ? (((row[yColumn] || 0) / total) * 100).toFixed(1) : 0
+      }));
+    }
+    return rows.map(row => ({ ...row, [yColumn]: row[yColumn] || 0 }));
+  };
+
   // Update processed data when columns or chart type changes
   useEffect(() => {
-    if (uploadedFileData && uploadedFileData.data && selectedXColumn && selectedYColumn) {
-      const processed = processChartData(uploadedFileData.data, selectedXColumn, selectedYColumn, uploadedChartType);
-      setProcessedChartData(processed);
-    } else {
+    if (!(uploadedFileData && selectedXColumn && selectedYColumn)) {
       setProcessedChartData(null);
+      return;
     }
+
+    let cancelled = false;
+    fetchChartData(selectedXColumn, selectedYColumn, uploadedChartType)
+      .then(processed => {
+        if (!cancelled) setProcessedChartData(processed);
+      })
+      .catch(error => {
+        // Fall back to the preview rows we already have
+        console.error('Error querying dataset:', error);
+        if (!cancelled && uploadedFileData.data) {
+          setProcessedChartData(processChartData(uploadedFileData.data, selectedXColumn, selectedYColumn, uploadedChartType));
+        }
+      });
+    return () => { cancelled = true; };
   }, [uploadedFileData, selectedXColumn, selectedYColumn, uploadedChartType]);
 
   // Removed fetchAnalytics - not needed anymore
@@ -172,7 +172,13 @@ export default function ChatbotPage() {
   const [userDocs, setUserDocs] = useState([]);
   const [selectedDocIds, setSelectedDocIds] = useState([]);
   const [loadingUserDocs, setLoadingUserDocs] = useState(false);
+  // Cursor of the next page of user documents (null when all are loaded)
+  const [userDocsCursor, setUserDocsCursor] = useState(null);
+  // Pages of user documents currently shown (first page plus "load more" pages)
+  const userDocsPagesRef = useRef(0);
   const [isWaitingForIndexing, setIsWaitingForIndexing] = useState(false);
+  // Latest processing status per document id, kept current by the progress stream
+  const docStatusRef = useRef(new Map());
 
   // Handle document upload
   const handleDocumentUpload = (e) => {
@@ -211,7 +217,11 @@ export default function ChatbotPage() {
       const resp = await axios.get('http://localhost:8000/api/chat/user-documents', {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setUserDocs(resp.data.documents || []);
+      const docs = resp.data.documents || [];
+      docs.forEach(d => docStatusRef.current.set(d.document_id, d.processing_status));
+      setUserDocs(docs);
+      setUserDocsCursor(resp.data.next_cursor || null);
+      userDocsPagesRef.current = 1;
     } catch (err) {
       console.error('Failed to fetch user documents', err);
     } finally {
@@ -219,34 +229,131 @@ export default function ChatbotPage() {
     }
   };
 
-  // Polling helper: wait until provided document IDs have status 'completed' or timeout
-  const pollDocumentCompletion = async (docIds, token, timeoutMs = 30000, intervalMs = 2000) => {
+  // Re-read only the first page and merge it in, keeping pages loaded after it
+  const refreshUserDocuments = async (token) => {
+    if (userDocsPagesRef.current <= 1) return fetchUserDocuments(token);
+    try {
+      const resp = await axios.get('http://localhost:8000/api/chat/user-documents', {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      const firstPage = resp.data.documents || [];
+      firstPage.forEach(d => docStatusRef.current.set(d.document_id, d.processing_status));
+      const last = firstPage[firstPage.length - 1];
+      // Newest first by (upload_date, document_id): keep what sorts after the first page
+      const isOlder = (doc) => !last || doc.upload_date < last.upload_date
+        || (doc.upload_date === last.upload_date && doc.document_id < last.document_id);
+      setUserDocs(prev => [...firstPage, ...prev.filter(isOlder)]);
+    } catch (err) {
+      console.error('Failed to refresh user documents', err);
+    }
+  };
+
+  // Append the next page of user documents
+  const loadMoreUserDocuments = async () => {
+    const token = localStorage.getItem('token');
+    if (!token || !userDocsCursor) return;
+    try {
+      const resp = await axios.get('http://localhost:8000/api/chat/user-documents', {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { cursor: userDocsCursor }
+      });
+      const docs = resp.data.documents || [];
+      docs.forEach(d => docStatusRef.current.set(d.document_id, d.processing_status));
+      setUserDocs(prev => [...prev, ...docs]);
+      setUserDocsCursor(resp.data.next_cursor || null);
+      userDocsPagesRef.current += 1;
+    } catch (err) {
+      console.error('Failed to fetch more user documents', err);
+    }
+  };
+
+  // Wait until the given document IDs are 'completed' (statuses arrive over the progress stream).
+  // Events from a worker the stream isn't connected to can be missed, so statuses are also
+  // re-read from the document list every pollMs.
+  const waitForDocuments = async (docIds, timeoutMs = 30000, pollMs = 3000) => {
+    const token = localStorage.getItem('token');
     const start = Date.now();
+    let lastPoll = start;
     while (Date.now() - start < timeoutMs) {
-      try {
-        const resp = await axios.get('http://localhost:8000/api/chat/user-documents', {
-          headers: { Authorization: `Bearer ${token}` }
-        });
-        const docs = resp.data.documents || [];
-        const idToStatus = new Map(docs.map(d => [d.document_id, d.processing_status]));
-        const unfinished = docIds.filter(id => idToStatus.get(id) !== 'completed');
-        setUserDocs(docs);
-        if (unfinished.length === 0) return true;
-      } catch (err) {
-        console.error('Polling error', err);
+      const statuses = docIds.map(id => docStatusRef.current.get(id));
+      if (statuses.every(s => s === 'completed')) return true;
+      if (statuses.every(s => s === 'completed' || s === 'failed')) return false;
+      if (token && Date.now() - lastPoll >= pollMs) {
+        lastPoll = Date.now();
+        try {
+          const resp = await axios.get('http://localhost:8000/api/chat/user-documents', {
+            headers: { Authorization: `Bearer ${token}` },
+            params: { limit: 200 }
+          });
+          (resp.data.documents || []).forEach(d => docStatusRef.current.set(d.document_id, d.processing_status));
+        } catch (err) {
+          console.error('Failed to poll document status', err);
+        }
       }
-      await new Promise(r => setTimeout(r, intervalMs));
+      await new Promise(r => setTimeout(r, 250));
     }
     return false;
   };
 
-  // Load user docs on mount and refresh periodically
+  // Apply one progress event to the document list
+  const handleDocumentEvent = (event, token) => {
+    const known = docStatusRef.current.has(event.document_id);
+    docStatusRef.current.set(event.document_id, event.status);
+    setUserDocs(prev => prev.map(doc => (
+      doc.document_id === event.document_id
+        ? { ...doc, processing_status: event.status, progress: event }
+        : doc
+    )));
+    // New documents (e.g. uploaded from another tab) and final states come from the list endpoint
+    if (!known || event.stage === 'completed' || event.stage === 'failed') {
+      refreshUserDocuments(token);
+    }
+  };
+
+  // Server-sent events over fetch (EventSource cannot send the Authorization header)
+  const streamDocumentEvents = async (token, onEvent, signal) => {
+    const resp = await fetch('http://localhost:8000/api/chat/document-events', {
+      headers: { Authorization: `Bearer ${token}` },
+      signal
+    });
+    if (!resp.ok || !resp.body) throw new Error(`Progress stream failed (${resp.status})`);
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const data = message.split('\n').filter(l => l.startsWith('data: ')).map(l => l.slice(6)).join('\n');
+        if (data) onEvent(JSON.parse(data));
+      }
+    }
+  };
+
+  // Load user docs on mount, then follow processing progress over one long-lived stream
   useEffect(() => {
     const token = localStorage.getItem('token');
     if (!token) return;
     fetchUserDocuments(token);
-    const iv = setInterval(() => fetchUserDocuments(token), 10000);
-    return () => clearInterval(iv);
+    const controller = new AbortController();
+    (async () => {
+      while (!controller.signal.aborted) {
+        try {
+          await streamDocumentEvents(token, (event) => handleDocumentEvent(event, token), controller.signal);
+        } catch (err) {
+          if (controller.signal.aborted) return;
+          console.error('Document progress stream error', err);
+        }
+        // Reconnect after a pause; resync the list in case events were missed
+        await new Promise(r => setTimeout(r, 5000));
+        if (!controller.signal.aborted) refreshUserDocuments(token);
+      }
+    })();
+    return () => controller.abort();
   }, []);
 
   // Load saved chats from API on mount
@@ -522,7 +629,7 @@ export default function ChatbotPage() {
         if (documentIds && documentIds.length > 0) {
           // Optionally wait for indexing to finish before sending the chat
           setIsWaitingForIndexing(true);
-          const allIndexed = await pollDocumentCompletion(documentIds, token, 30000, 2000);
+          const allIndexed = await waitForDocuments(documentIds, 30000);
           setIsWaitingForIndexing(false);
           if (!allIndexed) {
             toast.info('Some documents are still indexing; answers may be incomplete.');
@@ -531,7 +638,7 @@ export default function ChatbotPage() {
         } else if (selectedDocIds && selectedDocIds.length > 0) {
           // If user selected previously uploaded docs, ensure they are ready (optional wait)
           setIsWaitingForIndexing(true);
-          const allIndexed = await pollDocumentCompletion(selectedDocIds, token, 30000, 2000);
+          const allIndexed = await waitForDocuments(selectedDocIds, 30000);
           setIsWaitingForIndexing(false);
           if (!allIndexed) {
             toast.info('Some selected documents are still indexing; answers may be incomplete.');
@@ -764,6 +871,9 @@ export default function ChatbotPage() {
                           <div className="flex items-center gap-2">
                             {doc.processing_status === 'processing' && <ImSpinner8 className="animate-spin text-indigo-500" size={14} />}
                             <span className={`text-xs ${doc.processing_status === 'completed' ? 'text-green-600' : doc.processing_status === 'failed' ? 'text-red-600' : 'text-yellow-600'}`}>{doc.processing_status}</span>
+                            {doc.processing_status === 'processing' && doc.progress?.chunks_total && (
+                              <span className="text-xs text-gray-500">{doc.progress.chunks_embedded || 0}/{doc.progress.chunks_total}</span>
+                            )}
                             <button
                               onClick={() => deleteUserDocument(doc.document_id)}
                               className="text-red-500 hover:text-red-700 ml-1"
@@ -776,6 +886,9 @@ export default function ChatbotPage() {
                         </div>
                       ))
                     )}
+                    {userDocsCursor && (
+                      <button onClick={loadMoreUserDocuments} className="text-xs text-indigo-600 mt-1">Load more</button>
+                    )}
                   </div>
                 </div>
               </div>